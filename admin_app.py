@@ -34,11 +34,14 @@ from core.config_manager import ConfigManager
 from utils.camera_utils import CameraManager
 from utils.gpu_utils import detect_gpu_capability
 from utils.report_generator import ReportGenerator
+from utils.jpeg_utils import encode_jpeg, mjpeg_part
+from utils.json_utils import use_fast_json
 
 app = Flask(__name__, 
            template_folder='templates',
            static_folder='static')
 CORS(app)
+use_fast_json(app)  # orjson for API responses when installed
 
 # Global variables
 db_manager = None
@@ -73,6 +76,12 @@ def init_admin_system():
         traceback.print_exc()
         return False
 
+def _default_employee_id(staff_id):
+    """Employee ID derived from the staff_id format (e.g., "STAFF_4730" -> "4730")"""
+    if not staff_id:
+        return None
+    return staff_id[6:] if staff_id.startswith('STAFF_') else staff_id
+
 # ==================== ROUTES ====================
 
 @app.route('/')
@@ -87,22 +96,20 @@ def get_all_staff_admin():
     """Get all staff members with full details"""
     try:
         all_staff = db_manager.get_all_staff()
+        
+        # Today's attendance once for everyone, indexed by staff_id
+        attendance_data = db_manager.get_today_attendance(date.today())
+        attendance_records = attendance_data.get('attendance', []) if isinstance(attendance_data, dict) else []
+        attendance_by_staff = {}
+        for att in attendance_records:
+            attendance_by_staff.setdefault(att.get('staff_id'), att)
+        
         staff_list = []
         for staff in all_staff:
             # Get employee ID
-            employee_id = staff.get('employee_id')
-            if not employee_id:
-                if staff['staff_id'].startswith('STAFF_'):
-                    employee_id = staff['staff_id'].replace('STAFF_', '')
-                else:
-                    employee_id = staff['staff_id']
-            
-            # Get attendance stats
-            today = date.today()
-            attendance_data = db_manager.get_today_attendance(today)
-            attendance_records = attendance_data.get('attendance', []) if isinstance(attendance_data, dict) else []
+            employee_id = staff.get('employee_id') or _default_employee_id(staff['staff_id'])
             
-            staff_attendance = next((a for a in attendance_records if a.get('staff_id') == staff['staff_id']), None)
+            staff_attendance = attendance_by_staff.get(staff['staff_id'])
             
             staff_list.append({
                 'staff_id': staff['staff_id'],
@@ -399,22 +406,32 @@ def get_staff_photo(staff_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _build_placeholder_photo_jpeg():
+    """Gray 300x400 card shown when a staff member has no photo, encoded once"""
+    img_io = io.BytesIO()
+    Image.new('RGB', (300, 400), color='gray').save(img_io, 'JPEG')
+    return img_io.getvalue()
+
+PLACEHOLDER_PHOTO_JPEG = _build_placeholder_photo_jpeg()
+
+def _photo_response(photo_jpeg):
+    """JPEG response the browser may cache but must revalidate (ETag -> 304 when unchanged)"""
+    response = Response(photo_jpeg, mimetype='image/jpeg')
+    response.add_etag()
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
 @app.route('/api/admin/staff/<staff_id>/showcase-photo', methods=['GET'])
 def get_staff_showcase_photo(staff_id):
     """Get staff showcase photo (for display during detection)"""
     try:
-        showcase_photo = db_manager.get_staff_showcase_photo(staff_id)
-        if showcase_photo is not None:
-            success, buffer = cv2.imencode('.jpg', showcase_photo)
-            if success:
-                return Response(buffer.tobytes(), mimetype='image/jpeg')
+        # Stored blob is already a JPEG - no decode/re-encode per request
+        photo_jpeg = db_manager.get_staff_showcase_photo_jpeg(staff_id)
+        if photo_jpeg:
+            return _photo_response(photo_jpeg)
         
         # Return placeholder if no showcase photo
-        img = Image.new('RGB', (300, 400), color='gray')
-        img_io = io.BytesIO()
-        img.save(img_io, 'JPEG')
-        img_io.seek(0)
-        return Response(img_io, mimetype='image/jpeg')
+        return _photo_response(PLACEHOLDER_PHOTO_JPEG)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -466,28 +483,19 @@ def get_today_attendance_admin():
         else:
             target_date = date.today()
         
-        attendance_data = db_manager.get_today_attendance(target_date)
+        # Staff name/department come joined in - no get_staff_info round-trip per record
+        attendance_data = db_manager.get_today_attendance(target_date, include_staff=True)
         attendance_records = attendance_data.get('attendance', []) if isinstance(attendance_data, dict) else []
         checkin_events = attendance_data.get('checkins', []) if isinstance(attendance_data, dict) else []
         
-        # Enrich with staff info
         attendance_list = []
         for att in attendance_records:
             staff_id = att.get('staff_id')
-            staff_info = db_manager.get_staff_info(staff_id)
-            
-            employee_id = staff_info.get('employee_id') if staff_info else None
-            if not employee_id and staff_id:
-                if staff_id.startswith('STAFF_'):
-                    employee_id = staff_id.replace('STAFF_', '')
-                else:
-                    employee_id = staff_id
-            
             attendance_list.append({
                 'staff_id': staff_id,
-                'employee_id': employee_id,
-                'name': staff_info.get('name', 'Unknown') if staff_info else 'Unknown',
-                'department': staff_info.get('department', '') if staff_info else '',
+                'employee_id': _default_employee_id(staff_id),
+                'name': att.get('name') or 'Unknown',
+                'department': att.get('department') or '',
                 'date': att.get('date'),
                 'check_in_time': att.get('check_in_time').isoformat() if att.get('check_in_time') else None,
                 'check_out_time': att.get('check_out_time').isoformat() if att.get('check_out_time') else None,
@@ -495,24 +503,15 @@ def get_today_attendance_admin():
                 'confidence': att.get('confidence', 0.0)
             })
         
-        # Enrich check-in events
+        # Check-in events
         checkin_list = []
         for ev in checkin_events:
             staff_id = ev.get('staff_id')
-            staff_info = db_manager.get_staff_info(staff_id)
-            
-            employee_id = staff_info.get('employee_id') if staff_info else None
-            if not employee_id and staff_id:
-                if staff_id.startswith('STAFF_'):
-                    employee_id = staff_id.replace('STAFF_', '')
-                else:
-                    employee_id = staff_id
-            
             checkin_list.append({
                 'staff_id': staff_id,
-                'employee_id': employee_id,
-                'name': staff_info.get('name', 'Unknown') if staff_info else 'Unknown',
-                'department': staff_info.get('department', '') if staff_info else '',
+                'employee_id': _default_employee_id(staff_id),
+                'name': ev.get('name') or 'Unknown',
+                'department': ev.get('department') or '',
                 'date': ev.get('date'),
                 'check_time': ev.get('check_time'),
                 'status': ev.get('status', 'Present'),
@@ -546,25 +545,16 @@ def get_attendance_range():
         all_attendance = []
         current_date = start_date
         while current_date <= end_date:
-            attendance_data = db_manager.get_today_attendance(current_date)
+            attendance_data = db_manager.get_today_attendance(current_date, include_staff=True)
             attendance_records = attendance_data.get('attendance', []) if isinstance(attendance_data, dict) else []
             
             for att in attendance_records:
                 staff_id = att.get('staff_id')
-                staff_info = db_manager.get_staff_info(staff_id)
-                
-                employee_id = staff_info.get('employee_id') if staff_info else None
-                if not employee_id and staff_id:
-                    if staff_id.startswith('STAFF_'):
-                        employee_id = staff_id.replace('STAFF_', '')
-                    else:
-                        employee_id = staff_id
-                
                 all_attendance.append({
                     'staff_id': staff_id,
-                    'employee_id': employee_id,
-                    'name': staff_info.get('name', 'Unknown') if staff_info else 'Unknown',
-                    'department': staff_info.get('department', '') if staff_info else '',
+                    'employee_id': _default_employee_id(staff_id),
+                    'name': att.get('name') or 'Unknown',
+                    'department': att.get('department') or '',
                     'date': current_date.isoformat(),
                     'check_in_time': att.get('check_in_time').isoformat() if att.get('check_in_time') else None,
                     'check_out_time': att.get('check_out_time').isoformat() if att.get('check_out_time') else None,
@@ -610,21 +600,14 @@ def export_attendance():
         # Get data
         current_date = start_date
         while current_date <= end_date:
-            attendance_data = db_manager.get_today_attendance(current_date)
+            attendance_data = db_manager.get_today_attendance(current_date, include_staff=True)
             attendance_records = attendance_data.get('attendance', []) if isinstance(attendance_data, dict) else []
             
             for att in attendance_records:
-                staff_id = att.get('staff_id')
-                staff_info = db_manager.get_staff_info(staff_id)
-                
-                employee_id = staff_info.get('employee_id') if staff_info else staff_id
-                if not employee_id and staff_id.startswith('STAFF_'):
-                    employee_id = staff_id.replace('STAFF_', '')
-                
                 writer.writerow([
-                    employee_id,
-                    staff_info.get('name', 'Unknown') if staff_info else 'Unknown',
-                    staff_info.get('department', '') if staff_info else '',
+                    _default_employee_id(att.get('staff_id')),
+                    att.get('name') or 'Unknown',
+                    att.get('department') or '',
                     current_date.isoformat(),
                     att.get('check_in_time').strftime('%H:%M:%S') if att.get('check_in_time') else '',
                     att.get('check_out_time').strftime('%H:%M:%S') if att.get('check_out_time') else '',
@@ -710,23 +693,21 @@ def camera_stream():
                     img_io = io.BytesIO()
                     img.save(img_io, 'JPEG')
                     img_io.seek(0)
-                    yield (b'--frame\r\n'
-                           b'Content-Type: image/jpeg\r\n\r\n' + img_io.getvalue() + b'\r\n')
+                    yield mjpeg_part(img_io.getvalue())
                     return
             
             frame_count = 0
             while True:
                 try:
-                    frame = camera_manager.get_frame()
+                    # Block until the capture thread publishes a new frame - paced by the camera,
+                    # not a fixed sleep; the timeout keeps the connection check below running
+                    frame = camera_manager.get_frame(timeout=1.0)
                     if frame is not None:
                         # Encode frame as JPEG
-                        ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-                        if ret:
-                            yield (b'--frame\r\n'
-                                   b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
+                        frame_bytes = encode_jpeg(frame)
+                        if frame_bytes is not None:
+                            yield mjpeg_part(frame_bytes)
                             frame_count += 1
-                    else:
-                        time.sleep(0.03)  # ~30 FPS
                     
                     # Check if camera is still connected
                     if not camera_manager.is_connected():
@@ -742,8 +723,7 @@ def camera_stream():
             img_io = io.BytesIO()
             img.save(img_io, 'JPEG')
             img_io.seek(0)
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + img_io.getvalue() + b'\r\n')
+            yield mjpeg_part(img_io.getvalue())
     
     return Response(generate(), mimetype='multipart/x-mixed-replace; boundary=frame')
 
@@ -862,30 +842,21 @@ def get_realtime_attendance():
     """Get real-time attendance updates"""
     try:
         today = date.today()
-        attendance_data = db_manager.get_today_attendance(today)
+        attendance_data = db_manager.get_today_attendance(today, include_staff=True)
         attendance_records = attendance_data.get('attendance', []) if isinstance(attendance_data, dict) else []
         checkin_events = attendance_data.get('checkins', []) if isinstance(attendance_data, dict) else []
         
         # Get recent check-ins (last 10)
         recent_checkins = sorted(checkin_events, key=lambda x: x.get('check_time', ''), reverse=True)[:10]
         
-        # Enrich with staff info
+        # Staff names come joined in with the events
         enriched_checkins = []
         for ev in recent_checkins:
             staff_id = ev.get('staff_id')
-            staff_info = db_manager.get_staff_info(staff_id)
-            
-            employee_id = staff_info.get('employee_id') if staff_info else None
-            if not employee_id and staff_id:
-                if staff_id.startswith('STAFF_'):
-                    employee_id = staff_id.replace('STAFF_', '')
-                else:
-                    employee_id = staff_id
-            
             enriched_checkins.append({
                 'staff_id': staff_id,
-                'employee_id': employee_id,
-                'name': staff_info.get('name', 'Unknown') if staff_info else 'Unknown',
+                'employee_id': _default_employee_id(staff_id),
+                'name': ev.get('name') or 'Unknown',
                 'check_time': ev.get('check_time'),
                 'status': ev.get('status', 'Present'),
                 'late_minutes': ev.get('late_minutes', 0)
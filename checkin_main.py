@@ -4,6 +4,7 @@
 
 import os
 import sys
+import logging
 import tkinter as tk
 from tkinter import messagebox
 
@@ -63,6 +64,13 @@ def main():
     try:
         print("🚀 Starting IMPEX Check-In System...")
         
+        # Dashboard trace goes through logging - INFO to the console, like main.py
+        logging.basicConfig(
+            level=logging.INFO,
+            format='%(asctime)s - %(levelname)s - %(message)s',
+            handlers=[logging.StreamHandler(sys.stdout)]
+        )
+        
         # Import after path setup
         from core.config_manager import ConfigManager
         from utils.gpu_utils import detect_gpu_capability
@@ -279,12 +279,17 @@ The system will continue to run with limited functionality."""
         """Open staff management window"""
         try:
             if hasattr(self, 'StaffManagementWindow'):
-                self.StaffManagementWindow(self.root)
+                self.StaffManagementWindow(self.root, on_staff_changed=self.on_staff_changed)
             else:
                 messagebox.showerror("Error", "Staff management module not available")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to open staff management: {e}")
 
+    def on_staff_changed(self):
+        """Staff were added, edited or deleted - drop the dashboard's cached roster/info"""
+        if self.dashboard and hasattr(self.dashboard, 'invalidate_staff_cache'):
+            self.dashboard.invalidate_staff_cache()
+
     def open_admin_panel(self):
         """Open admin panel for managing employees"""
         try:
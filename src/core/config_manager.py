@@ -40,6 +40,17 @@ class ConfigManager:
             # matches but may introduce false positives. Recommended range:
             # 0.55-0.7 based on environment.
             "confidence_threshold": 0.55,
+            # Store the staff gallery as an 8-bit faiss index instead of float32.
+            # Cuts gallery memory 4x for large staff lists at a negligible
+            # accuracy cost. Needs faiss; ignored without it.
+            "int8_staff_gallery": False,
+            # Run the full-frame display stages (background blend, resize, color
+            # conversion) through OpenCL when available - helps integrated GPUs.
+            "opencl_overlays": False,
+            # Web server: run MediaPipe on a 320 px frame first and skip the
+            # InsightFace detector when it finds no face. Short-range model,
+            # so leave off for cameras mounted far from the entrance.
+            "mediapipe_face_gate": False,
         }
         
         if os.path.exists(self.settings_file):
@@ -60,7 +71,11 @@ class ConfigManager:
             "system_name": "IMPEX Attendance System",
             "database_path": "data/factory_attendance.db",
             "allow_mode_switch": True,
-            "locked_mode": False
+            "locked_mode": False,
+            # Waitress worker threads per server. Every open live-video page (dashboard
+            # /video_feed, admin camera preview) holds one thread for as long as it stays
+            # open, so size this as max simultaneous viewers + ~8 for API requests.
+            "server_threads": 24
         }
         
         if os.path.exists(self.system_file):
@@ -148,6 +163,9 @@ class ConfigManager:
             "buffer_size": 1,  # Minimum buffer for lowest latency
             "transport": "TCP",
             "camera_mac": None,
+            "use_gstreamer": True,  # appsink pipeline for RTSP when OpenCV has GStreamer
+            "gstreamer_latency": 0,  # rtspsrc jitter buffer in ms
+            "gstreamer_decoder": "auto",  # auto = decodebin, or e.g. nvv4l2decoder / vaapih264dec
         }
         print(f"Using default camera settings: {default_settings}")
         return default_settings
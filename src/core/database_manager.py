@@ -3,14 +3,37 @@
 import sqlite3
 import numpy as np
 import pickle
-from datetime import datetime, date
+from datetime import datetime, date, time as dtime
 import threading
 import os
 
+# Attendance cutoffs (check-ins after 9:00 AM up to 9:20 AM count as Late)
+EXPECTED_CHECKIN_TIME = dtime(9, 0, 0)
+LATE_WINDOW_END = dtime(9, 20, 0)
+EXPECTED_CHECKIN_MINUTES = EXPECTED_CHECKIN_TIME.hour * 60 + EXPECTED_CHECKIN_TIME.minute
+
+
+class _ThreadConnection(sqlite3.Connection):
+    """Connection kept open for the life of its thread (see DatabaseManager._connect)
+
+    close() only discards an uncommitted transaction - what closing used to imply -
+    so the existing "connect ... close()" call sites keep their semantics.
+    """
+
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+
+    def really_close(self):
+        """Actually close the connection (see DatabaseManager.close_thread_connection)"""
+        super().close()
+
+
 class DatabaseManager:
     def __init__(self, db_path="data/factory_attendance.db"):
         self.db_path = db_path
-        self.lock = threading.Lock()
+        self.lock = threading.Lock()  # Serializes writers; reads run unlocked on per-thread connections
+        self._local = threading.local()
         
         # Ensure the data directory exists
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
@@ -23,13 +46,56 @@ class DatabaseManager:
         
         print(f"Database initialized at: {self.db_path}")
 
+    def _connect(self, dedicated=False):
+        """Return this thread's connection, opening it (with the tuning pragmas) on first use
+
+        Each Flask worker / background thread gets its own connection, so with WAL the
+        read methods run concurrently instead of queueing on one lock and one connection.
+        dedicated=True opens a private connection that close() really closes, for callers
+        that change per-connection settings such as foreign_keys.
+        """
+        if dedicated:
+            conn = sqlite3.connect(self.db_path)
+        else:
+            conn = getattr(self._local, 'conn', None)
+            if conn is not None:
+                # A call that raised before commit/close must not leak its transaction into this one
+                if conn.in_transaction:
+                    conn.rollback()
+                return conn
+            conn = sqlite3.connect(self.db_path, factory=_ThreadConnection)
+        # WAL (set once in init_database) stays consistent with NORMAL sync - one fsync per checkpoint,
+        # not per commit. Tradeoff: an OS crash or power cut can lose the last few committed check-ins
+        # (never corrupts the file); an app crash loses nothing.
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA mmap_size = 268435456")
+        conn.execute("PRAGMA cache_size = -20000")  # ~20 MB page cache (negative = KiB)
+        if not dedicated:
+            self._local.conn = conn
+        return conn
+
+    def close_thread_connection(self):
+        """Close the calling thread's connection - long-lived worker threads call this as they exit
+
+        Short-lived threads (Flask request workers) can skip it; their connection is closed
+        when the thread's locals are garbage-collected.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.conn = None
+            conn.really_close()
+
     def init_database(self):
         """Initialize database tables with proper schema"""
         try:
             with self.lock:
-                conn = sqlite3.connect(self.db_path)
+                conn = self._connect(dedicated=True)  # Toggles foreign_keys - keep it off the shared connection
                 cursor = conn.cursor()
                 
+                # WAL journal persists in the database file; readers no longer wait on writers
+                cursor.execute("PRAGMA journal_mode = WAL")
+                
                 # Enable foreign keys
                 cursor.execute("PRAGMA foreign_keys = ON")
                 
@@ -184,7 +250,7 @@ class DatabaseManager:
         """Fix database schema by adding missing columns"""
         try:
             with self.lock:
-                conn = sqlite3.connect(self.db_path)
+                conn = self._connect()
                 cursor = conn.cursor()
                 
                 # Check existing columns in visits table
@@ -231,7 +297,7 @@ class DatabaseManager:
         """Fixed customer visit recording with proper error handling"""
         try:
             with self.lock:
-                conn = sqlite3.connect(self.db_path)
+                conn = self._connect()
                 cursor = conn.cursor()
                 
                 today = date.today()
@@ -322,50 +388,49 @@ class DatabaseManager:
     def check_daily_visit_status(self, customer_id):
         """Check if customer already visited today and get visit statistics"""
         try:
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                today = date.today()
-                
-                cursor.execute('''
-                    SELECT
-                        dvs.total_visits_today,
-                        dvs.total_visits_overall,
-                        dvs.first_visit_time,
-                        c.total_visits as customer_total_visits
-                    FROM daily_visit_summary dvs
-                    JOIN customers c ON dvs.customer_id = c.customer_id
-                    WHERE dvs.customer_id = ? AND dvs.visit_date = ?
-                ''', (customer_id, today))
-                
-                result = cursor.fetchone()
-                
-                if result:
-                    conn.close()
-                    return {
-                        'visited_today': True,
-                        'visits_today': result[0],
-                        'total_visits': result[1],
-                        'first_visit_time': result[2],
-                        'customer_total_visits': result[3]
-                    }
-                
-                # Get total visits from customers table if no daily record
-                cursor.execute('SELECT total_visits FROM customers WHERE customer_id = ?', (customer_id,))
-                total_result = cursor.fetchone()
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            today = date.today()
+            
+            cursor.execute('''
+                SELECT
+                    dvs.total_visits_today,
+                    dvs.total_visits_overall,
+                    dvs.first_visit_time,
+                    c.total_visits as customer_total_visits
+                FROM daily_visit_summary dvs
+                JOIN customers c ON dvs.customer_id = c.customer_id
+                WHERE dvs.customer_id = ? AND dvs.visit_date = ?
+            ''', (customer_id, today))
+            
+            result = cursor.fetchone()
+            
+            if result:
                 conn.close()
-                
-                total = total_result[0] if total_result else 0
-                
                 return {
-                    'visited_today': False,
-                    'visits_today': 0,
-                    'total_visits': total,
-                    'first_visit_time': None,
-                    'customer_total_visits': total
+                    'visited_today': True,
+                    'visits_today': result[0],
+                    'total_visits': result[1],
+                    'first_visit_time': result[2],
+                    'customer_total_visits': result[3]
                 }
-                
+            
+            # Get total visits from customers table if no daily record
+            cursor.execute('SELECT total_visits FROM customers WHERE customer_id = ?', (customer_id,))
+            total_result = cursor.fetchone()
+            conn.close()
+            
+            total = total_result[0] if total_result else 0
+            
+            return {
+                'visited_today': False,
+                'visits_today': 0,
+                'total_visits': total,
+                'first_visit_time': None,
+                'customer_total_visits': total
+            }
+            
         except Exception as e:
             print(f"❌ Error checking daily visit status: {e}")
             return {
@@ -380,7 +445,7 @@ class DatabaseManager:
         """Register a new customer with proper embedding storage"""
         try:
             with self.lock:
-                conn = sqlite3.connect(self.db_path)
+                conn = self._connect()
                 cursor = conn.cursor()
                 
                 # Generate customer ID
@@ -411,7 +476,7 @@ class DatabaseManager:
         try:
             import cv2
             with self.lock:
-                conn = sqlite3.connect(self.db_path)
+                conn = self._connect()
                 cursor = conn.cursor()
                 
                 # Store embedding properly
@@ -452,26 +517,25 @@ class DatabaseManager:
     def load_customers(self):
         """Load all active customers and their embeddings"""
         try:
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                cursor.execute("SELECT customer_id, embedding FROM customers WHERE is_active = 1 AND embedding IS NOT NULL")
-                customers = []
-                
-                for row in cursor.fetchall():
-                    customer_id, embedding_blob = row
-                    try:
-                        embedding = pickle.loads(embedding_blob)
-                        customers.append({'id': customer_id, 'embedding': embedding})
-                    except Exception as e:
-                        print(f"⚠️ Error loading embedding for customer {customer_id}: {e}")
-                        continue
-                
-                conn.close()
-                print(f"✅ Loaded {len(customers)} customers")
-                return customers
-                
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT customer_id, embedding FROM customers WHERE is_active = 1 AND embedding IS NOT NULL")
+            customers = []
+            
+            for row in cursor.fetchall():
+                customer_id, embedding_blob = row
+                try:
+                    embedding = pickle.loads(embedding_blob)
+                    customers.append({'id': customer_id, 'embedding': embedding})
+                except Exception as e:
+                    print(f"⚠️ Error loading embedding for customer {customer_id}: {e}")
+                    continue
+            
+            conn.close()
+            print(f"✅ Loaded {len(customers)} customers")
+            return customers
+            
         except Exception as e:
             print(f"❌ Error loading customers: {e}")
             return []
@@ -479,28 +543,27 @@ class DatabaseManager:
     def load_staff(self):
         """Load all active staff and their embeddings - FIXED"""
         try:
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                cursor.execute("SELECT staff_id, embedding FROM staff WHERE is_active = 1 AND embedding IS NOT NULL")
-                
-                staff = []
-                for row in cursor.fetchall():
-                    staff_id, embedding_blob = row
-                    try:
-                        if embedding_blob:
-                            # FIXED: Use pickle.loads consistently
-                            embedding = pickle.loads(embedding_blob)
-                            if isinstance(embedding, np.ndarray) and embedding.size > 0:
-                                staff.append({'id': staff_id, 'embedding': embedding})
-                    except Exception as e:
-                        print(f"⚠️ Embedding error for {staff_id}: {e}")
-                        continue
-                
-                conn.close()
-                print(f"✅ Loaded {len(staff)} staff members")
-                return staff
-                
+            conn = self._connect()
+            cursor = conn.cursor()
+            cursor.execute("SELECT staff_id, embedding FROM staff WHERE is_active = 1 AND embedding IS NOT NULL")
+            
+            staff = []
+            for row in cursor.fetchall():
+                staff_id, embedding_blob = row
+                try:
+                    if embedding_blob:
+                        # FIXED: Use pickle.loads consistently
+                        embedding = pickle.loads(embedding_blob)
+                        if isinstance(embedding, np.ndarray) and embedding.size > 0:
+                            staff.append({'id': staff_id, 'embedding': embedding})
+                except Exception as e:
+                    print(f"⚠️ Embedding error for {staff_id}: {e}")
+                    continue
+            
+            conn.close()
+            print(f"✅ Loaded {len(staff)} staff members")
+            return staff
+            
         except Exception as e:
             print(f"❌ Error loading staff: {e}")
             return []
@@ -509,29 +572,28 @@ class DatabaseManager:
     def get_all_customers(self):
         """Get all customers with detailed information"""
         try:
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    SELECT customer_id, name, embedding, first_visit, total_visits, last_visit
-                    FROM customers WHERE is_active = 1
-                ''')
-                
-                customers = []
-                for row in cursor.fetchall():
-                    customers.append({
-                        'customer_id': row[0],
-                        'name': row[1],
-                        'embedding': row[2],
-                        'first_visit': row[3],
-                        'total_visits': row[4],
-                        'last_visit': row[5]
-                    })
-                
-                conn.close()
-                return customers
-                
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT customer_id, name, embedding, first_visit, total_visits, last_visit
+                FROM customers WHERE is_active = 1
+            ''')
+            
+            customers = []
+            for row in cursor.fetchall():
+                customers.append({
+                    'customer_id': row[0],
+                    'name': row[1],
+                    'embedding': row[2],
+                    'first_visit': row[3],
+                    'total_visits': row[4],
+                    'last_visit': row[5]
+                })
+            
+            conn.close()
+            return customers
+            
         except Exception as e:
             print(f"❌ Error getting customers: {e}")
             return []
@@ -539,31 +601,30 @@ class DatabaseManager:
     def get_all_staff(self):
         """Get all staff members with detailed information"""
         try:
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    SELECT staff_id, name, department, embedding, added_date, employee_id, photo, showcase_photo
-                    FROM staff WHERE is_active = 1
-                ''')
-                
-                staff_members = []
-                for row in cursor.fetchall():
-                    staff_members.append({
-                        'staff_id': row[0],
-                        'name': row[1],
-                        'department': row[2],
-                        'embedding': row[3],
-                        'added_date': row[4],
-                        'employee_id': row[5] if len(row) > 5 else None,
-                        'photo': row[6] if len(row) > 6 else None,
-                        'showcase_photo': row[7] if len(row) > 7 else None
-                    })
-                
-                conn.close()
-                return staff_members
-                
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT staff_id, name, department, embedding, added_date, employee_id, photo, showcase_photo
+                FROM staff WHERE is_active = 1
+            ''')
+            
+            staff_members = []
+            for row in cursor.fetchall():
+                staff_members.append({
+                    'staff_id': row[0],
+                    'name': row[1],
+                    'department': row[2],
+                    'embedding': row[3],
+                    'added_date': row[4],
+                    'employee_id': row[5] if len(row) > 5 else None,
+                    'photo': row[6] if len(row) > 6 else None,
+                    'showcase_photo': row[7] if len(row) > 7 else None
+                })
+            
+            conn.close()
+            return staff_members
+            
         except Exception as e:
             print(f"❌ Error getting staff: {e}")
             return []
@@ -571,27 +632,26 @@ class DatabaseManager:
     def get_customer_info(self, customer_id):
         """Get customer information"""
         try:
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    SELECT customer_id, name, total_visits, last_visit
-                    FROM customers WHERE customer_id = ?
-                ''', (customer_id,))
-                
-                row = cursor.fetchone()
-                conn.close()
-                
-                if row:
-                    return {
-                        'customer_id': row[0],
-                        'name': row[1],
-                        'total_visits': row[2],
-                        'last_visit': row[3]
-                    }
-                return None
-                
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT customer_id, name, total_visits, last_visit
+                FROM customers WHERE customer_id = ?
+            ''', (customer_id,))
+            
+            row = cursor.fetchone()
+            conn.close()
+            
+            if row:
+                return {
+                    'customer_id': row[0],
+                    'name': row[1],
+                    'total_visits': row[2],
+                    'last_visit': row[3]
+                }
+            return None
+            
         except Exception as e:
             print(f"❌ Error getting customer info: {e}")
             return None
@@ -599,37 +659,71 @@ class DatabaseManager:
     def get_staff_info(self, staff_id):
         """Get staff information"""
         try:
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                cursor.execute('''
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT staff_id, name, department, photo, showcase_photo
+                FROM staff WHERE staff_id = ?
+            ''', (staff_id,))
+            
+            row = cursor.fetchone()
+            conn.close()
+            
+            if row:
+                return {
+                    'staff_id': row[0],
+                    'name': row[1],
+                    'department': row[2],
+                    'photo': row[3] if len(row) > 3 else None,
+                    'showcase_photo': row[4] if len(row) > 4 else None
+                }
+            return None
+            
+        except Exception as e:
+            print(f"❌ Error getting staff info: {e}")
+            return None
+
+    def get_staff_info_bulk(self, staff_ids):
+        """Get staff information for many staff members with one query per 500 IDs
+        
+        Returns:
+            Dict of staff_id -> info dict (same fields as get_staff_info); unknown IDs are omitted
+        """
+        staff_ids = list(staff_ids)
+        staff_info = {}
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            # Chunk to stay under SQLite's bound-parameter limit
+            for start in range(0, len(staff_ids), 500):
+                chunk = staff_ids[start:start + 500]
+                cursor.execute(f'''
                     SELECT staff_id, name, department, photo, showcase_photo
-                    FROM staff WHERE staff_id = ?
-                ''', (staff_id,))
-                
-                row = cursor.fetchone()
-                conn.close()
+                    FROM staff WHERE staff_id IN ({','.join('?' * len(chunk))})
+                ''', chunk)
                 
-                if row:
-                    return {
+                for row in cursor.fetchall():
+                    staff_info[row[0]] = {
                         'staff_id': row[0],
                         'name': row[1],
                         'department': row[2],
-                        'photo': row[3] if len(row) > 3 else None,
-                        'showcase_photo': row[4] if len(row) > 4 else None
+                        'photo': row[3],
+                        'showcase_photo': row[4]
                     }
-                return None
-                
+            
+            conn.close()
+            
         except Exception as e:
             print(f"❌ Error getting staff info: {e}")
-            return None
+        return staff_info
 
     def record_staff_detection(self, staff_id, confidence=1.0):
         """Record a staff detection"""
         try:
             with self.lock:
-                conn = sqlite3.connect(self.db_path)
+                conn = self._connect()
                 cursor = conn.cursor()
                 
                 cursor.execute('''
@@ -647,149 +741,176 @@ class DatabaseManager:
 
     def record_staff_attendance(self, staff_id, attendance_type='check_in', confidence=1.0):
         """Record staff check-in or check-out and return status information"""
+        return self.record_staff_attendance_batch([(staff_id, attendance_type, confidence)])[0]
+
+    def record_staff_attendance_batch(self, events):
+        """
+        Record several staff check-ins/check-outs in a single transaction (one commit for the whole batch)
+        
+        Args:
+            events: List of (staff_id, attendance_type, confidence) or
+                    (staff_id, attendance_type, confidence, event_time) tuples;
+                    event_time (datetime) defaults to now
+        
+        Returns:
+            List of status dicts (same shape as record_staff_attendance), in the order of events
+        """
+        failed = {'success': False, 'already_checked_in': False, 'total_visits': 0}
+        # Stamp missing times up front so a per-event retry keeps the original event time
+        now = datetime.now()
+        events = [
+            (event[0], event[1], event[2], event[3] if len(event) > 3 and event[3] is not None else now)
+            for event in events
+        ]
+        results = [dict(failed) for _ in events]
         try:
-            # Normalize types to avoid SQLite binding errors
-            staff_id = str(staff_id) if staff_id is not None else ''
-            confidence = float(confidence) if confidence is not None else 1.0
-            
             with self.lock:
-                conn = sqlite3.connect(self.db_path)
+                conn = self._connect()
                 cursor = conn.cursor()
                 
-                current_date = date.today()
-                current_time = datetime.now().time()
-                time_str = current_time.strftime('%H:%M:%S')
-                date_str = current_date.isoformat()
-                already_checked_in = False
-                
-                if attendance_type == 'check_in':
-                    # Check if already checked in today
-                    cursor.execute(
-                        "SELECT id FROM staff_attendance WHERE staff_id = ? AND date = ?",
-                        (staff_id, current_date)
-                    )
-                    existing = cursor.fetchone()
-                    
-                    if existing:
-                        already_checked_in = True
-                        # Update existing record
-                        cursor.execute('''
-                            UPDATE staff_attendance
-                            SET check_in_time = ?, recognition_confidence = ?
-                            WHERE staff_id = ? AND date = ?
-                        ''', (time_str, confidence, staff_id, date_str))
-                    else:
-                        # Insert new record
-                        # Only mark as Late if between 9:00 AM and 9:20 AM
-                        expected_time = datetime.strptime('09:00:00', '%H:%M:%S').time()
-                        late_window_end = datetime.strptime('09:20:00', '%H:%M:%S').time()
-                        status = 'Late' if (expected_time < current_time <= late_window_end) else 'Present'
-                        cursor.execute('''
-                            INSERT INTO staff_attendance (staff_id, date, check_in_time, status, recognition_confidence)
-                            VALUES (?, ?, ?, ?, ?)
-                        ''', (staff_id, date_str, time_str, status, confidence))
-
-                # Persist check-in event (always for attendance recording)
-                if attendance_type == 'check_in':
-                    # Only calculate late minutes if between 9:00 AM and 9:20 AM
-                    expected_time = datetime.strptime('09:00:00', '%H:%M:%S').time()
-                    late_window_end = datetime.strptime('09:20:00', '%H:%M:%S').time()
-                    if expected_time < current_time <= late_window_end:
-                        late_minutes = max(0, int((datetime.combine(current_date, current_time) - datetime.combine(current_date, expected_time)).total_seconds() // 60))
-                        status_label = 'Late'
-                    else:
-                        late_minutes = 0
-                        status_label = 'Present'
-                    # Insert event row (photo optional; stored separately)
-                    cursor.execute('''
-                        INSERT INTO staff_checkins (staff_id, date, check_time, status, late_minutes, recognition_confidence, photo)
-                        VALUES (?, ?, ?, ?, ?, ?, NULL)
-                    ''', (staff_id, date_str, time_str, status_label, late_minutes, confidence))
-                
-                elif attendance_type == 'check_out':
-                    # Update check-out time and calculate hours
-                    cursor.execute('''
-                        UPDATE staff_attendance
-                        SET check_out_time = ?,
-                            hours_worked = CASE
-                                WHEN check_in_time IS NOT NULL THEN
-                                    (julianday(date || ' ' || ?) - julianday(date || ' ' || check_in_time)) * 24
-                                ELSE 0
-                            END
-                        WHERE staff_id = ? AND date = ?
-                    ''', (time_str, time_str, staff_id, date_str))
-                    
-                    # If no existing record (rowcount == 0), insert a minimal record for checkout
-                    if cursor.rowcount == 0:
-                        cursor.execute('''
-                            INSERT INTO staff_attendance (staff_id, date, check_out_time, status, recognition_confidence)
-                            VALUES (?, ?, ?, ?, ?)
-                        ''', (staff_id, date_str, time_str, 'Present', confidence))
-                
-                # Get total visits for staff member
-                cursor.execute(
-                    "SELECT COUNT(*) FROM staff_attendance WHERE staff_id = ?",
-                    (staff_id,)
-                )
-                total_visits = cursor.fetchone()[0]
+                for i, (staff_id, attendance_type, confidence, event_time) in enumerate(events):
+                    # Normalize types to avoid SQLite binding errors
+                    staff_id = str(staff_id) if staff_id is not None else ''
+                    confidence = float(confidence) if confidence is not None else 1.0
+                    results[i] = self._write_staff_attendance(cursor, staff_id, attendance_type, confidence, event_time)
                 
                 conn.commit()
                 conn.close()
                 
-                return {
-                    'success': True,
-                    'already_checked_in': already_checked_in,
-                    'total_visits': total_visits
-                }
-                
         except Exception as e:
             print(f"❌ Error recording staff attendance: {e}")
-            return {'success': False, 'already_checked_in': False, 'total_visits': 0}
+            if len(events) > 1:
+                # The whole batch was rolled back - retry one transaction per event so a single
+                # bad event (or a transient lock) loses at most that event, not the batch
+                print(f"🔁 Retrying {len(events)} attendance events individually")
+                return [self.record_staff_attendance_batch([event])[0] for event in events]
+            return [dict(failed)]
+        return results
 
-    def get_today_visit_stats(self):
-        """Get today's visit statistics"""
-        try:
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                today = date.today()
-                
-                # Unique visitors today
+    def _write_staff_attendance(self, cursor, staff_id, attendance_type, confidence, event_time):
+        """Apply one check-in/check-out on an open cursor (caller holds the lock and commits)"""
+        current_date = event_time.date()
+        current_time = event_time.time()
+        time_str = current_time.strftime('%H:%M:%S')
+        date_str = current_date.isoformat()
+        already_checked_in = False
+        
+        if attendance_type == 'check_in':
+            # Check if already checked in today
+            cursor.execute(
+                "SELECT id FROM staff_attendance WHERE staff_id = ? AND date = ?",
+                (staff_id, current_date)
+            )
+            existing = cursor.fetchone()
+            
+            if existing:
+                already_checked_in = True
+                # Update existing record
                 cursor.execute('''
-                    SELECT COUNT(DISTINCT customer_id)
-                    FROM daily_visit_summary
-                    WHERE visit_date = ?
-                ''', (today,))
-                unique_visitors_today = cursor.fetchone()[0]
-                
-                # Total visits today
+                    UPDATE staff_attendance
+                    SET check_in_time = ?, recognition_confidence = ?
+                    WHERE staff_id = ? AND date = ?
+                ''', (time_str, confidence, staff_id, date_str))
+            else:
+                # Insert new record
+                # Only mark as Late if between 9:00 AM and 9:20 AM
+                status = 'Late' if (EXPECTED_CHECKIN_TIME < current_time <= LATE_WINDOW_END) else 'Present'
                 cursor.execute('''
-                    SELECT SUM(total_visits_today)
-                    FROM daily_visit_summary
-                    WHERE visit_date = ?
-                ''', (today,))
-                total_visits_today = cursor.fetchone()[0] or 0
-                
-                # New customers today
+                    INSERT INTO staff_attendance (staff_id, date, check_in_time, status, recognition_confidence)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (staff_id, date_str, time_str, status, confidence))
+
+        # Persist check-in event (always for attendance recording)
+        if attendance_type == 'check_in':
+            # Only calculate late minutes if between 9:00 AM and 9:20 AM
+            if EXPECTED_CHECKIN_TIME < current_time <= LATE_WINDOW_END:
+                late_minutes = (current_time.hour * 60 + current_time.minute) - EXPECTED_CHECKIN_MINUTES
+                status_label = 'Late'
+            else:
+                late_minutes = 0
+                status_label = 'Present'
+            # Insert event row (photo optional; stored separately)
+            cursor.execute('''
+                INSERT INTO staff_checkins (staff_id, date, check_time, status, late_minutes, recognition_confidence, photo)
+                VALUES (?, ?, ?, ?, ?, ?, NULL)
+            ''', (staff_id, date_str, time_str, status_label, late_minutes, confidence))
+        
+        elif attendance_type == 'check_out':
+            # Update check-out time and calculate hours
+            cursor.execute('''
+                UPDATE staff_attendance
+                SET check_out_time = ?,
+                    hours_worked = CASE
+                        WHEN check_in_time IS NOT NULL THEN
+                            (julianday(date || ' ' || ?) - julianday(date || ' ' || check_in_time)) * 24
+                        ELSE 0
+                    END
+                WHERE staff_id = ? AND date = ?
+            ''', (time_str, time_str, staff_id, date_str))
+            
+            # If no existing record (rowcount == 0), insert a minimal record for checkout
+            if cursor.rowcount == 0:
                 cursor.execute('''
-                    SELECT COUNT(*)
-                    FROM customers
-                    WHERE DATE(first_visit) = ?
-                ''', (today,))
-                new_customers_today = cursor.fetchone()[0]
-                
-                returning_customers_today = unique_visitors_today - new_customers_today
-                
-                conn.close()
-                
-                return {
-                    'unique_visitors_today': unique_visitors_today,
-                    'total_visits_today': total_visits_today,
-                    'new_customers_today': new_customers_today,
-                    'returning_customers_today': max(0, returning_customers_today)
-                }
-                
+                    INSERT INTO staff_attendance (staff_id, date, check_out_time, status, recognition_confidence)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (staff_id, date_str, time_str, 'Present', confidence))
+        
+        # Get total visits for staff member
+        cursor.execute(
+            "SELECT COUNT(*) FROM staff_attendance WHERE staff_id = ?",
+            (staff_id,)
+        )
+        total_visits = cursor.fetchone()[0]
+        
+        return {
+            'success': True,
+            'already_checked_in': already_checked_in,
+            'total_visits': total_visits
+        }
+
+    def get_today_visit_stats(self):
+        """Get today's visit statistics"""
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            today = date.today()
+            
+            # Unique visitors today
+            cursor.execute('''
+                SELECT COUNT(DISTINCT customer_id)
+                FROM daily_visit_summary
+                WHERE visit_date = ?
+            ''', (today,))
+            unique_visitors_today = cursor.fetchone()[0]
+            
+            # Total visits today
+            cursor.execute('''
+                SELECT SUM(total_visits_today)
+                FROM daily_visit_summary
+                WHERE visit_date = ?
+            ''', (today,))
+            total_visits_today = cursor.fetchone()[0] or 0
+            
+            # New customers today
+            cursor.execute('''
+                SELECT COUNT(*)
+                FROM customers
+                WHERE DATE(first_visit) = ?
+            ''', (today,))
+            new_customers_today = cursor.fetchone()[0]
+            
+            returning_customers_today = unique_visitors_today - new_customers_today
+            
+            conn.close()
+            
+            return {
+                'unique_visitors_today': unique_visitors_today,
+                'total_visits_today': total_visits_today,
+                'new_customers_today': new_customers_today,
+                'returning_customers_today': max(0, returning_customers_today)
+            }
+            
         except Exception as e:
             print(f"❌ Error getting today's visit stats: {e}")
             return {
@@ -802,41 +923,40 @@ class DatabaseManager:
     def get_monthly_statistics(self, year, month):
         """Get monthly statistics"""
         try:
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                # Total visits in month
-                cursor.execute('''
-                    SELECT COUNT(*) FROM visits
-                    WHERE strftime('%Y', visit_time) = ? AND strftime('%m', visit_time) = ?
-                ''', (str(year), f"{month:02d}"))
-                total_visits = cursor.fetchone()[0]
-                
-                # Unique customers in month
-                cursor.execute('''
-                    SELECT COUNT(DISTINCT customer_id) FROM visits
-                    WHERE strftime('%Y', visit_time) = ? AND strftime('%m', visit_time) = ?
-                ''', (str(year), f"{month:02d}"))
-                unique_customers = cursor.fetchone()[0]
-                
-                # New customers in month
-                cursor.execute('''
-                    SELECT COUNT(*) FROM customers
-                    WHERE strftime('%Y', first_visit) = ? AND strftime('%m', first_visit) = ?
-                ''', (str(year), f"{month:02d}"))
-                new_customers = cursor.fetchone()[0]
-                
-                conn.close()
-                
-                return {
-                    'total_visits': total_visits,
-                    'unique_customers': unique_customers,
-                    'new_customers': new_customers,
-                    'avg_visits_per_day': total_visits / 30.0,
-                    'daily_breakdown': []
-                }
-                
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            # Total visits in month
+            cursor.execute('''
+                SELECT COUNT(*) FROM visits
+                WHERE strftime('%Y', visit_time) = ? AND strftime('%m', visit_time) = ?
+            ''', (str(year), f"{month:02d}"))
+            total_visits = cursor.fetchone()[0]
+            
+            # Unique customers in month
+            cursor.execute('''
+                SELECT COUNT(DISTINCT customer_id) FROM visits
+                WHERE strftime('%Y', visit_time) = ? AND strftime('%m', visit_time) = ?
+            ''', (str(year), f"{month:02d}"))
+            unique_customers = cursor.fetchone()[0]
+            
+            # New customers in month
+            cursor.execute('''
+                SELECT COUNT(*) FROM customers
+                WHERE strftime('%Y', first_visit) = ? AND strftime('%m', first_visit) = ?
+            ''', (str(year), f"{month:02d}"))
+            new_customers = cursor.fetchone()[0]
+            
+            conn.close()
+            
+            return {
+                'total_visits': total_visits,
+                'unique_customers': unique_customers,
+                'new_customers': new_customers,
+                'avg_visits_per_day': total_visits / 30.0,
+                'daily_breakdown': []
+            }
+            
         except Exception as e:
             print(f"❌ Error getting monthly statistics: {e}")
             return {
@@ -851,7 +971,7 @@ class DatabaseManager:
         """Delete a staff member"""
         try:
             with self.lock:
-                conn = sqlite3.connect(self.db_path)
+                conn = self._connect()
                 cursor = conn.cursor()
                 
                 cursor.execute("DELETE FROM staff WHERE staff_id = ?", (staff_id,))
@@ -885,7 +1005,7 @@ class DatabaseManager:
             ]
             
             with self.lock:
-                conn = sqlite3.connect(self.db_path)
+                conn = self._connect(dedicated=True)  # Toggles foreign_keys - keep it off the shared connection
                 cursor = conn.cursor()
                 
                 # Disable foreign key constraints temporarily
@@ -919,7 +1039,7 @@ class DatabaseManager:
         """Test database connection and tables"""
         try:
             with self.lock:
-                conn = sqlite3.connect(self.db_path)
+                conn = self._connect()
                 cursor = conn.cursor()
                 
                 # Check if tables exist
@@ -954,20 +1074,19 @@ class DatabaseManager:
             stats = {}
             tables = ['customers', 'visits', 'staff_detections', 'staff', 'staff_attendance', 'daily_visit_summary']
             
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                for table in tables:
-                    try:
-                        cursor.execute(f'SELECT COUNT(*) FROM {table}')
-                        count = cursor.fetchone()[0]
-                        stats[table] = count
-                    except sqlite3.OperationalError:
-                        stats[table] = 'Table not found'
-                
-                conn.close()
-                
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            for table in tables:
+                try:
+                    cursor.execute(f'SELECT COUNT(*) FROM {table}')
+                    count = cursor.fetchone()[0]
+                    stats[table] = count
+                except sqlite3.OperationalError:
+                    stats[table] = 'Table not found'
+            
+            conn.close()
+            
             return stats
             
         except Exception as e:
@@ -978,7 +1097,7 @@ class DatabaseManager:
         """Execute SQL query with proper error handling"""
         try:
             with self.lock:
-                conn = sqlite3.connect(self.db_path)
+                conn = self._connect()
                 cursor = conn.cursor()
                 
                 if params:
@@ -1014,65 +1133,84 @@ class DatabaseManager:
         visit_status = self.check_daily_visit_status(customer_id)
         return not visit_status['visited_today']
     
-    def get_today_attendance(self, target_date=None):
-        """Get today's attendance records"""
+    def get_today_attendance(self, target_date=None, include_staff=False):
+        """Get today's attendance records
+        
+        With include_staff=True each attendance record and check-in event also carries the
+        staff member's 'name' and 'department' (LEFT JOIN - None if the staff row is gone),
+        so callers don't need a get_staff_info round-trip per record.
+        """
         try:
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                if target_date is None:
-                    target_date = date.today()
-                
-                cursor.execute('''
-                    SELECT staff_id, date, check_in_time, check_out_time, status, recognition_confidence
-                    FROM staff_attendance
-                    WHERE date = ?
-                    ORDER BY check_in_time
-                ''', (target_date,))
-                
-                records = []
-                for row in cursor.fetchall():
-                    records.append({
-                        'staff_id': row[0],
-                        'date': row[1],
-                        'check_in_time': datetime.strptime(f"{row[1]} {row[2]}", "%Y-%m-%d %H:%M:%S") if row[2] else None,
-                        'check_out_time': datetime.strptime(f"{row[1]} {row[3]}", "%Y-%m-%d %H:%M:%S") if row[3] else None,
-                        'status': row[4],
-                        'confidence': row[5]
-                    })
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            if target_date is None:
+                target_date = date.today()
+            
+            staff_columns = ', s.name, s.department' if include_staff else ''
+            staff_join = 'LEFT JOIN staff s ON s.staff_id = a.staff_id' if include_staff else ''
+            
+            cursor.execute(f'''
+                SELECT a.staff_id, a.date, a.check_in_time, a.check_out_time, a.status, a.recognition_confidence{staff_columns}
+                FROM staff_attendance a {staff_join}
+                WHERE a.date = ?
+                ORDER BY a.check_in_time
+            ''', (target_date,))
+            
+            records = []
+            for row in cursor.fetchall():
+                record = {
+                    'staff_id': row[0],
+                    'date': row[1],
+                    'check_in_time': datetime.strptime(f"{row[1]} {row[2]}", "%Y-%m-%d %H:%M:%S") if row[2] else None,
+                    'check_out_time': datetime.strptime(f"{row[1]} {row[3]}", "%Y-%m-%d %H:%M:%S") if row[3] else None,
+                    'status': row[4],
+                    'confidence': row[5]
+                }
+                if include_staff:
+                    record['name'] = row[6]
+                    record['department'] = row[7]
+                records.append(record)
 
-                # Also load today check-in events
-                cursor.execute('''
-                    SELECT staff_id, date, check_time, status, late_minutes, recognition_confidence
-                    FROM staff_checkins
-                    WHERE date = ?
-                    ORDER BY check_time DESC
-                ''', (target_date.isoformat() if isinstance(target_date, date) else target_date,))
+            # Also load today check-in events
+            cursor.execute(f'''
+                SELECT a.staff_id, a.date, a.check_time, a.status, a.late_minutes, a.recognition_confidence{staff_columns}
+                FROM staff_checkins a {staff_join}
+                WHERE a.date = ?
+                ORDER BY a.check_time DESC
+            ''', (target_date.isoformat() if isinstance(target_date, date) else target_date,))
 
-                checkins = []
-                for row in cursor.fetchall():
-                    checkins.append({
-                        'staff_id': row[0],
-                        'date': row[1],
-                        'check_time': row[2],
-                        'status': row[3],
-                        'late_minutes': row[4],
-                        'confidence': row[5]
-                    })
-                
-                conn.close()
-                return {'attendance': records, 'checkins': checkins}
-                
+            checkins = []
+            for row in cursor.fetchall():
+                checkin = {
+                    'staff_id': row[0],
+                    'date': row[1],
+                    'check_time': row[2],
+                    'status': row[3],
+                    'late_minutes': row[4],
+                    'confidence': row[5]
+                }
+                if include_staff:
+                    checkin['name'] = row[6]
+                    checkin['department'] = row[7]
+                checkins.append(checkin)
+            
+            conn.close()
+            return {'attendance': records, 'checkins': checkins}
+            
         except Exception as e:
             print(f"❌ Error getting today's attendance: {e}")
             return []
     
+    def get_today_attendance_joined(self, target_date=None):
+        """Today's attendance and check-in events with staff name/department inline (2 queries total)"""
+        return self.get_today_attendance(target_date, include_staff=True)
+    
     def update_staff_employee_id(self, staff_id, employee_id):
         """Update employee ID for staff member"""
         try:
             with self.lock:
-                conn = sqlite3.connect(self.db_path)
+                conn = self._connect()
                 cursor = conn.cursor()
                 
                 cursor.execute('''
@@ -1092,7 +1230,7 @@ class DatabaseManager:
         try:
             import cv2
             with self.lock:
-                conn = sqlite3.connect(self.db_path)
+                conn = self._connect()
                 cursor = conn.cursor()
                 
                 # Convert image to bytes
@@ -1119,7 +1257,7 @@ class DatabaseManager:
         try:
             import cv2
             with self.lock:
-                conn = sqlite3.connect(self.db_path)
+                conn = self._connect()
                 cursor = conn.cursor()
                 
                 # Convert image to bytes
@@ -1145,22 +1283,21 @@ class DatabaseManager:
         """Get staff photo"""
         try:
             import cv2
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                cursor.execute('SELECT photo FROM staff WHERE staff_id = ?', (staff_id,))
-                row = cursor.fetchone()
-                conn.close()
-                
-                if row and row[0]:
-                    # Convert bytes back to image
-                    nparr = np.frombuffer(row[0], np.uint8)
-                    img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                    return img if img is not None else None
-                
-                return None
-                
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            cursor.execute('SELECT photo FROM staff WHERE staff_id = ?', (staff_id,))
+            row = cursor.fetchone()
+            conn.close()
+            
+            if row and row[0]:
+                # Convert bytes back to image
+                nparr = np.frombuffer(row[0], np.uint8)
+                img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+                return img if img is not None else None
+            
+            return None
+            
         except Exception as e:
             print(f"❌ Error getting staff photo: {e}")
             return None
@@ -1169,25 +1306,41 @@ class DatabaseManager:
         """Get staff showcase photo (falls back to regular photo if showcase_photo is not set)"""
         try:
             import cv2
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                cursor.execute('SELECT showcase_photo, photo FROM staff WHERE staff_id = ?', (staff_id,))
-                row = cursor.fetchone()
-                conn.close()
-                
-                if row:
-                    # Try showcase_photo first, then fall back to photo
-                    photo_blob = row[0] if row[0] else row[1] if len(row) > 1 and row[1] else None
-                    if photo_blob:
-                        # Convert bytes back to image
-                        nparr = np.frombuffer(photo_blob, np.uint8)
-                        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                        return img if img is not None else None
-                
-                return None
-                
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            cursor.execute('SELECT showcase_photo, photo FROM staff WHERE staff_id = ?', (staff_id,))
+            row = cursor.fetchone()
+            conn.close()
+            
+            if row:
+                # Try showcase_photo first, then fall back to photo
+                photo_blob = row[0] if row[0] else row[1] if len(row) > 1 and row[1] else None
+                if photo_blob:
+                    # Convert bytes back to image
+                    nparr = np.frombuffer(photo_blob, np.uint8)
+                    img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+                    return img if img is not None else None
+            
+            return None
+            
+        except Exception as e:
+            print(f"❌ Error getting staff showcase photo: {e}")
+            return None
+    
+    def get_staff_showcase_photo_jpeg(self, staff_id):
+        """Get the stored showcase photo as JPEG bytes, without decoding (falls back to regular photo)"""
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            cursor.execute('SELECT showcase_photo, photo FROM staff WHERE staff_id = ?', (staff_id,))
+            row = cursor.fetchone()
+            conn.close()
+            
+            if row:
+                # Both columns are written with cv2.imencode('.jpg') - serve them as-is
+                return row[0] or row[1] or None
+            return None
         except Exception as e:
             print(f"❌ Error getting staff showcase photo: {e}")
             return None
@@ -1201,7 +1354,7 @@ class DatabaseManager:
         Args:
             track_id: Unique tracking ID for the person
             entry_type: 'no_face', 'unknown_person', or 'covered_face'
-            frame_image: Full body image (numpy array)
+            frame_image: Full body image (numpy array, views are fine) or already-encoded JPEG bytes
             face_bbox: Face bounding box [x1, y1, x2, y2] or None
             person_bbox: Person bounding box [x1, y1, x2, y2] or None
             face_detected: Whether a face was detected
@@ -1213,38 +1366,102 @@ class DatabaseManager:
         Returns:
             entry_id if successful, None otherwise
         """
+        return self.record_unknown_entries([{
+            'track_id': track_id,
+            'entry_type': entry_type,
+            'frame_image': frame_image,
+            'face_bbox': face_bbox,
+            'person_bbox': person_bbox,
+            'face_detected': face_detected,
+            'face_confidence': face_confidence,
+            'recognition_confidence': recognition_confidence,
+            'reason': reason,
+            'system_mode': system_mode
+        }])[0]
+    
+    def record_unknown_entries(self, entries):
+        """
+        Record several unknown entries in a single transaction (one commit for the whole batch)
+        
+        Args:
+            entries: List of dicts with the keyword arguments of record_unknown_entry
+        
+        Returns:
+            List of entry_ids (None for entries that failed), in the order of entries
+        """
+        entry_ids = [None] * len(entries)
         try:
             import cv2
             import json
             from datetime import datetime
             
+            # Encode images first, outside the lock (imencode reads strided crops directly)
+            blobs = []
+            for entry in entries:
+                frame_image = entry['frame_image']
+                if isinstance(frame_image, (bytes, bytearray)):
+                    blobs.append(bytes(frame_image))
+                    continue
+                success, buffer = cv2.imencode('.jpg', frame_image, [cv2.IMWRITE_JPEG_QUALITY, 85])
+                blobs.append(buffer.tobytes() if success else None)
+            
+            today = date.today().isoformat()
+            
             with self.lock:
-                conn = sqlite3.connect(self.db_path)
+                conn = self._connect()
                 cursor = conn.cursor()
                 
-                # Check if we already have an entry for this track_id today (to avoid duplicates)
-                today = date.today().isoformat()
-                cursor.execute('''
-                    SELECT id FROM unknown_entries 
-                    WHERE track_id = ? AND date = ? AND is_processed = 0
-                ''', (track_id, today))
-                
-                existing = cursor.fetchone()
-                if existing:
-                    # Update existing entry with latest image and time
-                    now = datetime.now()
-                    time_str = now.strftime('%H:%M:%S')
-                    
-                    # Encode image
-                    success, buffer = cv2.imencode('.jpg', frame_image, [cv2.IMWRITE_JPEG_QUALITY, 85])
-                    if not success:
-                        conn.close()
-                        return None
+                # Open entries already in the DB for these tracks today (to avoid duplicates)
+                track_ids = list({entry['track_id'] for entry in entries})
+                open_entries = {}
+                for start in range(0, len(track_ids), 500):
+                    chunk = track_ids[start:start + 500]
+                    cursor.execute(f'''
+                        SELECT track_id, id FROM unknown_entries 
+                        WHERE date = ? AND is_processed = 0 AND track_id IN ({','.join('?' * len(chunk))})
+                    ''', [today] + chunk)
+                    open_entries.update(cursor.fetchall())
+                
+                now = datetime.now()
+                time_str = now.strftime('%H:%M:%S')
+                updates = []
+                inserted = 0
+                
+                for idx, (entry, image_blob) in enumerate(zip(entries, blobs)):
+                    if image_blob is None:
+                        continue
                     
-                    image_blob = buffer.tobytes()
+                    track_id = entry['track_id']
+                    face_bbox = entry.get('face_bbox')
+                    person_bbox = entry.get('person_bbox')
+                    values = (
+                        json.dumps(face_bbox) if face_bbox else None,
+                        json.dumps(person_bbox) if person_bbox else None,
+                        entry.get('face_detected', False),
+                        entry.get('face_confidence', 0.0),
+                        entry.get('recognition_confidence', 0.0),
+                        entry.get('reason', ''),
+                        entry.get('system_mode', 'checkin')
+                    )
                     
-                    # Update existing entry
-                    cursor.execute('''
+                    existing_id = open_entries.get(track_id)
+                    if existing_id:
+                        # Update existing entry with latest image and time
+                        updates.append((now, time_str, image_blob) + values + (existing_id,))
+                        entry_ids[idx] = existing_id
+                    else:
+                        # Create new entry (later entries of the same track in this batch update it)
+                        cursor.execute('''
+                            INSERT INTO unknown_entries 
+                            (track_id, entry_type, date, time, full_body_image, face_bbox, person_bbox,
+                             face_detected, face_confidence, recognition_confidence, reason, system_mode)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ''', (track_id, entry['entry_type'], today, time_str, image_blob) + values)
+                        entry_ids[idx] = open_entries[track_id] = cursor.lastrowid
+                        inserted += 1
+                
+                if updates:
+                    cursor.executemany('''
                         UPDATE unknown_entries 
                         SET detection_time = ?,
                             time = ?,
@@ -1257,56 +1474,20 @@ class DatabaseManager:
                             reason = ?,
                             system_mode = ?
                         WHERE id = ?
-                    ''', (
-                        now, time_str, image_blob,
-                        json.dumps(face_bbox) if face_bbox else None,
-                        json.dumps(person_bbox) if person_bbox else None,
-                        face_detected, face_confidence, recognition_confidence,
-                        reason, system_mode, existing[0]
-                    ))
-                    
-                    conn.commit()
-                    conn.close()
-                    return existing[0]
-                else:
-                    # Create new entry
-                    now = datetime.now()
-                    date_str = today
-                    time_str = now.strftime('%H:%M:%S')
-                    
-                    # Encode image
-                    success, buffer = cv2.imencode('.jpg', frame_image, [cv2.IMWRITE_JPEG_QUALITY, 85])
-                    if not success:
-                        conn.close()
-                        return None
-                    
-                    image_blob = buffer.tobytes()
-                    
-                    cursor.execute('''
-                        INSERT INTO unknown_entries 
-                        (track_id, entry_type, date, time, full_body_image, face_bbox, person_bbox,
-                         face_detected, face_confidence, recognition_confidence, reason, system_mode)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        track_id, entry_type, date_str, time_str, image_blob,
-                        json.dumps(face_bbox) if face_bbox else None,
-                        json.dumps(person_bbox) if person_bbox else None,
-                        face_detected, face_confidence, recognition_confidence,
-                        reason, system_mode
-                    ))
-                    
-                    entry_id = cursor.lastrowid
-                    conn.commit()
-                    conn.close()
-                    
-                    print(f"✅ Unknown entry recorded in database: Entry ID {entry_id}, Track ID {track_id}, Type: {entry_type}, Date: {date_str}, Time: {time_str}, Reason: {reason}")
-                    return entry_id
+                    ''', updates)
+                
+                conn.commit()
+                conn.close()
+            
+            if inserted:
+                print(f"✅ Unknown entries recorded in database: {inserted} new, {len(updates)} updated, Date: {today}, Time: {time_str}")
+            return entry_ids
                     
         except Exception as e:
             print(f"❌ Error recording unknown entry: {e}")
             import traceback
             traceback.print_exc()
-            return None
+            return [None] * len(entries)
     
     def get_unknown_entries(self, date_filter=None, limit=100):
         """
@@ -1322,72 +1503,71 @@ class DatabaseManager:
         try:
             import cv2
             import json
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                if date_filter:
-                    cursor.execute('''
-                        SELECT id, track_id, entry_type, date, time, detection_time,
-                               face_bbox, person_bbox, face_detected, face_confidence,
-                               recognition_confidence, reason, system_mode, is_processed
-                        FROM unknown_entries
-                        WHERE date = ?
-                        ORDER BY detection_time DESC
-                        LIMIT ?
-                    ''', (date_filter, limit))
-                else:
-                    cursor.execute('''
-                        SELECT id, track_id, entry_type, date, time, detection_time,
-                               face_bbox, person_bbox, face_detected, face_confidence,
-                               recognition_confidence, reason, system_mode, is_processed
-                        FROM unknown_entries
-                        ORDER BY detection_time DESC
-                        LIMIT ?
-                    ''', (limit,))
-                
-                entries = []
-                for row in cursor.fetchall():
-                    try:
-                        # Parse JSON fields safely
-                        face_bbox = None
-                        person_bbox = None
-                        if row[6]:
-                            try:
-                                face_bbox = json.loads(row[6])
-                            except (json.JSONDecodeError, TypeError):
-                                print(f"⚠️ Warning: Could not parse face_bbox for entry {row[0]}: {row[6]}")
-                        
-                        if row[7]:
-                            try:
-                                person_bbox = json.loads(row[7])
-                            except (json.JSONDecodeError, TypeError):
-                                print(f"⚠️ Warning: Could not parse person_bbox for entry {row[0]}: {row[7]}")
-                        
-                        entries.append({
-                            'id': row[0],
-                            'track_id': row[1],
-                            'entry_type': row[2],
-                            'date': row[3],
-                            'time': row[4],
-                            'detection_time': row[5] if row[5] else row[4],  # Fallback to time if detection_time is None
-                            'face_bbox': face_bbox,
-                            'person_bbox': person_bbox,
-                            'face_detected': bool(row[8]) if row[8] is not None else False,
-                            'face_confidence': float(row[9]) if row[9] is not None else 0.0,
-                            'recognition_confidence': float(row[10]) if row[10] is not None else 0.0,
-                            'reason': row[11] if row[11] else 'Unknown',
-                            'system_mode': row[12] if row[12] else 'checkin',
-                            'is_processed': bool(row[13]) if row[13] is not None else False
-                        })
-                    except Exception as e:
-                        print(f"⚠️ Error processing unknown entry row {row[0]}: {e}")
-                        continue
-                
-                print(f"✅ Successfully processed {len(entries)} unknown entries from database")
-                conn.close()
-                return entries
-                
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            if date_filter:
+                cursor.execute('''
+                    SELECT id, track_id, entry_type, date, time, detection_time,
+                           face_bbox, person_bbox, face_detected, face_confidence,
+                           recognition_confidence, reason, system_mode, is_processed
+                    FROM unknown_entries
+                    WHERE date = ?
+                    ORDER BY detection_time DESC
+                    LIMIT ?
+                ''', (date_filter, limit))
+            else:
+                cursor.execute('''
+                    SELECT id, track_id, entry_type, date, time, detection_time,
+                           face_bbox, person_bbox, face_detected, face_confidence,
+                           recognition_confidence, reason, system_mode, is_processed
+                    FROM unknown_entries
+                    ORDER BY detection_time DESC
+                    LIMIT ?
+                ''', (limit,))
+            
+            entries = []
+            for row in cursor.fetchall():
+                try:
+                    # Parse JSON fields safely
+                    face_bbox = None
+                    person_bbox = None
+                    if row[6]:
+                        try:
+                            face_bbox = json.loads(row[6])
+                        except (json.JSONDecodeError, TypeError):
+                            print(f"⚠️ Warning: Could not parse face_bbox for entry {row[0]}: {row[6]}")
+                    
+                    if row[7]:
+                        try:
+                            person_bbox = json.loads(row[7])
+                        except (json.JSONDecodeError, TypeError):
+                            print(f"⚠️ Warning: Could not parse person_bbox for entry {row[0]}: {row[7]}")
+                    
+                    entries.append({
+                        'id': row[0],
+                        'track_id': row[1],
+                        'entry_type': row[2],
+                        'date': row[3],
+                        'time': row[4],
+                        'detection_time': row[5] if row[5] else row[4],  # Fallback to time if detection_time is None
+                        'face_bbox': face_bbox,
+                        'person_bbox': person_bbox,
+                        'face_detected': bool(row[8]) if row[8] is not None else False,
+                        'face_confidence': float(row[9]) if row[9] is not None else 0.0,
+                        'recognition_confidence': float(row[10]) if row[10] is not None else 0.0,
+                        'reason': row[11] if row[11] else 'Unknown',
+                        'system_mode': row[12] if row[12] else 'checkin',
+                        'is_processed': bool(row[13]) if row[13] is not None else False
+                    })
+                except Exception as e:
+                    print(f"⚠️ Error processing unknown entry row {row[0]}: {e}")
+                    continue
+            
+            print(f"✅ Successfully processed {len(entries)} unknown entries from database")
+            conn.close()
+            return entries
+            
         except Exception as e:
             print(f"❌ Error getting unknown entries: {e}")
             import traceback
@@ -1398,22 +1578,21 @@ class DatabaseManager:
         """Get full body image for an unknown entry"""
         try:
             import cv2
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                cursor.execute('SELECT full_body_image FROM unknown_entries WHERE id = ?', (entry_id,))
-                row = cursor.fetchone()
-                conn.close()
-                
-                if row and row[0]:
-                    # Convert bytes back to image
-                    nparr = np.frombuffer(row[0], np.uint8)
-                    img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                    return img if img is not None else None
-                
-                return None
-                
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            cursor.execute('SELECT full_body_image FROM unknown_entries WHERE id = ?', (entry_id,))
+            row = cursor.fetchone()
+            conn.close()
+            
+            if row and row[0]:
+                # Convert bytes back to image
+                nparr = np.frombuffer(row[0], np.uint8)
+                img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+                return img if img is not None else None
+            
+            return None
+            
         except Exception as e:
             print(f"❌ Error getting unknown entry image: {e}")
             return None
@@ -1422,7 +1601,7 @@ class DatabaseManager:
         """Mark an unknown entry as processed"""
         try:
             with self.lock:
-                conn = sqlite3.connect(self.db_path)
+                conn = self._connect()
                 cursor = conn.cursor()
                 
                 cursor.execute('''
@@ -1441,7 +1620,7 @@ class DatabaseManager:
         """Delete an unknown entry"""
         try:
             with self.lock:
-                conn = sqlite3.connect(self.db_path)
+                conn = self._connect()
                 cursor = conn.cursor()
                 
                 cursor.execute('DELETE FROM unknown_entries WHERE id = ?', (entry_id,))
@@ -1,3 +1,5 @@
+from collections import deque
+
 import numpy as np
 # Use SciPy's Hungarian implementation for robust linear assignment
 from scipy.optimize import linear_sum_assignment
@@ -69,9 +71,11 @@ class Detection:
     def __init__(self, bbox, feature):
         self.tlbr = np.asarray(bbox, dtype=float)
         self.bbox = tlbr_to_xyah(self.tlbr)
-        # Normalize the feature vector for stable cosine similarity calculations
-        feature = np.asarray(feature, dtype=float)
-        self.feature = feature / (np.linalg.norm(feature) + 1e-6)
+        # Normalize the feature vector for stable cosine similarity calculations.
+        # Face-engine embeddings arrive float32 and unit-length: keep that array as-is
+        feature = np.asarray(feature, dtype=np.float32)
+        norm = np.linalg.norm(feature)
+        self.feature = feature if abs(norm - 1.0) < 1e-3 else feature / (norm + 1e-6)
 
 
 class KalmanFilter:
@@ -147,11 +151,13 @@ class KalmanFilter:
 class Track:
     """Represents a single tracked object within the DeepSort algorithm."""
 
+    FEATURE_BUDGET = 30  # Recent features kept per track (a long-lived track used to grow forever)
+
     def __init__(self, mean, covariance, track_id, feature):
         self.mean = mean
         self.covariance = covariance
         self.track_id = track_id
-        self.features = [feature]  # Store a gallery of features
+        self.features = deque([feature], maxlen=self.FEATURE_BUDGET)  # Store a gallery of features
         self.time_since_update = 0
         self.hits = 1  # Number of consecutive successful updates
 
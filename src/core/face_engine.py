@@ -12,6 +12,12 @@ from core.config_manager import ConfigManager
 import logging
 import pickle
 
+try:
+    # Optional: SIMD inner-product search for the staff gallery
+    import faiss
+except ImportError:
+    faiss = None
+
 
 class FaceRecognitionEngine:
     def __init__(self, gpu_mode=True):
@@ -27,6 +33,8 @@ class FaceRecognitionEngine:
         self.confidence_threshold = self.config.get_setting(
             "confidence_threshold", 0.55
         )
+        # Opt-in int8 staff gallery: a faiss 8-bit index replaces the float32 matrix (needs faiss)
+        self.int8_staff_gallery = self.config.get_setting("int8_staff_gallery", False)
         self.detection_threshold = 0.6  # Changed from 0.65
         self.quality_threshold = 0.7
 
@@ -81,6 +89,16 @@ class FaceRecognitionEngine:
         # Load databases with performance optimization
         self.customer_database = {}
         self.staff_database = {}
+        # Row-normalized embedding matrices used for batched matching
+        self._staff_ids = []
+        self._staff_gallery = None
+        # faiss index over _staff_gallery when faiss is installed - IndexFlatIP, or an 8-bit
+        # IndexScalarQuantizer with the int8_staff_gallery setting
+        self._staff_index = None
+        self._staff_centroid = None  # unit-length mean of the staff gallery rows
+        self._staff_centroid_spread = 0.0  # largest angle (radians) between a staff row and the centroid
+        self._customer_ids = []
+        self._customer_gallery = None
         self.load_databases()
 
         # Performance optimization
@@ -152,6 +170,75 @@ class FaceRecognitionEngine:
             self.customer_database = {}
             self.staff_database = {}
 
+        self._rebuild_staff_gallery()
+        self._rebuild_customer_gallery()
+
+    @staticmethod
+    def _build_gallery(database):
+        """Stack a {person_id: embedding} dict into (ids, row-normalized float32 matrix)"""
+        ids = []
+        rows = []
+        for person_id, embedding in database.items():
+            if embedding is None:
+                continue
+            ids.append(person_id)
+            rows.append(np.asarray(embedding, dtype=np.float32).reshape(-1))
+
+        if not rows:
+            return [], None
+
+        try:
+            gallery = np.vstack(rows)
+        except ValueError as e:
+            print(f"⚠️ Inconsistent embedding sizes, gallery disabled: {e}")
+            return [], None
+
+        norms = np.linalg.norm(gallery, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return ids, gallery / norms
+
+    def _rebuild_staff_gallery(self):
+        """Rebuild the staff matrix after the staff database changes"""
+        self._staff_ids, self._staff_gallery = self._build_gallery(self.staff_database)
+        self._staff_index = None
+        self._staff_centroid = None
+        self._staff_centroid_spread = 0.0
+
+        if self._staff_gallery is not None:
+            centroid = self._staff_gallery.sum(axis=0)
+            norm = np.linalg.norm(centroid)
+            if norm > 0:
+                self._staff_centroid = centroid / norm
+                cosines = np.clip(self._staff_gallery @ self._staff_centroid, -1.0, 1.0)
+                self._staff_centroid_spread = float(np.arccos(cosines.min()))
+
+        if self.int8_staff_gallery and faiss is None and self._staff_gallery is not None:
+            print("⚠️ int8_staff_gallery needs faiss - using float32 matching")
+
+        if faiss is not None and self._staff_gallery is not None:
+            try:
+                gallery = np.ascontiguousarray(self._staff_gallery)
+                dim = gallery.shape[1]
+                if self.int8_staff_gallery:
+                    # One byte per element, scored by faiss's SIMD kernels
+                    index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit,
+                                                       faiss.METRIC_INNER_PRODUCT)
+                    index.train(gallery)
+                else:
+                    index = faiss.IndexFlatIP(dim)
+                index.add(gallery)
+                self._staff_index = index
+                if self.int8_staff_gallery:
+                    # The quantized index is the only copy matching needs - free the float32 one
+                    self._staff_gallery = None
+            except Exception as e:
+                print(f"⚠️ FAISS staff index unavailable, using NumPy matching: {e}")
+
+    def _rebuild_customer_gallery(self):
+        """Rebuild the customer matrix (only the first 50 entries are ever scanned)"""
+        recent_customers = dict(list(self.customer_database.items())[:50])
+        self._customer_ids, self._customer_gallery = self._build_gallery(recent_customers)
+
     def ultra_optimized_face_detection(self, frame):
         """Ultra-optimized face detection with proper threshold - processes ANY frame immediately"""
         try:
@@ -174,56 +261,79 @@ class FaceRecognitionEngine:
             # No delays, no frame skipping - processes every frame captured by camera
             faces = self.app.get(processed_frame)
 
-            detections = []
-            for face in faces:
-                # OPTIMIZED: Lower detection threshold for better face visibility
-                if face.det_score < 0.25:  # Lowered threshold to detect more faces
-                    continue
+            # Scale coordinates back to original image
+            inv_scale = 1.0 / scale_factor
+            return self._faces_to_detections(faces, inv_scale, inv_scale)
 
-                # Scale coordinates back to original image
-                bbox = face.bbox / scale_factor
-                x1, y1, x2, y2 = bbox.astype(int)
+        except Exception as e:
+            print(f"Face detection error: {e}")
+            return []
 
-                # OPTIMIZED: Reduced minimum face size for better detection
-                face_width = x2 - x1
-                face_height = y2 - y1
-                if min(face_width, face_height) < 30:  # Even smaller minimum for better detection
-                    continue
+    def detect_faces_prescaled(self, frame, scale_x, scale_y):
+        """Detect faces on a frame the caller has already resized for the detector.
 
-                # More lenient aspect ratio
-                aspect_ratio = face_width / face_height
-                if aspect_ratio < 0.5 or aspect_ratio > 2.0:  # More lenient range
-                    continue
+        Skips the internal resize of ultra_optimized_face_detection; bboxes are
+        multiplied by (scale_x, scale_y) to map them back to the caller's coordinates.
+        """
+        try:
+            if frame is None:
+                return []
+            return self._faces_to_detections(self.app.get(frame), scale_x, scale_y)
+        except Exception as e:
+            print(f"Face detection error: {e}")
+            return []
 
-                # Normalize embedding
-                embedding = face.embedding
-                if np.linalg.norm(embedding) > 0:
-                    embedding = embedding / np.linalg.norm(embedding)
-                else:
-                    continue
+    def _faces_to_detections(self, faces, scale_x, scale_y):
+        """Filter InsightFace results and convert them to detection dicts in caller coordinates"""
+        bbox_scale = np.array([scale_x, scale_y, scale_x, scale_y], dtype=np.float32)
+        detections = []
+        for face in faces:
+            # OPTIMIZED: Lower detection threshold for better face visibility
+            if face.det_score < 0.25:  # Lowered threshold to detect more faces
+                continue
 
-                # Calculate quality score
-                face_area = face_width * face_height
-                quality_score = face.det_score * min(1.0, face_area / 5000)  # Lowered threshold
+            # Scale coordinates back to original image
+            bbox = face.bbox * bbox_scale
+            x1, y1, x2, y2 = bbox.astype(int).tolist()
 
-                detection = {
-                    'bbox': [x1, y1, x2, y2],
-                    'confidence': float(face.det_score),
-                    'embedding': embedding,
-                    'landmarks': face.kps if hasattr(face, 'kps') else None,
-                    'quality_score': quality_score,
-                    'face_area': face_area
-                }
+            # OPTIMIZED: Reduced minimum face size for better detection
+            face_width = x2 - x1
+            face_height = y2 - y1
+            if min(face_width, face_height) < 30:  # Even smaller minimum for better detection
+                continue
+
+            # More lenient aspect ratio
+            aspect_ratio = face_width / face_height
+            if aspect_ratio < 0.5 or aspect_ratio > 2.0:  # More lenient range
+                continue
+
+            # Normalize embedding in place - the Face object is discarded after this loop,
+            # so the detection dict keeps the model's own buffer instead of a fresh copy
+            embedding = face.embedding
+            norm = np.linalg.norm(embedding)
+            if norm > 0:
+                embedding /= norm
+            else:
+                continue
 
-                detections.append(detection)
+            # Calculate quality score
+            face_area = face_width * face_height
+            quality_score = face.det_score * min(1.0, face_area / 5000)  # Lowered threshold
 
-            # Return all detections for visibility
-            detections = sorted(detections, key=lambda x: x['quality_score'], reverse=True)
-            return detections  # Return all detections, not just top 2
+            detection = {
+                'bbox': [x1, y1, x2, y2],
+                'confidence': float(face.det_score),
+                'embedding': embedding,
+                'landmarks': face.kps if hasattr(face, 'kps') else None,
+                'quality_score': quality_score,
+                'face_area': face_area
+            }
 
-        except Exception as e:
-            print(f"Face detection error: {e}")
-            return []
+            detections.append(detection)
+
+        # Return all detections for visibility
+        detections = sorted(detections, key=lambda x: x['quality_score'], reverse=True)
+        return detections  # Return all detections, not just top 2
 
     def monitor_detection_quality(self, detections):
         """Monitor and log detection quality metrics"""
@@ -358,34 +468,109 @@ class FaceRecognitionEngine:
 
     def identify_person(self, embedding):
         """Identify if person is customer or staff with ultra-optimization and enhanced staff verification"""
+        if embedding is None:
+            return 'unknown', None, 0.0
+        return self.identify_persons(embedding)[0]
+
+    def identify_persons(self, embeddings):
+        """Batched identify_person for all faces of a frame.
+
+        Args:
+            embeddings: array-like of shape (K, D) (a single (D,) vector is also accepted)
+
+        Returns:
+            List of K (person_type, person_id, confidence) tuples, same rules as identify_person
+        """
+        queries = np.asarray(embeddings, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries.reshape(1, -1)
+        results = [('unknown', None, 0.0)] * queries.shape[0]
+        if queries.shape[0] == 0:
+            return results
+
         try:
-            # CRITICAL: Check staff first (higher priority) - this ensures we properly verify staff
-            # before marking anyone as unknown
-            if len(self.staff_database) > 0:
-                staff_match = self._match_against_database(embedding, self.staff_database)
-                staff_id, staff_confidence = staff_match
-                
-                # Use slightly lower threshold (0.60) to catch more staff while maintaining accuracy
-                # This helps ensure we don't miss staff members who should be recognized
-                if staff_id and staff_confidence >= 0.60:  # Lowered from 0.65 to 0.60 for better detection
-                    # Additional verification: ensure staff_id is valid
-                    if staff_id in self.staff_database:
-                        return 'staff', staff_id, staff_confidence
+            norms = np.linalg.norm(queries, axis=1, keepdims=True)
+            valid = norms[:, 0] > 0
+            norms[~valid] = 1.0
+            queries = queries / norms
+            pending = np.flatnonzero(valid)
+
+            # CRITICAL: Check staff first (higher priority) - one matrix product for all faces
+            if self._staff_ids and pending.size:
+                best_idx, best_scores = self._best_staff_rows(queries[pending])
+
+                still_pending = []
+                for row, idx, score in zip(pending, best_idx, best_scores):
+                    # Use slightly lower threshold (0.60) to catch more staff while maintaining accuracy
+                    if score >= 0.60:
+                        results[row] = ('staff', self._staff_ids[idx], float(score))
                     else:
-                        print(f"⚠️ Staff ID {staff_id} not found in database despite match")
-            
+                        still_pending.append(row)
+                pending = np.asarray(still_pending, dtype=int)
+
             # Only check customers if NOT staff (to avoid false positives)
-            if len(self.customer_database) > 0:
-                customer_id, confidence = self.lightning_fast_customer_identification(embedding)
-                if customer_id and confidence > self.confidence_threshold:
-                    return 'customer', customer_id, confidence
+            if self._customer_gallery is not None and pending.size:
+                scores = queries[pending] @ self._customer_gallery.T
+                best_idx = scores.argmax(axis=1)
+                best_scores = scores[np.arange(pending.size), best_idx]
+
+                for row, idx, score in zip(pending, best_idx, best_scores):
+                    if score > 0 and score > self.confidence_threshold:
+                        results[row] = ('customer', self._customer_ids[idx], float(score))
 
             # Return unknown only after checking both staff and customers
-            return 'unknown', None, 0.0
+            return results
 
         except Exception as e:
             print(f"Identification error: {e}")
-            return 'unknown', None, 0.0
+            return [('unknown', None, 0.0)] * queries.shape[0]
+
+    def _best_staff_rows(self, queries):
+        """Closest staff gallery row for each L2-normalized query; returns (indices, cosine scores)"""
+        if self._staff_index is not None:
+            best_scores, best_idx = self._staff_index.search(np.ascontiguousarray(queries), 1)
+            return best_idx[:, 0], best_scores[:, 0]
+
+        scores = queries @ self._staff_gallery.T
+        best_idx = scores.argmax(axis=1)
+        return best_idx, scores[np.arange(queries.shape[0]), best_idx]
+
+    def could_match_staff(self, embedding, threshold):
+        """Cheap O(D) pre-check: False only when no staff row can reach `threshold` cosine.
+
+        Angles on the unit sphere obey the triangle inequality, so a staff row within
+        acos(threshold) of the query puts the query within acos(threshold) + spread of
+        the centroid. The bound is exact - it never rejects a real match.
+        """
+        if self._staff_centroid is None:
+            return bool(self._staff_ids)
+
+        bound = np.arccos(np.clip(threshold, -1.0, 1.0)) + self._staff_centroid_spread
+        if bound >= np.pi:
+            return True  # Roster too spread out for the centroid to rule anything out
+
+        query = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return False
+        return float(query @ self._staff_centroid) / norm >= np.cos(bound) - 1e-6
+
+    def best_staff_match(self, embedding):
+        """Closest staff member for one embedding using the prebuilt gallery.
+
+        Returns:
+            (staff_id, cosine similarity), or (None, 0.0) if there is no staff gallery
+        """
+        if embedding is None or not self._staff_ids:
+            return None, 0.0
+
+        query = np.asarray(embedding, dtype=np.float32).reshape(1, -1)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return None, 0.0
+
+        best_idx, best_scores = self._best_staff_rows(query / norm)
+        return self._staff_ids[best_idx[0]], float(best_scores[0])
 
     def _match_against_database(self, embedding, database):
         """Match embedding against database with optimization"""
@@ -437,6 +622,7 @@ class FaceRecognitionEngine:
                 if customer_info:
                     # Add to local database immediately for speed
                     self.customer_database[customer_id] = embedding
+                    self._rebuild_customer_gallery()
                     print(f"✅ Customer registered and verified: {customer_id}")
 
                     # Log the registration
@@ -498,6 +684,7 @@ class FaceRecognitionEngine:
 
             if success:
                 self.staff_database[staff_id] = embedding
+                self._rebuild_staff_gallery()
                 print(f"✅ Staff member added: {staff_id} - {name}")
 
             return success
@@ -578,7 +765,7 @@ class FaceRecognitionEngine:
 
                 # Scale coordinates back
                 bbox = face.bbox / scale_factor
-                x1, y1, x2, y2 = bbox.astype(int)
+                x1, y1, x2, y2 = bbox.astype(int).tolist()
                 face_width = x2 - x1
                 face_height = y2 - y1
 
@@ -7,12 +7,16 @@ import cv2
 from PIL import Image, ImageTk, ImageDraw, ImageFont
 import threading
 import time
+import logging
 from datetime import datetime, date, time as dt_time
 import numpy as np
 import os
 import sqlite3
 import pickle
+import itertools
+import queue
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 # Import optimized modules - DO NOT CHANGE face recognition model parameters
 from core.face_engine import FaceRecognitionEngine
@@ -21,9 +25,31 @@ from utils.camera_utils import CameraManager
 from core.config_manager import ConfigManager
 from core.database_manager import DatabaseManager
 
+# Per-detection/per-capture trace goes through DEBUG so it costs nothing at the default INFO level
+log = logging.getLogger(__name__)
+
+class TrackStatus:
+    """Entry/exit state of one tracked person (slot attributes - read many times per frame)"""
+    __slots__ = ('in_frame', 'last_seen', 'captured', 'bbox', 'face_confidence',
+                 'recognition_confidence', 'track_id', 'first_detected')
+    
+    def __init__(self, track_id=None, bbox=None, face_confidence=0.0,
+                 recognition_confidence=0.0, first_detected=0):
+        self.in_frame = False
+        self.last_seen = 0
+        self.captured = False
+        self.bbox = bbox
+        self.face_confidence = face_confidence
+        self.recognition_confidence = recognition_confidence
+        self.track_id = track_id
+        self.first_detected = first_detected
+
 class ImpexAttendanceDashboard:
     """IMPEX Head Office Attendance Dashboard matching the exact design from images"""
     
+    _STAFF_PREFIX_LEN = len('STAFF_')
+    _BG_OVERLAY_ALPHA = 0.1  # 10% opacity - very subtle background
+    
     def __init__(self, root, gpu_available=False, system_mode=None):
         self.parent = root
         self.gpu_available = gpu_available
@@ -47,9 +73,15 @@ class ImpexAttendanceDashboard:
         
         # Attendance mode: 'checkin' or 'checkout' (locked if in locked mode)
         self.attendance_mode = tk.StringVar(value=initial_mode)
+        # Plain-attribute mirror of attendance_mode for the processing threads
+        # (avoids a Tcl round-trip per detection; kept in sync by the trace)
+        self._mode_cached = initial_mode
+        self.attendance_mode.trace_add('write', self._on_attendance_mode_write)
         
         # Track today's attendance
         self.today_attendance = {}  # staff_id -> attendance_data
+        self._checkin_count = 0  # Entries of today_attendance with 'check_in_time'
+        self._checkout_count = 0  # Entries of today_attendance with 'check_out_time'
         self.captured_photos = {}  # staff_id -> captured_image
         
         # Initialize face recognition - DO NOT CHANGE MODEL PARAMETERS
@@ -59,20 +91,43 @@ class ImpexAttendanceDashboard:
         
         # Frame processing
         self.current_frame = None
+        self.frame_version = 0  # Bumped with every new current_frame
+        self._last_displayed_version = -1
+        self._new_frame_event = threading.Event()
+        self._ts_cached = ('', 0)  # (overlay timestamp text, epoch second it was made for)
+        self._ts_sprite = None  # Rasterized _ts_cached text
+        # Constant overlay labels, rasterized once (see _blit_label)
+        self._label_sprites = self._build_label_sprites({
+            'FACIAL RECOGNITION': 0.85,
+            'HUMAN MOTION DETECTED': 0.75,
+            'MOTION DATA': 0.7,
+            'STEP 2': 0.6
+        })
         self.current_detections = []  # Store detections for drawing
         self.frame_lock = threading.Lock()
         self.capture_lock = threading.Lock()
+        # Unknown-entry DB writes run on a worker so the frame loop never waits on SQLite/disk
+        self._classify_unknown = self._build_unknown_classifier()
+        self._last_unknown_fp = (frozenset(), None)  # (track IDs, 64x64 frame thumbnail) of last queued batch
+        self.unknown_static_threshold = 3.0  # Mean abs pixel diff below which a frame counts as unchanged
+        self._unknown_q = queue.Queue(maxsize=64)
+        self._io_pool = ThreadPoolExecutor(max_workers=2)  # Parallel JPEG encodes for unknown-entry crops
+        threading.Thread(target=self._unknown_worker, daemon=True).start()
         
         # Auto-registration
         self.auto_register_enabled = True
         self.registered_today = set()
         
         # Entry/Exit tracking - only capture when person leaves and returns
-        self.person_track_status = {}  # track_id -> {'in_frame': bool, 'last_seen': time, 'captured': bool, 'bbox': [...]}
+        # Staff roster/info for the cards, loaded with the employee IDs (see invalidate_staff_cache)
+        self._staff_roster = None  # Active staff IDs in DB order
+        self._staff_info_cache = {}  # staff_id -> {'staff_id', 'name', 'department'}
+        
+        self.person_track_status = {}  # "staff_<id>" -> TrackStatus
         self.person_track_timeout = 2.0  # Person considered "left" after 2 seconds of no detection
         
         # Unknown entry tracking - track unknown persons to avoid duplicates
-        self.unknown_track_status = {}  # track_id -> {'in_frame': bool, 'last_seen': time, 'captured': bool, 'bbox': [...]}
+        self.unknown_track_status = {}  # "unknown_<track_id>" -> TrackStatus
         
         # Motion detection for catching fast-moving persons (even without face detection)
         self.motion_detector = None
@@ -80,21 +135,69 @@ class ImpexAttendanceDashboard:
         self.last_frame_for_motion = None
         self.motion_detection_enabled = True
         self.motion_capture_interval = 0.2  # Capture motion every 0.2 seconds (very fast for fast-moving persons)
-        self.last_motion_capture_time = {}  # motion_id -> last capture time
+        # Spatial grid of recent motion captures: (cx // 100, cy // 100) -> (last capture time, motion_id)
+        self._motion_grid = {}
+        self._motion_grid_last_sweep = 0
+        self.motion_grid_ttl = 60.0  # Forget grid cells not captured for this long
+        # Motion IDs double as unknown_entries.track_id, so start from a time-based
+        # base that cannot clash with face track IDs (< 1e6) or a previous session
+        self._motion_id_counter = itertools.count(int(time.time()) * 1000)
         self.last_motion_detection_time = 0  # Last time motion detection ran
         self.motion_detection_interval = 0.03  # Run motion detection every 0.03s (~33 FPS) - very fast
+        self.motion_face_grace_period = 0.5  # Skip motion fallback while faces were found this recently
+        self._last_face_detected_time = 0
+        
+        # Per-resolution motion parameters, computed once per frame size (see _update_motion_params)
+        self._motion_shape = None
+        self._motion_scale = 1.0
+        self._motion_size = None  # (w, h) of the downscaled motion frame, None = no resize
+        self._motion_min_area = 0
+        self._motion_max_area = 0
+        self._morph_kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))  # Smaller kernel = faster
+        # Shared detector input for motion ROIs - resized in place instead of allocating per region
+        self._roi_size = 320
+        self._roi_buf = np.empty((self._roi_size, self._roi_size, 3), dtype=np.uint8)
         
         # Employee ID mapping - MUST be initialized early
         self.employee_id_map = {}
         
+        # Resolve the icons folder once; loaders join file names onto it
+        self._asset_search_paths = [
+            'assets/icons',
+            os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'assets', 'icons'),
+            os.path.join(os.getcwd(), 'assets', 'icons')
+        ]
+        self._asset_dir = next((p for p in self._asset_search_paths if os.path.isdir(p)), None)
+        
         # Load background/logo image
+        self.video_canvas = None  # Created in setup_ui
         self.background_image = None
         self.background_photo = None
+        self._bg_bgra = None  # background_image as a BGRA array for OpenCV blending
+        self._bg_bgr_cache = {}  # (w, h) -> background resized to the frame, BGR
+        self._bg_umat_cache = {}  # (w, h) -> resized background on the OpenCL device
+        # OpenCL (T-API) path for the full-frame display stages - opt-in via the opencl_overlays setting
+        self._use_opencl = bool(self.config.get_setting("opencl_overlays", False)) and cv2.ocl.haveOpenCL()
+        if self._use_opencl:
+            cv2.ocl.setUseOpenCL(True)
+            print("✅ OpenCL enabled for video display compositing")
+        self._logo_overlay = None  # Cached (logo BGR, premultiplied logo, 255 - alpha, offset), see _build_logo_overlay
+        self._hud_cache = {}  # (w, h, has_detections) -> HUD tiles, see _build_hud
+        self._motion_sprites = {}  # detection count -> 'MOTION DATA - N DETECTED' sprite
         self.load_background_image()
         
         # Load employee card icons
+        self._card_pool = []  # Reusable employee card widgets (see _build_card_pool)
+        self._photo_tk_cache = {}  # (staff_id, checked_in) -> (photo array, ImageTk.PhotoImage)
+        self._card_rows = []
+        self._cards_visible = 0
         self.employee_icons = {}
+        self._overlay_icon_small = None  # 25x25 RGBA Vector-2.png pasted on card photos
         self.load_employee_icons()
+        # Card avatar used when no icon loaded (lightgray box with gray border)
+        gray_avatar = Image.new('RGB', (61, 61), (211, 211, 211))
+        ImageDraw.Draw(gray_avatar).rectangle([0, 0, 60, 60], outline=(128, 128, 128), width=2)
+        self._gray_fallback_tk = ImageTk.PhotoImage(gray_avatar)
         
         # Showcase photo display tracking
         self.showcase_photo_visible = False
@@ -168,13 +271,15 @@ class ImpexAttendanceDashboard:
         )
         
         # Update canvas background and center video when canvas is resized
+        self._video_canvas_size = (0, 0)  # Cached for display_video (read off the UI thread)
+        self._video_update_pending = False
         def on_canvas_configure(event):
+            self._video_canvas_size = (event.width, event.height)
             self.update_canvas_background()
-            # Center video label
-            if hasattr(self, 'video_label_id'):
-                center_x = event.width // 2
-                center_y = event.height // 2
-                self.video_canvas.coords(self.video_label_id, center_x, center_y)
+            # Center video label (created above, before this binding)
+            center_x = event.width // 2
+            center_y = event.height // 2
+            self.video_canvas.coords(self.video_label_id, center_x, center_y)
         
         self.video_canvas.bind('<Configure>', on_canvas_configure)
         
@@ -234,7 +339,7 @@ class ImpexAttendanceDashboard:
         def configure_scroll_region(event=None):
             attendance_canvas.configure(scrollregion=attendance_canvas.bbox('all'))
             # Update background image size
-            if hasattr(self, 'background_image') and self.background_image:
+            if self.background_image:
                 try:
                     canvas_width = attendance_canvas.winfo_width()
                     canvas_height = attendance_canvas.winfo_height()
@@ -404,6 +509,10 @@ class ImpexAttendanceDashboard:
         self.refresh_attendance_cards()
         self.update_remaining_count()
     
+    def _on_attendance_mode_write(self, *_):
+        """Refresh the cached attendance mode whenever the Tk variable changes"""
+        self._mode_cached = self.attendance_mode.get()
+    
     def update_time(self):
         """Update date and time display"""
         now = datetime.now()
@@ -513,11 +622,21 @@ class ImpexAttendanceDashboard:
         
         return True
 
+    def _detect_roi_faces(self, roi):
+        """Detect faces in a motion region via the shared ROI buffer.
+        
+        The region is resized into the buffer and detected there; bboxes are
+        mapped back to the region's coordinates.
+        """
+        # Buffer is only touched from process_thread (process_video -> detect_and_capture_motion)
+        size = self._roi_size
+        cv2.resize(roi, (size, size), dst=self._roi_buf)
+        scale_x = roi.shape[1] / size
+        scale_y = roi.shape[0] / size
+        return self.face_engine.detect_faces_prescaled(self._roi_buf, scale_x, scale_y)
+
     def process_video(self):
         """Process video frames for face recognition - OPTIMIZED WITH SMART FRAME SKIPPING"""
-        if not hasattr(self, 'last_processed'):
-            self.last_processed = {}
-        
         # Initialize frame counter to track that detection starts from frame 1
         frame_counter = 0
         
@@ -551,7 +670,10 @@ class ImpexAttendanceDashboard:
                     print("✅ Face detection started - Processing first frame from camera")
                 
                 with self.frame_lock:
-                    self.current_frame = frame.copy()
+                    # Camera frames are fresh arrays and never drawn on here - share, don't copy
+                    self.current_frame = frame
+                    self.frame_version += 1
+                self._new_frame_event.set()
                 
                 # Smart frame skipping: only process good frames at intervals
                 current_time = time.time()
@@ -577,9 +699,10 @@ class ImpexAttendanceDashboard:
                     is_acceptable_quality  # Acceptable quality (includes both good and lenient)
                 )
                 
-                # CRITICAL: Motion detection runs on EVERY frame (independent of face detection)
-                # This ensures we catch fast-moving persons even when face detection doesn't run
-                if self.motion_detection_enabled and self.background_subtractor is not None:
+                # Motion detection is the fallback for fast-moving persons WITHOUT a detected face,
+                # so it only runs while face detection has come up empty for a short while
+                face_found_recently = (current_time - self._last_face_detected_time) < self.motion_face_grace_period
+                if self.motion_detection_enabled and self.background_subtractor is not None and not face_found_recently:
                     time_since_last_motion = current_time - self.last_motion_detection_time
                     if time_since_last_motion >= self.motion_detection_interval:
                         # Run motion detection (no quality checks - works on any frame)
@@ -599,15 +722,22 @@ class ImpexAttendanceDashboard:
                     
                     detections = self.face_engine.detect_faces(frame)
                     
+                    if detections:
+                        self._last_face_detected_time = current_time
+                    
                     # Track currently detected persons
                     current_track_ids = set()
                     current_staff_ids_detected = set()  # Track all detected staff (even if not shown)
                     detection_info = []  # Will only contain detections to show (after entry/exit logic)
                     unknown_detections = []  # Store unknown detections for processing
                     
-                    for detection in detections:
+                    # Identify all faces of this frame with one batched gallery lookup
+                    identities = self.face_engine.identify_persons(
+                        [detection['embedding'] for detection in detections]
+                    ) if detections else []
+                    
+                    for detection, identity in zip(detections, identities):
                         bbox = detection['bbox']
-                        embedding = detection['embedding']
                         det_confidence = detection.get('confidence', 0.0)
                         
                         # Generate track ID based on face position and size
@@ -622,7 +752,7 @@ class ImpexAttendanceDashboard:
                         # CRITICAL: Check if this is a staff member FIRST
                         # This ensures we properly verify staff before marking as unknown
                         # For lenient quality frames, we still try to identify but prioritize unknown capture
-                        person_type, person_id, rec_confidence = self.face_engine.identify_person(embedding)
+                        person_type, person_id, rec_confidence = identity
                         
                         # Enhanced staff verification: double-check with higher threshold
                         # For lenient quality frames, use slightly lower threshold to avoid false positives
@@ -634,7 +764,7 @@ class ImpexAttendanceDashboard:
                             min_confidence = 0.50 if is_lenient_quality_frame else 0.55
                             if staff_info and rec_confidence >= min_confidence:
                                 is_confirmed_staff = True
-                                print(f"✅ Confirmed Staff: {person_id} (confidence: {rec_confidence:.3f}, quality: {'lenient' if is_lenient_quality_frame else 'good'})")
+                                log.debug("✅ Confirmed Staff: %s (confidence: %.3f, quality: %s)", person_id, rec_confidence, 'lenient' if is_lenient_quality_frame else 'good')
                         
                         # Update tracking status
                         if is_confirmed_staff:
@@ -646,27 +776,21 @@ class ImpexAttendanceDashboard:
                             
                             # Get or create track status
                             if staff_track_key not in self.person_track_status:
-                                self.person_track_status[staff_track_key] = {
-                                    'in_frame': False,
-                                    'last_seen': 0,
-                                    'captured': False,
-                                    'bbox': None,
-                                    'track_id': track_id
-                                }
+                                self.person_track_status[staff_track_key] = TrackStatus(track_id=track_id)
                             
                             track_status = self.person_track_status[staff_track_key]
-                            track_status['track_id'] = track_id  # Update track_id
+                            track_status.track_id = track_id  # Update track_id
                             
                             # If person was not in frame before (just entered or returned)
-                            if not track_status['in_frame']:
+                            if not track_status.in_frame:
                                 # Check if this is a return (was captured before)
-                                if track_status['captured']:
+                                if track_status.captured:
                                     # Person returned - reset capture flag to allow new capture
-                                    print(f"✅ Staff {person_id} returned to frame - capturing attendance")
-                                    track_status['captured'] = False
-                                    track_status['in_frame'] = True
-                                    track_status['last_seen'] = current_time
-                                    track_status['bbox'] = bbox
+                                    log.debug("✅ Staff %s returned to frame - capturing attendance", person_id)
+                                    track_status.captured = False
+                                    track_status.in_frame = True
+                                    track_status.last_seen = current_time
+                                    track_status.bbox = bbox
                                     
                                     # Now capture and process attendance
                                     self.process_attendance(person_id, frame, bbox, rec_confidence)
@@ -684,15 +808,15 @@ class ImpexAttendanceDashboard:
                                     detection_info.append(info)
                                 else:
                                     # First time seeing this person - mark as in frame but don't capture yet
-                                    print(f"👁️ Staff {person_id} detected in frame - waiting for them to leave before capture")
-                                    track_status['in_frame'] = True
-                                    track_status['last_seen'] = current_time
-                                    track_status['bbox'] = bbox
+                                    log.debug("👁️ Staff %s detected in frame - waiting for them to leave before capture", person_id)
+                                    track_status.in_frame = True
+                                    track_status.last_seen = current_time
+                                    track_status.bbox = bbox
                                     # Don't show on screen or capture yet - wait for them to leave
                             else:
                                 # Person still in frame - update last seen time
-                                track_status['last_seen'] = current_time
-                                track_status['bbox'] = bbox
+                                track_status.last_seen = current_time
+                                track_status.bbox = bbox
                                 # Don't show on screen - they're still in frame
                                 # Remove from current_detections if they were showing before
                                 with self.frame_lock:
@@ -712,25 +836,22 @@ class ImpexAttendanceDashboard:
                             
                             # Log if this is from a lenient quality frame
                             if is_lenient_quality_frame:
-                                print(f"📸 Processing unknown on lenient quality frame (may be moving/blurry)")
+                                log.debug("📸 Processing unknown on lenient quality frame (may be moving/blurry)")
                             
                             if unknown_track_key not in self.unknown_track_status:
-                                self.unknown_track_status[unknown_track_key] = {
-                                    'in_frame': False,
-                                    'last_seen': 0,
-                                    'captured': False,
-                                    'bbox': bbox,
-                                    'face_confidence': det_confidence,
-                                    'recognition_confidence': rec_confidence,
-                                    'track_id': track_id,
-                                    'first_detected': current_time
-                                }
+                                self.unknown_track_status[unknown_track_key] = TrackStatus(
+                                    track_id=track_id,
+                                    bbox=bbox,
+                                    face_confidence=det_confidence,
+                                    recognition_confidence=rec_confidence,
+                                    first_detected=current_time
+                                )
                             
                             track_status = self.unknown_track_status[unknown_track_key]
-                            track_status['track_id'] = track_id  # Update track_id
-                            track_status['bbox'] = bbox
-                            track_status['face_confidence'] = det_confidence
-                            track_status['recognition_confidence'] = rec_confidence
+                            track_status.track_id = track_id  # Update track_id
+                            track_status.bbox = bbox
+                            track_status.face_confidence = det_confidence
+                            track_status.recognition_confidence = rec_confidence
                             
                             # IMPROVED: Capture unknown person immediately when detected
                             # Check if enough time has passed since last capture (to avoid duplicates)
@@ -742,21 +863,21 @@ class ImpexAttendanceDashboard:
                             # 2. Person is in frame but enough time has passed (UNKNOWN_CAPTURE_INTERVAL)
                             should_capture = False
                             
-                            if not track_status['in_frame']:
+                            if not track_status.in_frame:
                                 # Person just entered frame - capture immediately
                                 should_capture = True
-                                track_status['in_frame'] = True
-                                track_status['first_detected'] = current_time
-                                print(f"📸 Unknown person detected (NEW): type={person_type}, track_id={track_id}, conf={rec_confidence:.2f} - capturing immediately")
+                                track_status.in_frame = True
+                                track_status.first_detected = current_time
+                                log.debug("📸 Unknown person detected (NEW): type=%s, track_id=%s, conf=%.2f - capturing immediately", person_type, track_id, rec_confidence)
                             elif time_since_last_capture >= UNKNOWN_CAPTURE_INTERVAL:
                                 # Person still in frame but enough time passed - capture again
                                 should_capture = True
-                                print(f"📸 Unknown person detected (REPEAT): type={person_type}, track_id={track_id}, conf={rec_confidence:.2f} - capturing again (interval: {time_since_last_capture:.1f}s)")
+                                log.debug("📸 Unknown person detected (REPEAT): type=%s, track_id=%s, conf=%.2f - capturing again (interval: %.1fs)", person_type, track_id, rec_confidence, time_since_last_capture)
                             
                             if should_capture:
                                 # Update last capture time
                                 last_unknown_capture_time[track_id] = current_time
-                                track_status['last_seen'] = current_time
+                                track_status.last_seen = current_time
                                 
                                 # Capture unknown entry immediately (save to database)
                                 unknown_detections.append({
@@ -781,7 +902,7 @@ class ImpexAttendanceDashboard:
                                 detection_info.append(info)
                             else:
                                 # Update last seen but don't capture yet (too soon)
-                                track_status['last_seen'] = current_time
+                                track_status.last_seen = current_time
                     
                     # Check for persons who left the frame (not detected in current cycle)
                     # For staff members
@@ -790,40 +911,40 @@ class ImpexAttendanceDashboard:
                             staff_id = track_key.replace('staff_', '')
                             if staff_id in current_staff_ids_detected:
                                 # Staff member is detected - update last seen if in frame
-                                if status['in_frame']:
-                                    status['last_seen'] = current_time
+                                if status.in_frame:
+                                    status.last_seen = current_time
                             else:
                                 # Staff member NOT detected in current cycle
-                                if status['in_frame']:
-                                    time_since_last_seen = current_time - status['last_seen']
+                                if status.in_frame:
+                                    time_since_last_seen = current_time - status.last_seen
                                     if time_since_last_seen > self.person_track_timeout:
                                         # Person has been gone long enough - mark as left
-                                        status['in_frame'] = False
-                                        if not status['captured']:
-                                            status['captured'] = True
-                                            print(f"⏱️ Staff {staff_id} left frame - ready for capture on return")
+                                        status.in_frame = False
+                                        if not status.captured:
+                                            status.captured = True
+                                            log.debug("⏱️ Staff %s left frame - ready for capture on return", staff_id)
                     
                     # For unknown persons
                     for track_key, status in list(self.unknown_track_status.items()):
-                        track_id = status.get('track_id')
+                        track_id = status.track_id
                         if track_id and track_id in current_track_ids:
                             # Unknown person is detected - update last seen if in frame
-                            if status['in_frame']:
-                                status['last_seen'] = current_time
+                            if status.in_frame:
+                                status.last_seen = current_time
                         else:
                             # Unknown person NOT detected in current cycle
-                            if track_id and status['in_frame']:
-                                time_since_last_seen = current_time - status['last_seen']
+                            if track_id and status.in_frame:
+                                time_since_last_seen = current_time - status.last_seen
                                 if time_since_last_seen > self.person_track_timeout:
                                     # Unknown person left frame
-                                    status['in_frame'] = False
-                                    if not status['captured']:
-                                        status['captured'] = True
-                                        print(f"⏱️ Unknown person (track {track_id}) left frame - ready for capture on return")
+                                    status.in_frame = False
+                                    if not status.captured:
+                                        status.captured = True
+                                        log.debug("⏱️ Unknown person (track %s) left frame - ready for capture on return", track_id)
                     
                     # Process unknown entries immediately (captured when detected)
                     if unknown_detections:
-                        print(f"📝 Processing {len(unknown_detections)} unknown entry/entries...")
+                        log.debug("📝 Processing %d unknown entry/entries...", len(unknown_detections))
                         self.process_unknown_entries(frame, unknown_detections, current_time)
                         
                         # Clean up old capture times (keep only recent ones)
@@ -885,7 +1006,7 @@ class ImpexAttendanceDashboard:
                                 if staff_track_key in self.person_track_status:
                                     track_status = self.person_track_status[staff_track_key]
                                     # Don't show if person is currently in frame
-                                    if track_status['in_frame']:
+                                    if track_status.in_frame:
                                         continue  # Skip - person is still in frame
                             
                             filtered_detections.append(det)
@@ -897,6 +1018,7 @@ class ImpexAttendanceDashboard:
                     if elapsed > 0:
                         fps = fps_counter / elapsed
                         detection_fps = processed_frames / elapsed if processed_frames > 0 else 0
+                        # Console only - at INFO this would reach the log file once a second
                         print(f"📊 FPS: {fps:.1f} | Detection FPS: {detection_fps:.1f} | Total: {frame_counter} | Processed: {processed_frames}")
                         fps_counter = 0
                         processed_frames = 0
@@ -912,13 +1034,13 @@ class ImpexAttendanceDashboard:
     def process_attendance(self, staff_id, frame, bbox, confidence):
         """Process attendance for recognized staff member"""
         try:
-            mode = self.attendance_mode.get()
+            mode = self._mode_cached
             now = datetime.now()
             
             # Mark this staff member as captured (so they won't be captured again until they leave and return)
             staff_track_key = f"staff_{staff_id}"
             if staff_track_key in self.person_track_status:
-                self.person_track_status[staff_track_key]['captured'] = True
+                self.person_track_status[staff_track_key].captured = True
             
             # Capture photo for display
             x1, y1, x2, y2 = map(int, bbox)
@@ -927,8 +1049,11 @@ class ImpexAttendanceDashboard:
             x2 = min(frame.shape[1], x2 + 10)
             y2 = min(frame.shape[0], y2 + 10)
             
-            captured_photo = frame[y1:y2, x1:x2].copy()
-            self.captured_photos[staff_id] = captured_photo
+            # Zero-copy view into the frame; compacted on first render (see _get_captured_photo)
+            self.captured_photos[staff_id] = frame[y1:y2, x1:x2]
+            # New photo - drop the card images rendered from the old one
+            self._photo_tk_cache.pop((staff_id, True), None)
+            self._photo_tk_cache.pop((staff_id, False), None)
             
             # Record attendance
             if mode == 'checkin':
@@ -948,6 +1073,22 @@ class ImpexAttendanceDashboard:
         except Exception as e:
             print(f"Attendance processing error: {e}")
     
+    def _update_motion_params(self, shape):
+        """Recompute motion-detection scale and area limits for a new frame size"""
+        h, w = shape[:2]
+        if w > 640:  # Only resize if frame is large
+            self._motion_scale = 640.0 / w
+            self._motion_size = (640, int(h * self._motion_scale))
+        else:
+            self._motion_scale = 1.0
+            self._motion_size = None
+        
+        # Use small frame dimensions for area calculations
+        w_small, h_small = self._motion_size or (w, h)
+        self._motion_min_area = (w_small * h_small) * 0.01  # At least 1% of frame area
+        self._motion_max_area = (w_small * h_small) * 0.5   # At most 50% of frame area
+        self._motion_shape = shape
+    
     def detect_and_capture_motion(self, frame, current_time, current_face_track_ids, current_staff_ids):
         """Detect motion and capture persons even when face detection fails (for fast-moving persons)
         
@@ -957,15 +1098,21 @@ class ImpexAttendanceDashboard:
             if frame is None or self.background_subtractor is None:
                 return
             
+            # Drop grid cells that have not been captured for a while (bounded memory)
+            if current_time - self._motion_grid_last_sweep >= self.motion_grid_ttl:
+                self._motion_grid = {
+                    cell: state for cell, state in self._motion_grid.items()
+                    if current_time - state[0] < self.motion_grid_ttl
+                }
+                self._motion_grid_last_sweep = current_time
+            
             # OPTIMIZED: Resize frame for faster processing (motion detection doesn't need full resolution)
             # Use smaller resolution for motion detection to speed it up
-            h, w = frame.shape[:2]
-            scale = 1.0
-            if w > 640:  # Only resize if frame is large
-                scale = 640.0 / w
-                new_w = 640
-                new_h = int(h * scale)
-                frame_small = cv2.resize(frame, (new_w, new_h))
+            if frame.shape != self._motion_shape:
+                self._update_motion_params(frame.shape)
+            scale = self._motion_scale
+            if self._motion_size is not None:
+                frame_small = cv2.resize(frame, self._motion_size)
             else:
                 frame_small = frame
             
@@ -976,66 +1123,44 @@ class ImpexAttendanceDashboard:
             fg_mask = self.background_subtractor.apply(gray)
             
             # OPTIMIZED: Faster noise removal with smaller kernel
-            kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))  # Smaller kernel = faster
+            kernel = self._morph_kernel
             fg_mask = cv2.morphologyEx(fg_mask, cv2.MORPH_OPEN, kernel)
             fg_mask = cv2.morphologyEx(fg_mask, cv2.MORPH_CLOSE, kernel)
             
-            # Find contours (moving objects) - OPTIMIZED for speed
-            contours, _ = cv2.findContours(fg_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            # Find moving blobs - bbox + area per component in a single C call
+            _, _, stats, _ = cv2.connectedComponentsWithStats(fg_mask, connectivity=8)
+            stats = stats[1:]  # Row 0 is the background
             
-            # Use small frame dimensions for area calculations
-            h_small, w_small = frame_small.shape[:2]
-            min_area = (w_small * h_small) * 0.01  # At least 1% of frame area
-            max_area = (w_small * h_small) * 0.5   # At most 50% of frame area
+            # Filter by size (person-sized objects) in one vectorized pass
+            # Width/height limits (40x80 on the full frame) mapped to small-frame pixels
+            areas = stats[:, cv2.CC_STAT_AREA]
+            keep = (
+                (areas >= self._motion_min_area) & (areas <= self._motion_max_area) &
+                (stats[:, cv2.CC_STAT_WIDTH] >= 40 * scale) & (stats[:, cv2.CC_STAT_HEIGHT] >= 80 * scale)
+            )
             
             motion_detections = []
             
-            for contour in contours:
-                area = cv2.contourArea(contour)
-                
-                # Filter by size (person-sized objects)
-                if area < min_area or area > max_area:
-                    continue
-                
-                # Get bounding box (on small frame)
-                x, y, bw, bh = cv2.boundingRect(contour)
-                
+            for x, y, bw, bh, _ in stats[keep].tolist():
                 # Scale back to original frame coordinates
                 x = int(x / scale)
                 y = int(y / scale)
                 bw = int(bw / scale)
                 bh = int(bh / scale)
                 
-                # Skip if too small (not a person) - use scaled dimensions
-                if bw < 40 or bh < 80:  # Slightly smaller threshold for faster detection
-                    continue
-                
-                # Calculate center and generate motion ID
+                # Locate the motion on the spatial grid (100px cells)
                 center_x = x + bw // 2
                 center_y = y + bh // 2
-                motion_id = hash((center_x // 100, center_y // 100, area // 1000))
-                motion_id = abs(motion_id) % 1000000
-                
-                # Check if this motion corresponds to a known face track or staff
-                # If it does, skip (already handled by face detection)
-                is_known_face = False
-                for face_track_id in current_face_track_ids:
-                    # Check if motion is near any face detection
-                    # This is approximate - if motion center is close to face area, assume it's the same person
-                    if abs(motion_id - face_track_id) < 10000:  # Rough check
-                        is_known_face = True
-                        break
-                
-                if is_known_face:
-                    continue  # Skip - already handled by face detection
+                motion_cell = (center_x // 100, center_y // 100)
+                cell_state = self._motion_grid.get(motion_cell)
                 
                 # Check if we've captured this motion recently
-                last_capture = self.last_motion_capture_time.get(motion_id, 0)
-                time_since_capture = current_time - last_capture
-                
-                if time_since_capture < self.motion_capture_interval:
+                if cell_state is not None and current_time - cell_state[0] < self.motion_capture_interval:
                     continue  # Too soon to capture again
                 
+                # Same cell keeps its ID while it stays on the grid, so repeat captures update one entry
+                motion_id = cell_state[1] if cell_state is not None else next(self._motion_id_counter)
+                
                 # This is a new motion detection without face - capture it
                 bbox = [x, y, x + bw, y + bh]
                 
@@ -1047,6 +1172,11 @@ class ImpexAttendanceDashboard:
                 roi_y1 = max(0, y - expand)
                 roi_x2 = min(frame.shape[1], x + bw + expand)
                 roi_y2 = min(frame.shape[0], y + bh + expand)
+                # Widen the (tall) person region towards a square so the fixed-size
+                # detector buffer doesn't squash faces vertically
+                pad_x = max(0, (roi_y2 - roi_y1) - (roi_x2 - roi_x1)) // 2
+                roi_x1 = max(0, roi_x1 - pad_x)
+                roi_x2 = min(frame.shape[1], roi_x2 + pad_x)
                 roi = frame[roi_y1:roi_y2, roi_x1:roi_x2]
                 
                 has_face = False
@@ -1056,7 +1186,7 @@ class ImpexAttendanceDashboard:
                 if roi.size > 0 and roi.shape[0] > 30 and roi.shape[1] > 30:
                     # Try face detection on this region (fast - only on motion area)
                     try:
-                        face_detections = self.face_engine.detect_faces(roi)
+                        face_detections = self._detect_roi_faces(roi)
                         has_face = len(face_detections) > 0
                         face_confidence = face_detections[0]['confidence'] if face_detections else 0.0
                     except:
@@ -1098,10 +1228,10 @@ class ImpexAttendanceDashboard:
                         continue
                     
                     # This is NOT staff - capture as unknown entry
-                    print(f"🏃 Motion detected (no face/fast-moving): motion_id={motion_id}, has_face={has_face}, person_type={person_type}, conf={rec_confidence:.2f}")
+                    log.debug("🏃 Motion detected (no face/fast-moving): motion_id=%s, has_face=%s, person_type=%s, conf=%.2f", motion_id, has_face, person_type, rec_confidence)
                     
                     # Update capture time
-                    self.last_motion_capture_time[motion_id] = current_time
+                    self._motion_grid[motion_cell] = (current_time, motion_id)
                     
                     # Capture as unknown entry
                     motion_detections.append({
@@ -1117,7 +1247,7 @@ class ImpexAttendanceDashboard:
             
             # Process motion detections as unknown entries
             if motion_detections:
-                print(f"📸 Capturing {len(motion_detections)} motion-based unknown entry/entries...")
+                log.debug("📸 Capturing %d motion-based unknown entry/entries...", len(motion_detections))
                 self.process_unknown_entries(frame, motion_detections, current_time)
                 
         except Exception as e:
@@ -1126,10 +1256,134 @@ class ImpexAttendanceDashboard:
             traceback.print_exc()
     
     def process_unknown_entries(self, frame, unknown_detections, current_time):
-        """Process and capture unknown entries (persons without recognized faces or with covered faces)"""
+        """Queue unknown entries for the background writer (frames are never modified after capture)"""
+        # Same tracks on a near-identical frame (static scene) - the last entries still stand
+        track_ids = frozenset(d.get('track_id', 0) for d in unknown_detections)
+        fingerprint = cv2.resize(frame, (64, 64), interpolation=cv2.INTER_AREA).astype(np.int16)
+        last_tracks, last_fingerprint = self._last_unknown_fp
+        if track_ids == last_tracks and last_fingerprint is not None and \
+                np.mean(np.abs(fingerprint - last_fingerprint)) < self.unknown_static_threshold:
+            return
+        self._last_unknown_fp = (track_ids, fingerprint)
+        
+        try:
+            self._unknown_q.put_nowait((frame, unknown_detections, current_time))
+        except queue.Full:
+            print(f"⚠️ Unknown entry queue full - dropping {len(unknown_detections)} detection(s)")
+    
+    def _unknown_worker(self):
+        """Background thread that records queued unknown entries, one DB transaction per batch"""
+        while True:
+            batch = [self._unknown_q.get()]
+            # Drain whatever else piled up while the last batch was being written
+            while len(batch) < 16:
+                try:
+                    batch.append(self._unknown_q.get_nowait())
+                except queue.Empty:
+                    break
+            
+            # Newest capture of a track wins (the DB keeps one open row per track per day), so
+            # skip the bbox math, crop and encode for older detections of the same track
+            seen_tracks = set()
+            latest = []
+            for frame, unknown_detections, current_time in reversed(batch):
+                kept = []
+                for detection in reversed(unknown_detections):
+                    track_id = detection.get('track_id', 0)
+                    if track_id and track_id in seen_tracks:
+                        continue
+                    seen_tracks.add(track_id)
+                    kept.append(detection)
+                if kept:
+                    latest.append((frame, kept[::-1]))
+            
+            pending = []
+            for frame, unknown_detections in reversed(latest):
+                pending.extend(self._build_unknown_entries(frame, unknown_detections))
+            if pending:
+                self._flush_unknown_entries(pending)
+    
+    @staticmethod
+    def _encode_jpeg(image):
+        """JPEG-encode a crop for the DB (None if encoding fails)"""
+        success, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 85])
+        return buffer.tobytes() if success else None
+    
+    def _flush_unknown_entries(self, pending):
+        """Write pending unknown entries with a single DB transaction and mark their tracks captured"""
+        try:
+            # Encode crops on the pool (imencode releases the GIL), then hand bytes to the DB
+            blobs = self._io_pool.map(self._encode_jpeg, [entry['frame_image'] for entry in pending])
+            encoded = []
+            for entry, blob in zip(pending, blobs):
+                if blob is None:
+                    print(f"❌ FAILED to encode unknown entry image: Track ID {entry['track_id']}")
+                    continue
+                entry['frame_image'] = blob
+                encoded.append(entry)
+            pending = encoded
+            
+            entry_ids = self.db_manager.record_unknown_entries(pending)
+            for entry, entry_id in zip(pending, entry_ids):
+                track_id = entry['track_id']
+                if entry_id:
+                    # Mark this track as captured (so they won't be captured again until they leave and return)
+                    unknown_track_key = f"unknown_{track_id}"
+                    if unknown_track_key in self.unknown_track_status:
+                        self.unknown_track_status[unknown_track_key].captured = True
+                    log.debug("✅ Unknown entry recorded in database: Entry ID %s, Track ID %s, Type: %s, Reason: %s", entry_id, track_id, entry['entry_type'], entry['reason'])
+                else:
+                    print(f"❌ FAILED to record unknown entry in database: Track ID {track_id}, Type: {entry['entry_type']}")
+        except Exception as e:
+            print(f"❌ Error recording unknown entries: {e}")
+    
+    @staticmethod
+    def _build_unknown_classifier(covered_face_threshold=0.3, match_threshold=0.5):
+        """Build the unknown-entry classifier with its thresholds bound as closure locals
+        
+        Returns classify(person_type, face_conf, rec_conf, has_face, is_motion) -> (entry_type, reason)
+        """
+        def classify(person_type, face_conf, rec_conf, has_face, is_motion):
+            if is_motion:
+                # Motion-based detection (fast-moving person, face might not be detected)
+                if has_face:
+                    return 'unknown_person', f'Fast-moving person detected (motion-based), face found but not recognized as staff (confidence: {rec_conf:.2f})'
+                return 'no_face', 'Fast-moving person detected (motion-based), no face detected - person moved too quickly'
+            if person_type == 'customer':
+                return 'customer', 'Recognized as customer, not staff member'
+            if face_conf < covered_face_threshold:
+                return 'covered_face', 'Face partially covered or low detection confidence'
+            if 0 < rec_conf < match_threshold:
+                return 'unknown_person', f'Face detected but person not in staff database (confidence: {rec_conf:.2f})'
+            if rec_conf == 0.0:
+                return 'unknown_person', 'Face detected but no match found in staff database'
+            if not has_face:
+                return 'no_face', 'No face detected'
+            return 'unknown_person', 'Face detected but not recognized as staff'
+        
+        return classify
+    
+    def _build_unknown_entries(self, frame, unknown_detections):
+        """Build DB rows for unknown entries (persons without recognized faces or with covered faces)"""
+        pending = []
         try:
             h, w = frame.shape[:2]
-            system_mode = self.attendance_mode.get()
+            system_mode = self._mode_cached
+            
+            # Full-body boxes for face-based detections, expanded from the face bbox in one vectorized pass:
+            # down by 6x face height, up by 1.5x, sideways by 1.5x face width, clipped to the frame
+            face_idx = [idx for idx, d in enumerate(unknown_detections) if not d.get('motion_detected', False)]
+            body_rows = {}
+            if face_idx:
+                faces = np.array([unknown_detections[idx]['bbox'] for idx in face_idx], dtype=np.float64).astype(np.int64)
+                face_w = faces[:, 2] - faces[:, 0]
+                face_h = faces[:, 3] - faces[:, 1]
+                bodies = np.empty_like(faces)
+                np.clip(faces[:, 0] - (face_w * 3) // 2, 0, None, out=bodies[:, 0])
+                np.clip(faces[:, 1] - (face_h * 3) // 2, 0, None, out=bodies[:, 1])
+                np.clip(faces[:, 2] + (face_w * 3) // 2, None, w, out=bodies[:, 2])
+                np.clip(faces[:, 3] + face_h * 6, None, h, out=bodies[:, 3])
+                body_rows = dict(zip(face_idx, zip(faces.tolist(), bodies.tolist())))
             
             for idx, detection in enumerate(unknown_detections):
                 # Handle both face-based and motion-based detections
@@ -1162,41 +1416,12 @@ class ImpexAttendanceDashboard:
                     track_id = abs(track_id) % 1000000
                 
                 # Determine entry type and reason with enhanced checking
-                # Check if this is a motion-based detection (no face detected initially)
-                is_motion_detection = detection.get('motion_detected', False)
-                
-                entry_type = 'unknown_person'
-                reason = 'Face detected but not recognized as staff'
-                
-                # Enhanced reason determination
-                if is_motion_detection:
-                    # Motion-based detection (fast-moving person, face might not be detected)
-                    if has_face:
-                        entry_type = 'unknown_person'
-                        reason = f'Fast-moving person detected (motion-based), face found but not recognized as staff (confidence: {rec_confidence:.2f})'
-                    else:
-                        entry_type = 'no_face'
-                        reason = 'Fast-moving person detected (motion-based), no face detected - person moved too quickly'
-                elif person_type == 'customer':
-                    entry_type = 'customer'
-                    reason = 'Recognized as customer, not staff member'
-                elif face_confidence < 0.3:
-                    entry_type = 'covered_face'
-                    reason = 'Face partially covered or low detection confidence'
-                elif rec_confidence < 0.5 and rec_confidence > 0:
-                    entry_type = 'unknown_person'
-                    reason = f'Face detected but person not in staff database (confidence: {rec_confidence:.2f})'
-                elif rec_confidence == 0.0:
-                    entry_type = 'unknown_person'
-                    reason = 'Face detected but no match found in staff database'
-                elif not has_face:
-                    entry_type = 'no_face'
-                    reason = 'No face detected'
+                entry_type, reason = self._classify_unknown(person_type, face_confidence, rec_confidence, has_face, is_motion)
                 
                 # Expand bounding box to capture full body
                 # For motion detections, bbox is already full body, so use it directly
                 # For face detections, expand from face bbox
-                if is_motion and person_bbox:
+                if is_motion:
                     # Motion detection already has full body bbox
                     body_x1, body_y1, body_x2, body_y2 = map(int, person_bbox)
                     # Use face_bbox if available, otherwise use person_bbox center
@@ -1210,63 +1435,41 @@ class ImpexAttendanceDashboard:
                         x1, y1 = center_x - face_size, center_y - face_size
                         x2, y2 = center_x + face_size, center_y + face_size
                 else:
-                    # Face detection - expand from face bbox
-                    x1, y1, x2, y2 = map(int, face_bbox) if face_bbox else map(int, person_bbox)
-                    face_height = y2 - y1
-                    face_width = x2 - x1
-                    
-                    # Expand to capture full body (estimated)
-                    # Expand downward by ~6x face height, upward by ~1x, sideways by ~2x
-                    expand_down = int(face_height * 6)
-                    expand_up = int(face_height * 1.5)
-                    expand_sides = int(face_width * 1.5)
-                    
-                    # Calculate full body bounding box
-                    body_x1 = max(0, x1 - expand_sides)
-                    body_y1 = max(0, y1 - expand_up)
-                    body_x2 = min(w, x2 + expand_sides)
-                    body_y2 = min(h, y2 + expand_down)
+                    # Face detection - full body box precomputed from the face bbox above
+                    (x1, y1, x2, y2), (body_x1, body_y1, body_x2, body_y2) = body_rows[idx]
                 
-                # Extract full body image
-                full_body_image = frame[body_y1:body_y2, body_x1:body_x2].copy()
+                # Extract full body image - a view is enough, it is JPEG-encoded straight from the frame
+                full_body_image = frame[body_y1:body_y2, body_x1:body_x2]
                 
                 # Make sure we have a valid image
                 if full_body_image.size == 0 or full_body_image.shape[0] < 50 or full_body_image.shape[1] < 50:
                     # Fallback: use person bbox directly
                     body_x1, body_y1, body_x2, body_y2 = map(int, person_bbox)
-                    full_body_image = frame[body_y1:body_y2, body_x1:body_x2].copy()
+                    full_body_image = frame[body_y1:body_y2, body_x1:body_x2]
                 
                 # Record unknown entry in database
                 # Use face_bbox if available, otherwise use approximate face location
                 face_bbox_for_db = [x1, y1, x2, y2] if (face_bbox or not is_motion) else None
                 
-                print(f"💾 Attempting to record unknown entry: Track ID {track_id}, Type: {entry_type}, Motion: {is_motion}")
-                entry_id = self.db_manager.record_unknown_entry(
-                    track_id=track_id,
-                    entry_type=entry_type,
-                    frame_image=full_body_image,
-                    face_bbox=face_bbox_for_db,
-                    person_bbox=[body_x1, body_y1, body_x2, body_y2],
-                    face_detected=has_face,
-                    face_confidence=float(face_confidence),
-                    recognition_confidence=float(rec_confidence),
-                    reason=reason,
-                    system_mode=system_mode
-                )
-                
-                if entry_id:
-                    # Mark this track as captured (so they won't be captured again until they leave and return)
-                    unknown_track_key = f"unknown_{track_id}"
-                    if unknown_track_key in self.unknown_track_status:
-                        self.unknown_track_status[unknown_track_key]['captured'] = True
-                    print(f"✅ Unknown entry SUCCESSFULLY recorded in database: Entry ID {entry_id}, Track ID {track_id}, Type: {entry_type}, Reason: {reason}")
-                else:
-                    print(f"❌ FAILED to record unknown entry in database: Track ID {track_id}, Type: {entry_type}")
+                log.debug("💾 Queueing unknown entry: Track ID %s, Type: %s, Motion: %s", track_id, entry_type, is_motion)
+                pending.append({
+                    'track_id': track_id,
+                    'entry_type': entry_type,
+                    'frame_image': full_body_image,
+                    'face_bbox': face_bbox_for_db,
+                    'person_bbox': [body_x1, body_y1, body_x2, body_y2],
+                    'face_detected': has_face,
+                    'face_confidence': float(face_confidence),
+                    'recognition_confidence': float(rec_confidence),
+                    'reason': reason,
+                    'system_mode': system_mode
+                })
                 
         except Exception as e:
             print(f"❌ Error processing unknown entries: {e}")
             import traceback
             traceback.print_exc()
+        return pending
     
     def record_checkin(self, staff_id, check_time, confidence):
         """Record check-in"""
@@ -1284,12 +1487,14 @@ class ImpexAttendanceDashboard:
             status = f"{minutes_late} min Late" if is_late else "On Time"
             
             # Store attendance data
+            old_data = self.today_attendance.get(staff_id)
             self.today_attendance[staff_id] = {
                 'staff_id': staff_id,
                 'check_in_time': check_time,
                 'status': status,
                 'confidence': confidence
             }
+            self._update_attendance_counts(old_data, self.today_attendance[staff_id])
             
             # Save to database - convert confidence to float to avoid SQLite type errors
             confidence_float = float(confidence) if confidence is not None else 1.0
@@ -1305,6 +1510,8 @@ class ImpexAttendanceDashboard:
         try:
             # Update attendance data
             if staff_id in self.today_attendance:
+                if 'check_out_time' not in self.today_attendance[staff_id]:
+                    self._checkout_count += 1
                 self.today_attendance[staff_id]['check_out_time'] = check_time
             else:
                 self.today_attendance[staff_id] = {
@@ -1312,6 +1519,7 @@ class ImpexAttendanceDashboard:
                     'check_out_time': check_time,
                     'confidence': confidence
                 }
+                self._checkout_count += 1
             
             # Save to database - convert confidence to float to avoid SQLite type errors
             confidence_float = float(confidence) if confidence is not None else 1.0
@@ -1325,22 +1533,18 @@ class ImpexAttendanceDashboard:
     def refresh_attendance_cards(self):
         """Refresh the attendance cards display"""
         try:
-            # Ensure employee_id_map exists
-            if not hasattr(self, 'employee_id_map') or self.employee_id_map is None:
-                self.employee_id_map = {}
-                self.load_employee_ids()
-            
-            # Clear existing cards
-            for widget in self.cards_container.winfo_children():
-                widget.destroy()
-            
             mode = self.attendance_mode.get()
             now = datetime.now()
             
+            # Roster, names and employee IDs all come from one bulk load (see load_employee_ids)
+            if self._staff_roster is None:
+                self.load_employee_ids()
+            get_employee_id = self.get_employee_id
+            
             # Get all staff or today's attendance based on mode
             if mode == 'checkin':
                 # Show all staff with today's check-in status
-                all_staff = self.db_manager.get_all_staff()
+                all_staff = [self._staff_info_cache[staff_id] for staff_id in self._staff_roster or []]
                 display_items = []
                 
                 for staff in all_staff:
@@ -1349,17 +1553,17 @@ class ImpexAttendanceDashboard:
                         display_items.append({
                             'staff_id': staff_id,
                             'name': staff.get('name', 'Unknown'),
-                            'employee_id': self.get_employee_id(staff_id),
+                            'employee_id': get_employee_id(staff_id),
                             'time': self.today_attendance[staff_id]['check_in_time'],
                             'status': self.today_attendance[staff_id]['status'],
-                            'photo': self.captured_photos.get(staff_id)
+                            'photo': self._get_captured_photo(staff_id)
                         })
                     else:
                         # Not checked in yet
                         display_items.append({
                             'staff_id': staff_id,
                             'name': staff.get('name', 'Unknown'),
-                            'employee_id': self.get_employee_id(staff_id),
+                            'employee_id': get_employee_id(staff_id),
                             'time': None,
                             'status': None,
                             'photo': None
@@ -1367,29 +1571,41 @@ class ImpexAttendanceDashboard:
             else:
                 # Check-out mode: show checked-in staff
                 display_items = []
+                staff_infos = self._get_staff_infos(self.today_attendance.keys())
                 for staff_id, att_data in self.today_attendance.items():
                     if 'check_in_time' in att_data:
-                        staff_info = self.db_manager.get_staff_info(staff_id)
+                        staff_info = staff_infos.get(staff_id)
                         display_items.append({
                             'staff_id': staff_id,
                             'name': staff_info.get('name', 'Unknown') if staff_info else 'Unknown',
-                            'employee_id': self.get_employee_id(staff_id),
+                            'employee_id': get_employee_id(staff_id),
                             'time': att_data.get('check_out_time', att_data['check_in_time']),
                             'status': 'Checked Out' if 'check_out_time' in att_data else 'Checked In',
-                            'photo': self.captured_photos.get(staff_id)
+                            'photo': self._get_captured_photo(staff_id)
                         })
             
             # Sort by time (most recent first)
             display_items.sort(key=lambda x: x['time'] or datetime.min, reverse=True)
             
-            # Create cards in grid (3 columns)
-            rows_frame = None
-            for i, item in enumerate(display_items[:20]):  # Show max 20
-                if i % 3 == 0:
-                    rows_frame = tk.Frame(self.cards_container, bg='#8B4513')
-                    rows_frame.pack(fill=tk.X, padx=5, pady=5)
-                
-                self.create_employee_card(rows_frame, item, mode)
+            # Fill pooled cards in grid (3 columns) - widgets are reused, not rebuilt
+            if not self._card_pool:
+                self._build_card_pool()
+            display_items = display_items[:len(self._card_pool)]  # Show max 20
+            
+            # Re-pack only when the number of visible cards changes (keeps grid order)
+            if len(display_items) != self._cards_visible:
+                for card in self._card_pool:
+                    card['frame'].pack_forget()
+                for row in self._card_rows:
+                    row.pack_forget()
+                for i in range(len(display_items)):
+                    if i % 3 == 0:
+                        self._card_rows[i // 3].pack(fill=tk.X, padx=5, pady=5)
+                    self._card_pool[i]['frame'].pack(side=tk.LEFT, padx=5, pady=5, fill=tk.BOTH, expand=True)
+                self._cards_visible = len(display_items)
+            
+            for card, item in zip(self._card_pool, display_items):
+                self.update_employee_card(card, item, mode)
             
             # Update canvas scroll region
             self.cards_container.update_idletasks()
@@ -1400,15 +1616,29 @@ class ImpexAttendanceDashboard:
             import traceback
             traceback.print_exc()
     
-    def create_employee_card(self, parent, item, mode):
-        """Create a single employee card matching the image design"""
+    def _get_captured_photo(self, staff_id):
+        """Return the captured photo for display, copying a frame view out once
+        so the card does not keep the whole camera frame alive"""
+        photo = self.captured_photos.get(staff_id)
+        if photo is not None and photo.base is not None:
+            photo = photo.copy()
+            self.captured_photos[staff_id] = photo
+        return photo
+    
+    def _build_card_pool(self, count=20):
+        """Create the reusable employee card widgets (3 per row); refresh only updates them"""
+        self._card_rows = [tk.Frame(self.cards_container, bg='#8B4513') for _ in range((count + 2) // 3)]
+        self._card_pool = [self.create_employee_card(self._card_rows[i // 3]) for i in range(count)]
+        self._cards_visible = 0
+    
+    def create_employee_card(self, parent):
+        """Create the widgets of a single employee card matching the image design (not packed)"""
         card_frame = tk.Frame(
             parent,
             bg='#654321',  # Dark brown card
             relief=tk.RAISED,
             borderwidth=2
         )
-        card_frame.pack(side=tk.LEFT, padx=5, pady=5, fill=tk.BOTH, expand=True)
         
         # Photo/avatar with icon overlay
         photo_frame = tk.Frame(card_frame, bg='#654321', width=80, height=80)
@@ -1425,8 +1655,45 @@ class ImpexAttendanceDashboard:
         )
         photo_canvas.pack(padx=5, pady=5)
         
-        photo_label = tk.Label(photo_frame, bg='lightgray', width=70, height=70)
-        photo_label.pack_forget()  # Hide label, use canvas instead
+        # Employee ID
+        id_label = tk.Label(
+            card_frame,
+            bg='#654321',
+            fg='white',
+            font=('Arial', 9)
+        )
+        id_label.pack()
+        
+        # Time
+        time_label = tk.Label(
+            card_frame,
+            bg='#654321',
+            fg='white',
+            font=('Arial', 9)
+        )
+        time_label.pack()
+        
+        # Status (packed only when the item has one)
+        status_label = tk.Label(
+            card_frame,
+            bg='#654321',
+            font=('Arial', 9, 'bold')
+        )
+        
+        return {
+            'frame': card_frame,
+            'photo_canvas': photo_canvas,
+            'id_label': id_label,
+            'time_label': time_label,
+            'status_label': status_label
+        }
+    
+    def update_employee_card(self, card, item, mode):
+        """Show item on an existing employee card"""
+        photo_canvas = card['photo_canvas']
+        photo_canvas.delete('all')
+        photo_canvas.image = None
+        photo_canvas.icon = None
         
         # Determine which icon/photo to show
         has_photo = item['photo'] is not None
@@ -1437,40 +1704,30 @@ class ImpexAttendanceDashboard:
             try:
                 photo = item['photo']
                 if isinstance(photo, np.ndarray):
-                    # Resize photo to fit canvas
-                    photo_resized = cv2.resize(photo, (70, 70))
-                    photo_rgb = cv2.cvtColor(photo_resized, cv2.COLOR_BGR2RGB)
-                    pil_image = Image.fromarray(photo_rgb)
-                    
-                    # Add profile icon overlay on top of photo if checked in
-                    if has_checkin and 'profile' in self.employee_icons:
-                        try:
-                            # Load Vector-2.png icon for overlay
-                            icon_paths = [
-                                'assets/icons/Vector-2.png',
-                                './assets/icons/Vector-2.png',
-                                os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'assets', 'icons', 'Vector-2.png'),
-                                os.path.join(os.getcwd(), 'assets', 'icons', 'Vector-2.png')
-                            ]
-                            icon_path = None
-                            for path in icon_paths:
-                                if os.path.exists(path):
-                                    icon_path = path
-                                    break
-                            
-                            if icon_path:
-                                icon_img = Image.open(icon_path)
-                                if icon_img.mode != 'RGBA':
-                                    icon_img = icon_img.convert('RGBA')
-                                # Resize icon to overlay size (smaller, positioned in corner)
-                                icon_img = icon_img.resize((25, 25), Image.Resampling.LANCZOS)
-                                # Paste icon in bottom-right corner with transparency
+                    # Reuse the converted image while the staff member's photo array is unchanged
+                    cached = self._photo_tk_cache.get((item['staff_id'], has_checkin))
+                    if cached is not None and cached[0] is photo:
+                        photo_tk = cached[1]
+                    else:
+                        # Resize photo to fit canvas
+                        photo_resized = cv2.resize(photo, (70, 70), interpolation=cv2.INTER_AREA)
+                        # Channel-reverse view - cvtColor call overhead dominates on a 70x70 buffer
+                        photo_rgb = np.ascontiguousarray(photo_resized[:, :, ::-1])
+                        pil_image = Image.fromarray(photo_rgb)
+                        
+                        # Add profile icon overlay on top of photo if checked in
+                        if has_checkin and self._overlay_icon_small is not None:
+                            try:
+                                # Paste cached Vector-2.png icon in bottom-right corner with transparency
+                                icon_img = self._overlay_icon_small
                                 pil_image = pil_image.convert('RGBA')
                                 pil_image.paste(icon_img, (70-25-5, 70-25-5), icon_img)
-                        except Exception as e:
-                            print(f"Error adding icon overlay: {e}")
-                    
-                    photo_tk = ImageTk.PhotoImage(pil_image)
+                            except Exception as e:
+                                print(f"Error adding icon overlay: {e}")
+                        
+                        photo_tk = ImageTk.PhotoImage(pil_image)
+                        # Holding the array in the entry keeps the identity check valid
+                        self._photo_tk_cache[(item['staff_id'], has_checkin)] = (photo, photo_tk)
                     photo_canvas.create_image(35, 35, anchor='center', image=photo_tk)
                     photo_canvas.image = photo_tk  # Keep reference
             except Exception as e:
@@ -1506,58 +1763,49 @@ class ImpexAttendanceDashboard:
                     photo_canvas.create_image(35, 35, anchor='center', image=icon_photo)
                     photo_canvas.icon = icon_photo  # Keep reference
                 else:
-                    # No icon available - show gray rectangle
-                    photo_canvas.create_rectangle(5, 5, 65, 65, fill='lightgray', outline='gray', width=2)
+                    # No icon available - show cached gray avatar
+                    photo_canvas.create_image(35, 35, anchor='center', image=self._gray_fallback_tk)
             except Exception as e:
                 print(f"Error displaying icon: {e}")
                 # Fallback to simple rectangle
                 photo_canvas.create_rectangle(5, 5, 65, 65, fill='lightgray', outline='gray', width=2)
         
         # Employee ID
-        id_label = tk.Label(
-            card_frame,
-            text=f"ID: {item['employee_id']}",
-            bg='#654321',
-            fg='white',
-            font=('Arial', 9)
-        )
-        id_label.pack()
+        card['id_label'].config(text=f"ID: {item['employee_id']}")
         
         # Time
         if item['time']:
             time_text = item['time'].strftime("%I:%M %p")
         else:
             time_text = "--:--"
-        
-        time_label = tk.Label(
-            card_frame,
-            text=time_text,
-            bg='#654321',
-            fg='white',
-            font=('Arial', 9)
-        )
-        time_label.pack()
+        card['time_label'].config(text=time_text)
         
         # Status
+        status_label = card['status_label']
         if item['status']:
             status_color = 'green' if item['status'] == 'On Time' else 'red'
-            status_label = tk.Label(
-                card_frame,
-                text=item['status'],
-                bg='#654321',
-                fg=status_color,
-                font=('Arial', 9, 'bold')
-            )
+            status_label.config(text=item['status'], fg=status_color)
             status_label.pack()
+        else:
+            status_label.pack_forget()
+    
+    def _update_attendance_counts(self, old_data, new_data):
+        """Keep the check-in/check-out counters in step when a today_attendance entry is replaced"""
+        for data, step in ((old_data, -1), (new_data, 1)):
+            if data:
+                self._checkin_count += step * ('check_in_time' in data)
+                self._checkout_count += step * ('check_out_time' in data)
+    
+    def _recount_attendance(self):
+        """Recompute the check-in/check-out counters from today_attendance (after a bulk load)"""
+        self._checkin_count = sum(1 for att in self.today_attendance.values() if 'check_in_time' in att)
+        self._checkout_count = sum(1 for att in self.today_attendance.values() if 'check_out_time' in att)
     
     def update_remaining_count(self):
         """Update remaining count for checkout mode"""
         if self.attendance_mode.get() == 'checkout':
-            checked_in_count = sum(1 for att in self.today_attendance.values() 
-                                  if 'check_in_time' in att)
-            checked_out_count = sum(1 for att in self.today_attendance.values() 
-                                   if 'check_out_time' in att)
-            remaining = checked_in_count - checked_out_count
+            # Counters are maintained by record_checkin/record_checkout
+            remaining = self._checkin_count - self._checkout_count
             
             self.remaining_label.config(text=f"REMAINING : {remaining}")
     
@@ -1565,12 +1813,25 @@ class ImpexAttendanceDashboard:
         """Display video feed with overlays - OPTIMIZED FOR HIGH FPS"""
         while self.running:
             try:
+                # Tk thread hasn't shown the previous frame yet - don't render one it would drop
+                if self._video_update_pending:
+                    time.sleep(0.005)
+                    continue
+                
+                # Wake on a new camera frame (at most ~33ms so overlays still refresh)
+                self._new_frame_event.wait(timeout=0.033)
+                self._new_frame_event.clear()
+                
                 with self.frame_lock:
-                    if self.current_frame is None:
-                        time.sleep(0.02)  # Reduced wait time
-                        continue
-                    frame = self.current_frame.copy()
-                    detections = self.current_detections.copy()
+                    if self.current_frame is None or self.frame_version == self._last_displayed_version:
+                        continue  # Nothing new to show
+                    # Both are only ever rebound by the processing thread, so take references
+                    frame = self.current_frame
+                    detections = self.current_detections
+                    self._last_displayed_version = self.frame_version
+                
+                # Private copy outside the lock - overlays below draw on it in place
+                frame = frame.copy()
                 
                 # Draw face detection boxes and overlays FIRST
                 frame = self.draw_face_detections(frame, detections)
@@ -1578,62 +1839,96 @@ class ImpexAttendanceDashboard:
                 # Add camera overlays matching the image
                 frame = self.add_camera_overlays(frame)
                 
-                # Add timestamp
-                timestamp = datetime.now().strftime("%d-%m-%Y %H:%M:%S")
-                cv2.putText(frame, timestamp, (10, frame.shape[0] - 10), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-                
-                # Add background image overlay to frame if available
-                if self.background_image:
-                    frame = self.add_background_overlay(frame)
+                # Add timestamp (formatted and rasterized only when the second changes)
+                now_second = int(time.time())
+                if now_second != self._ts_cached[1]:
+                    timestamp = datetime.now().strftime("%d-%m-%Y %H:%M:%S")
+                    self._ts_cached = (timestamp, now_second)
+                    self._ts_sprite = self._build_label_sprites({timestamp: 0.6})[timestamp]
+                self._blit_sprite(frame, self._ts_sprite, (10, frame.shape[0] - 10), (255, 255, 255))
                 
-                # Resize for display (optimize size)
-                display_frame = cv2.resize(frame, (800, 600))
-                display_rgb = cv2.cvtColor(display_frame, cv2.COLOR_BGR2RGB)
-                pil_image = Image.fromarray(display_rgb)
-                photo = ImageTk.PhotoImage(image=pil_image)
+                # Single resize straight to the on-screen size (800x600 aspect fitted to the canvas)
+                canvas_width, canvas_height = self._video_canvas_size
+                if canvas_width > 1 and canvas_height > 1:
+                    scale = min(canvas_width / 800, canvas_height / 600)
+                    display_size = (max(1, int(800 * scale)), max(1, int(600 * scale)))
+                else:
+                    display_size = (800, 600)
+                interpolation = cv2.INTER_AREA if display_size[0] < frame.shape[1] else cv2.INTER_LINEAR
                 
-                # Update canvas with video
-                if hasattr(self, 'video_canvas'):
-                    # Remove old video image
-                    self.video_canvas.delete('video_image')
-                    # Hide the text label
-                    self.video_label.config(text="")
-                    # Get canvas size
-                    canvas_width = self.video_canvas.winfo_width()
-                    canvas_height = self.video_canvas.winfo_height()
-                    
-                    if canvas_width > 1 and canvas_height > 1:
-                        # Scale photo to fit canvas
-                        photo_width = photo.width()
-                        photo_height = photo.height()
-                        scale_x = canvas_width / photo_width
-                        scale_y = canvas_height / photo_height
-                        scale = min(scale_x, scale_y)
-                        new_width = int(photo_width * scale)
-                        new_height = int(photo_height * scale)
-                        
-                        # Resize photo
-                        pil_resized = pil_image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                        photo_resized = ImageTk.PhotoImage(pil_resized)
-                        
-                        # Center the image
-                        x = canvas_width // 2
-                        y = canvas_height // 2
-                        self.video_canvas.create_image(x, y, anchor='center', image=photo_resized, tags='video_image')
-                        self.video_canvas.tag_raise('video_image')  # Above background
-                        self.video_canvas.video_image = photo_resized  # Keep reference
+                if self._use_opencl:
+                    # Background blend + resize + color conversion on the OpenCL device
+                    display_rgb = self._finish_display_frame_ocl(frame, display_size, interpolation)
                 else:
-                    # Fallback to label if canvas not available
-                    self.video_label.config(image=photo, text="")
-                    self.video_label.image = photo
+                    # Add background image overlay to frame if available
+                    if self._bg_bgra is not None:
+                        frame = self.add_background_overlay(frame)
+                    display_frame = cv2.resize(frame, display_size, interpolation=interpolation)
+                    display_rgb = cv2.cvtColor(display_frame, cv2.COLOR_BGR2RGB)
+                pil_image = Image.fromarray(display_rgb)
                 
-                time.sleep(0.01)  # ~100 FPS display - ultra smooth, reduced lag
+                # Hand the finished image to the Tk thread
+                self._video_update_pending = True
+                self.parent.after(0, self._show_video_image, pil_image)
                 
             except Exception as e:
                 print(f"Display error: {e}")
                 time.sleep(0.1)
     
+    def _show_video_image(self, pil_image):
+        """Show a display-ready video frame on the canvas (runs on the Tk thread)"""
+        try:
+            photo = ImageTk.PhotoImage(image=pil_image)
+            if self.video_canvas is not None:
+                # Replace old video image, centered on the canvas
+                self.video_canvas.delete('video_image')
+                self.video_label.config(text="")
+                canvas_width, canvas_height = self._video_canvas_size
+                self.video_canvas.create_image(canvas_width // 2, canvas_height // 2, anchor='center',
+                                               image=photo, tags='video_image')
+                self.video_canvas.tag_raise('video_image')  # Above background
+                self.video_canvas.video_image = photo  # Keep reference
+            else:
+                # Fallback to label if canvas not available
+                self.video_label.config(image=photo, text="")
+                self.video_label.image = photo
+        except Exception as e:
+            print(f"Display error: {e}")
+        finally:
+            self._video_update_pending = False
+    
+    @staticmethod
+    def _build_label_sprites(labels, thickness=2):
+        """Rasterize fixed overlay strings once into boolean text masks
+        
+        Returns text -> (mask, dx, dy): mask's top-left goes at (x + dx, y + dy) for a
+        cv2.putText origin (x, y), so blitting matches putText pixel for pixel.
+        """
+        sprites = {}
+        for text, font_scale in labels.items():
+            (text_w, text_h), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)
+            pad = thickness + 2
+            canvas = np.zeros((text_h + baseline + 2 * pad, text_w + 2 * pad), dtype=np.uint8)
+            cv2.putText(canvas, text, (pad, pad + text_h), cv2.FONT_HERSHEY_SIMPLEX, font_scale, 255, thickness)
+            sprites[text] = (canvas > 0, -pad, -pad - text_h)
+        return sprites
+    
+    def _blit_label(self, frame, text, org, color=(255, 255, 255)):
+        """Draw a pre-rasterized label at putText origin org (clipped to the frame)"""
+        self._blit_sprite(frame, self._label_sprites[text], org, color)
+    
+    @staticmethod
+    def _blit_sprite(frame, sprite, org, color):
+        """Paint a (mask, dx, dy) text sprite from _build_label_sprites at putText origin org"""
+        mask, dx, dy = sprite
+        x, y = org[0] + dx, org[1] + dy
+        h, w = frame.shape[:2]
+        fx1, fy1 = max(0, x), max(0, y)
+        fx2, fy2 = min(w, x + mask.shape[1]), min(h, y + mask.shape[0])
+        if fx1 >= fx2 or fy1 >= fy2:
+            return
+        frame[fy1:fy2, fx1:fx2][mask[fy1 - y:fy2 - y, fx1 - x:fx2 - x]] = color
+    
     def draw_face_detections(self, frame, detections):
         """Draw face detection bounding boxes and recognition info - Shows ALL faces"""
         try:
@@ -1656,24 +1951,22 @@ class ImpexAttendanceDashboard:
                 # Draw bounding box with blue color - thick box
                 cv2.rectangle(frame, (x1, y1), (x2, y2), color, box_thickness)
                 
-                # Semi-transparent blue overlay for visibility
-                overlay = frame.copy()
-                cv2.rectangle(overlay, (x1-2, y1-2), (x2+2, y2+2), color, -1)
-                cv2.addWeighted(overlay, 0.2, frame, 0.8, 0, frame)
+                # Semi-transparent blue overlay for visibility (blend only the box region)
+                h, w = frame.shape[:2]
+                roi = frame[max(0, y1-2):min(h, y2+3), max(0, x1-2):min(w, x2+3)]
+                if roi.size:
+                    cv2.addWeighted(np.full_like(roi, color), 0.2, roi, 0.8, 0, dst=roi)
                 
                 # Text ABOVE face - Always show these labels matching image
                 text_y = max(50, y1)
                 text_color = (255, 255, 255)  # White text for visibility
                 
                 # Draw labels above face (matching image)
-                cv2.putText(frame, 'FACIAL RECOGNITION', (x1, text_y - 40), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.85, text_color, 2)
-                cv2.putText(frame, 'HUMAN MOTION DETECTED', (x1, text_y - 18), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.75, text_color, 2)
+                self._blit_label(frame, 'FACIAL RECOGNITION', (x1, text_y - 40), text_color)
+                self._blit_label(frame, 'HUMAN MOTION DETECTED', (x1, text_y - 18), text_color)
                 
                 # Text BELOW face
-                cv2.putText(frame, 'MOTION DATA', (x1, y2 + 25), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, text_color, 2)
+                self._blit_label(frame, 'MOTION DATA', (x1, y2 + 25), text_color)
                 
                 # Show recognition status
                 if person_type == 'staff' and person_id and rec_confidence >= 0.55:
@@ -1685,8 +1978,7 @@ class ImpexAttendanceDashboard:
                         # Show ID above face
                         cv2.putText(frame, f'ID: {employee_id}', (x1, text_y - 2), 
                                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                        cv2.putText(frame, f'STEP 2', (x1, y2 + 45), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, text_color, 2)
+                        self._blit_label(frame, 'STEP 2', (x1, y2 + 45), text_color)
                 else:
                     # Still detecting/unknown - show detection status
                     cv2.putText(frame, f'Detecting... ({det_confidence:.2f})', (x1, text_y - 2), 
@@ -1702,19 +1994,7 @@ class ImpexAttendanceDashboard:
     def load_background_image(self):
         """Load the Vector.png background/logo image"""
         try:
-            # Try multiple possible paths
-            possible_paths = [
-                'assets/icons/Vector.png',
-                './assets/icons/Vector.png',
-                os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'assets', 'icons', 'Vector.png'),
-                os.path.join(os.getcwd(), 'assets', 'icons', 'Vector.png')
-            ]
-            
-            image_path = None
-            for path in possible_paths:
-                if os.path.exists(path):
-                    image_path = path
-                    break
+            image_path = os.path.join(self._asset_dir, 'Vector.png') if self._asset_dir else None
             
             if image_path and os.path.exists(image_path):
                 self.background_image = Image.open(image_path)
@@ -1722,15 +2002,19 @@ class ImpexAttendanceDashboard:
                 if self.background_image.mode != 'RGBA':
                     self.background_image = self.background_image.convert('RGBA')
                 self.background_photo = ImageTk.PhotoImage(self.background_image)
+                # BGR(A) copy for the OpenCV frame overlays - converted once, never per frame
+                self._bg_bgra = cv2.cvtColor(np.array(self.background_image), cv2.COLOR_RGBA2BGRA)
                 print(f"✅ Loaded background image from: {image_path}")
             else:
-                print(f"⚠️ Background image not found. Searched: {possible_paths}")
+                print(f"⚠️ Background image not found. Searched: {self._asset_search_paths}")
                 self.background_image = None
                 self.background_photo = None
+                self._bg_bgra = None
         except Exception as e:
             print(f"⚠️ Error loading background image: {e}")
             self.background_image = None
             self.background_photo = None
+            self._bg_bgra = None
     
     def load_employee_icons(self):
         """Load employee card icons from assets/icons folder"""
@@ -1742,19 +2026,7 @@ class ImpexAttendanceDashboard:
                 'profile': 'Vector-2.png'
             }
             
-            # Try multiple possible paths
-            base_paths = [
-                'assets/icons',
-                './assets/icons',
-                os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'assets', 'icons'),
-                os.path.join(os.getcwd(), 'assets', 'icons')
-            ]
-            
-            base_path = None
-            for path in base_paths:
-                if os.path.exists(path):
-                    base_path = path
-                    break
+            base_path = self._asset_dir
             
             if base_path:
                 for icon_key, icon_file in icon_files.items():
@@ -1765,6 +2037,9 @@ class ImpexAttendanceDashboard:
                             # Convert to RGBA for transparency support
                             if icon_img.mode != 'RGBA':
                                 icon_img = icon_img.convert('RGBA')
+                            if icon_key == 'profile':
+                                # Small copy for the check-in overlay on captured photos
+                                self._overlay_icon_small = icon_img.resize((25, 25), Image.Resampling.LANCZOS)
                             # Resize to standard size for employee cards (70x70)
                             icon_img = icon_img.resize((70, 70), Image.Resampling.LANCZOS)
                             self.employee_icons[icon_key] = ImageTk.PhotoImage(icon_img)
@@ -1774,14 +2049,14 @@ class ImpexAttendanceDashboard:
                     else:
                         print(f"⚠️ Icon file not found: {icon_path}")
             else:
-                print(f"⚠️ Icons directory not found. Searched: {base_paths}")
+                print(f"⚠️ Icons directory not found. Searched: {self._asset_search_paths}")
         except Exception as e:
             print(f"⚠️ Error loading employee icons: {e}")
     
     def update_canvas_background(self):
         """Update canvas background with Vector.png image"""
         try:
-            if hasattr(self, 'video_canvas') and self.background_photo:
+            if self.video_canvas is not None and self.background_photo:
                 # Get canvas size
                 self.video_canvas.update_idletasks()
                 canvas_width = self.video_canvas.winfo_width()
@@ -1802,131 +2077,205 @@ class ImpexAttendanceDashboard:
     def add_background_overlay(self, frame):
         """Add background image overlay to video frame"""
         try:
-            if self.background_image is None:
+            if self._bg_bgra is None:
                 return frame
             
             h, w = frame.shape[:2]
             
-            # Convert frame to PIL Image
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            pil_frame = Image.fromarray(frame_rgb)
-            
-            # Resize background image to frame size
-            bg_resized = self.background_image.resize((w, h), Image.Resampling.LANCZOS)
+            # Background stays in BGR end to end; resized once per resolution
+            bg_bgr = self._bg_bgr_cache.get((w, h))
+            if bg_bgr is None:
+                bg_bgr = self._resize_overlay(self._bg_bgra[:, :, :3], (w, h))
+                self._bg_bgr_cache[(w, h)] = bg_bgr
             
-            # Create a semi-transparent overlay (adjust alpha as needed)
-            # Blend background with frame - adjust alpha for desired transparency
-            alpha = 0.1  # 10% opacity - very subtle background
-            overlay = Image.blend(pil_frame, bg_resized.convert('RGB'), alpha)
+            # Blend background with frame in place - adjust alpha for desired transparency
+            alpha = self._BG_OVERLAY_ALPHA
+            cv2.addWeighted(frame, 1 - alpha, bg_bgr, alpha, 0, dst=frame)
             
-            # Convert back to OpenCV format
-            overlay_np = np.array(overlay)
-            frame_bgr = cv2.cvtColor(overlay_np, cv2.COLOR_RGB2BGR)
-            
-            return frame_bgr
+            return frame
         except Exception as e:
             print(f"Error adding background overlay: {e}")
             return frame
     
+    @staticmethod
+    def _resize_overlay(image, size):
+        """Resize an overlay image - INTER_AREA when shrinking, INTER_LINEAR when enlarging"""
+        h, w = image.shape[:2]
+        shrinking = size[0] * size[1] < w * h
+        return cv2.resize(image, size, interpolation=cv2.INTER_AREA if shrinking else cv2.INTER_LINEAR)
+    
+    def _finish_display_frame_ocl(self, frame, display_size, interpolation):
+        """Background blend, display resize and BGR->RGB through cv2.UMat - one upload, one download"""
+        h, w = frame.shape[:2]
+        uframe = cv2.UMat(frame)
+        if self._bg_bgra is not None:
+            bg = self._bg_umat_cache.get((w, h))
+            if bg is None:
+                bg = self._bg_umat_cache[(w, h)] = cv2.UMat(self._resize_overlay(self._bg_bgra[:, :, :3], (w, h)))
+            alpha = self._BG_OVERLAY_ALPHA
+            uframe = cv2.addWeighted(uframe, 1 - alpha, bg, alpha, 0)
+        uframe = cv2.resize(uframe, display_size, interpolation=interpolation)
+        return cv2.cvtColor(uframe, cv2.COLOR_BGR2RGB).get()
+    
+    def _build_logo_overlay(self, logo_size=(150, 150)):
+        """Resize the Vector.png logo once: (BGR logo, logo * alpha as uint16, 255 - alpha, (x, y) offset)
+        
+        The weights are None if the logo is opaque. Alpha stays on the 0-255 integer scale so the
+        per-frame blend runs in uint16 with no float temporaries, and the logo is trimmed to the
+        bounding box of its visible pixels so fully transparent margins are never blended.
+        """
+        logo_bgra = self._resize_overlay(self._bg_bgra, logo_size)
+        alpha = logo_bgra[:, :, 3]
+        if alpha.min() == 255:
+            return np.ascontiguousarray(logo_bgra[:, :, :3]), None, None, (0, 0)
+        x, y, w, h = cv2.boundingRect(alpha)
+        if w == 0 or h == 0:
+            return None  # Fully transparent - nothing to draw
+        logo_bgra = logo_bgra[y:y+h, x:x+w]
+        logo_bgr = np.ascontiguousarray(logo_bgra[:, :, :3])
+        alpha = logo_bgra[:, :, 3]
+        alpha3 = cv2.merge([alpha, alpha, alpha])
+        logo_premul = cv2.multiply(logo_bgr, alpha3, dtype=cv2.CV_16U)
+        return logo_bgr, logo_premul, 255 - alpha3, (x, y)
+    
+    @staticmethod
+    def _build_hud(w, h, with_motion_label):
+        """Rasterize the constant camera HUD for a w x h frame
+        
+        Returns a list of (y1, y2, x1, x2, BGR tile, boolean mask tile) covering only the
+        regions that have HUD pixels; pasting them reproduces the putText/rectangle calls.
+        """
+        hud = np.zeros((h, w, 3), dtype=np.uint8)
+        mask = np.zeros((h, w), dtype=np.uint8)
+        
+        def text(label, org, scale, color, thickness):
+            cv2.putText(hud, label, org, cv2.FONT_HERSHEY_SIMPLEX, scale, color, thickness)
+            cv2.putText(mask, label, org, cv2.FONT_HERSHEY_SIMPLEX, scale, 255, thickness)
+        
+        # Add "impex" text (top left, next to logo)
+        text('impex', (170, 50), 1.2, (0, 0, 255), 3)
+        text('FOV', (170, 80), 0.6, (255, 255, 255), 1)
+        
+        # Add "LIVE" indicator (top right) - red background
+        cv2.rectangle(hud, (w-110, 10), (w-10, 45), (0, 0, 255), -1)
+        cv2.rectangle(mask, (w-110, 10), (w-10, 45), 255, -1)
+        text('LIVE', (w-95, 35), 0.8, (255, 255, 255), 2)
+        text('CAMERA', (w-110, 58), 0.5, (255, 255, 255), 1)
+        text('DET', (w-55, 58), 0.5, (255, 255, 255), 1)
+        
+        # Camera settings (bottom left)
+        text('0 1/100 F 2.8', (10, h-30), 0.5, (255, 255, 255), 1)
+        
+        # Motion data (bottom center) - static label when nothing is detected
+        if with_motion_label:
+            text('MOTION DATA', (w//2-80, h-30), 0.5, (255, 255, 255), 1)
+        
+        # Resolution (bottom right)
+        text('HD 2K', (w-80, h-30), 0.6, (255, 255, 255), 1)
+        
+        # Keep only the tiles (row bands split into column runs) that contain HUD pixels
+        def runs(nonzero):
+            idx = np.flatnonzero(nonzero)
+            if idx.size == 0:
+                return []
+            breaks = np.flatnonzero(np.diff(idx) > 1)
+            starts = np.concatenate(([idx[0]], idx[breaks + 1]))
+            ends = np.concatenate((idx[breaks], [idx[-1]])) + 1
+            return list(zip(starts, ends))
+        
+        tiles = []
+        for y1, y2 in runs(mask.any(axis=1)):
+            for x1, x2 in runs(mask[y1:y2].any(axis=0)):
+                tiles.append((y1, y2, x1, x2, hud[y1:y2, x1:x2].copy(), mask[y1:y2, x1:x2, None] > 0))
+        return tiles
+    
     def add_camera_overlays(self, frame):
         """Add camera overlays matching the image design"""
         h, w = frame.shape[:2]
         
         # Add Vector.png logo overlay in top left (if available)
-        if self.background_image:
+        if self._bg_bgra is not None:
             try:
-                # Resize logo to appropriate size for overlay
-                logo_size = (150, 150)  # Adjust size as needed
-                logo_resized = self.background_image.resize(logo_size, Image.Resampling.LANCZOS)
-                logo_np = np.array(logo_resized)
-                
-                # Convert RGBA to BGR for OpenCV
-                if logo_np.shape[2] == 4:  # Has alpha channel
-                    # Extract alpha channel
-                    alpha = logo_np[:, :, 3:4] / 255.0
-                    logo_rgb = logo_np[:, :, :3]
-                    logo_bgr = cv2.cvtColor(logo_rgb, cv2.COLOR_RGB2BGR)
+                if self._logo_overlay is None:
+                    self._logo_overlay = self._build_logo_overlay() or False
+                if self._logo_overlay:
+                    logo_bgr, logo_premul, inv_alpha, (off_x, off_y) = self._logo_overlay
                     
                     # Get position in frame (top left with padding)
-                    y1, y2 = 10, 10 + logo_size[1]
-                    x1, x2 = 10, 10 + logo_size[0]
+                    y1, y2 = 10 + off_y, 10 + off_y + logo_bgr.shape[0]
+                    x1, x2 = 10 + off_x, 10 + off_x + logo_bgr.shape[1]
                     
                     # Ensure it fits
                     if y2 <= h and x2 <= w:
-                        # Blend logo with frame using alpha
-                        roi = frame[y1:y2, x1:x2].astype(np.float32)
-                        logo_float = logo_bgr.astype(np.float32)
-                        alpha_3d = alpha
-                        
-                        blended = roi * (1 - alpha_3d) + logo_float * alpha_3d
-                        frame[y1:y2, x1:x2] = blended.astype(np.uint8)
-                else:
-                    # No alpha channel, just overlay
-                    logo_bgr = cv2.cvtColor(logo_np, cv2.COLOR_RGB2BGR)
-                    y1, y2 = 10, 10 + logo_size[1]
-                    x1, x2 = 10, 10 + logo_size[0]
-                    if y2 <= h and x2 <= w:
-                        frame[y1:y2, x1:x2] = logo_bgr
+                        if logo_premul is not None:
+                            # roi * (255 - a) + logo * a, then / 255 - all in uint16
+                            blended = cv2.multiply(frame[y1:y2, x1:x2], inv_alpha, dtype=cv2.CV_16U)
+                            cv2.add(blended, logo_premul, dst=blended)
+                            frame[y1:y2, x1:x2] = cv2.convertScaleAbs(blended, alpha=1.0 / 255.0)
+                        else:
+                            # No alpha channel, just overlay
+                            frame[y1:y2, x1:x2] = logo_bgr
             except Exception as e:
                 print(f"Error adding logo overlay: {e}")
         
-        # Add "impex" text (top left, next to logo)
-        cv2.putText(frame, 'impex', (170, 50), cv2.FONT_HERSHEY_SIMPLEX, 
-                   1.2, (0, 0, 255), 3)
-        cv2.putText(frame, 'FOV', (170, 80), cv2.FONT_HERSHEY_SIMPLEX, 
-                   0.6, (255, 255, 255), 1)
-        
-        # Add "LIVE" indicator (top right) - red background
-        cv2.rectangle(frame, (w-110, 10), (w-10, 45), (0, 0, 255), -1)
-        cv2.putText(frame, 'LIVE', (w-95, 35), cv2.FONT_HERSHEY_SIMPLEX, 
-                   0.8, (255, 255, 255), 2)
-        cv2.putText(frame, 'CAMERA', (w-110, 58), cv2.FONT_HERSHEY_SIMPLEX, 
-                   0.5, (255, 255, 255), 1)
-        cv2.putText(frame, 'DET', (w-55, 58), cv2.FONT_HERSHEY_SIMPLEX, 
-                   0.5, (255, 255, 255), 1)
-        
-        # Camera settings (bottom left)
-        cv2.putText(frame, '0 1/100 F 2.8', (10, h-30), cv2.FONT_HERSHEY_SIMPLEX, 
-                   0.5, (255, 255, 255), 1)
-        
-        # Motion data (bottom center)
-        if len(self.current_detections) > 0:
-            cv2.putText(frame, f'MOTION DATA - {len(self.current_detections)} DETECTED', 
-                       (w//2-150, h-30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
-        else:
-            cv2.putText(frame, 'MOTION DATA', (w//2-80, h-30), cv2.FONT_HERSHEY_SIMPLEX, 
-                       0.5, (255, 255, 255), 1)
-        
-        # Resolution (bottom right)
-        cv2.putText(frame, 'HD 2K', (w-80, h-30), cv2.FONT_HERSHEY_SIMPLEX, 
-                   0.6, (255, 255, 255), 1)
+        # Static HUD (branding, LIVE badge, camera info), rasterized once per frame size
+        has_detections = len(self.current_detections) > 0
+        hud_key = (w, h, has_detections)
+        hud = self._hud_cache.get(hud_key)
+        if hud is None:
+            hud = self._hud_cache[hud_key] = self._build_hud(w, h, not has_detections)
+        for y1, y2, x1, x2, sprite, mask in hud:
+            np.copyto(frame[y1:y2, x1:x2], sprite, where=mask)
+        
+        # Motion data (bottom center) - rasterized once per detection count
+        if has_detections:
+            count = len(self.current_detections)
+            sprite = self._motion_sprites.get(count)
+            if sprite is None:
+                if len(self._motion_sprites) >= 64:
+                    self._motion_sprites.clear()
+                text = f'MOTION DATA - {count} DETECTED'
+                sprite = self._motion_sprites[count] = self._build_label_sprites({text: 0.6})[text]
+            self._blit_sprite(frame, sprite, (w//2-150, h-30), (0, 255, 255))
         
         return frame
     
+    def _get_staff_infos(self, staff_ids):
+        """Return the staff info cache, bulk-loading any of staff_ids not cached yet"""
+        missing = [staff_id for staff_id in staff_ids if staff_id not in self._staff_info_cache]
+        if missing:
+            self._staff_info_cache.update(self.db_manager.get_staff_info_bulk(missing))
+        return self._staff_info_cache
+    
+    def invalidate_staff_cache(self):
+        """Forget cached staff roster/info (call after staff are added, edited or removed)"""
+        self._staff_roster = None
+        self._staff_info_cache = {}
+    
     def load_employee_ids(self):
         """Load employee IDs from database"""
         try:
             all_staff = self.db_manager.get_all_staff()
-            for staff in all_staff:
-                staff_id = staff['staff_id']
-                employee_id = staff.get('employee_id')
-                
-                # Use employee_id from database if available, otherwise extract from staff_id
-                if employee_id:
-                    self.employee_id_map[staff_id] = employee_id
-                else:
-                    # Extract ID from staff_id format (e.g., "STAFF_4730" -> "4730")
-                    if staff_id.startswith('STAFF_'):
-                        self.employee_id_map[staff_id] = staff_id.replace('STAFF_', '')
-                    else:
-                        self.employee_id_map[staff_id] = staff_id
+            # Same query also fills the active-staff roster and info cache used by the cards
+            self._staff_roster = [staff['staff_id'] for staff in all_staff]
+            self._staff_info_cache.update({
+                staff['staff_id']: {
+                    'staff_id': staff['staff_id'],
+                    'name': staff.get('name'),
+                    'department': staff.get('department')
+                }
+                for staff in all_staff
+            })
+            # Use employee_id from database if available, otherwise extract from staff_id
+            # (e.g., "STAFF_4730" -> "4730"); slicing avoids per-row method dispatch
+            self.employee_id_map.update({
+                staff_id: (employee_id or (staff_id[6:] if staff_id[:6] == 'STAFF_' else staff_id))
+                for staff_id, employee_id in ((staff['staff_id'], staff.get('employee_id')) for staff in all_staff)
+            })
             
             print(f"✅ Loaded {len(self.employee_id_map)} employee IDs from database")
         except Exception as e:
             print(f"Load employee IDs error: {e}")
-            # Initialize empty if error
-            if not hasattr(self, 'employee_id_map'):
-                self.employee_id_map = {}
     
     def load_fake_employees(self):
         """Load/create fake employees for testing"""
@@ -1953,35 +2302,21 @@ class ImpexAttendanceDashboard:
             {'employee_id': '2492', 'name': 'George Martinez', 'department': 'IT'},
         ]
         
-        # Store employee_id mapping - don't overwrite existing
-        if not hasattr(self, 'employee_id_map') or self.employee_id_map is None:
-            self.employee_id_map = {}
+        # Store employee_id mapping - only add if not already in map - one batched update instead of per-row assignment
+        rows = [(f"STAFF_{emp['employee_id']}", emp['employee_id']) for emp in fake_employees]
+        self.employee_id_map.update((staff_id, employee_id) for staff_id, employee_id in rows
+                                    if staff_id not in self.employee_id_map)
         
-        for emp in fake_employees:
-            staff_id = f"STAFF_{emp['employee_id']}"
-            # Only add if not already in map
-            if staff_id not in self.employee_id_map:
-                self.employee_id_map[staff_id] = emp['employee_id']
-            
-            # Note: This will create staff without photos initially
-            # Photos will be captured during auto-registration
-            print(f"Created fake employee: {emp['name']} (ID: {emp['employee_id']})")
+        # Note: This will create staff without photos initially
+        # Photos will be captured during auto-registration
+        print(f"Created {len(rows)} fake employees: " + ", ".join(
+            f"{emp['name']} (ID: {emp['employee_id']})" for emp in fake_employees))
     
     def get_employee_id(self, staff_id):
-        """Get employee ID number for staff_id"""
-        # Ensure employee_id_map exists
-        if not hasattr(self, 'employee_id_map') or self.employee_id_map is None:
-            self.employee_id_map = {}
-        
-        # Try to get from map first
-        if staff_id in self.employee_id_map:
-            return self.employee_id_map[staff_id]
-        
-        # Fallback: extract from staff_id format
-        if staff_id.startswith('STAFF_'):
-            return staff_id.replace('STAFF_', '')
-        
-        return staff_id
+        """Get employee ID number for staff_id (map is bulk-loaded by load_employee_ids, no DB access)"""
+        # Fallback: extract from staff_id format (e.g., "STAFF_4730" -> "4730")
+        return self.employee_id_map.get(staff_id) or (
+            staff_id[self._STAFF_PREFIX_LEN:] if staff_id[:self._STAFF_PREFIX_LEN] == 'STAFF_' else staff_id)
     
     def get_today_attendance(self):
         """Get today's attendance summary"""
@@ -1993,18 +2328,18 @@ class ImpexAttendanceDashboard:
             today = date.today()
             attendance_records = self.db_manager.get_today_attendance(today)
             
-            for record in attendance_records:
-                staff_id = record['staff_id']
-                # Handle datetime parsing
-                check_in = record.get('check_in_time')
-                check_out = record.get('check_out_time')
-                
-                self.today_attendance[staff_id] = {
-                    'staff_id': staff_id,
-                    'check_in_time': check_in if isinstance(check_in, datetime) else None,
-                    'check_out_time': check_out if isinstance(check_out, datetime) else None,
+            # Handle datetime parsing - keep only real datetimes
+            dt = datetime
+            self.today_attendance.update({
+                record['staff_id']: {
+                    'staff_id': record['staff_id'],
+                    'check_in_time': check_in if isinstance(check_in, dt) else None,
+                    'check_out_time': check_out if isinstance(check_out, dt) else None,
                     'status': record.get('status', 'Present')
                 }
+                for record in attendance_records
+                for check_in, check_out in ((record.get('check_in_time'), record.get('check_out_time')),)
+            })
             
             print(f"✅ Loaded {len(self.today_attendance)} attendance records")
             
@@ -2012,4 +2347,5 @@ class ImpexAttendanceDashboard:
             print(f"Load attendance error: {e}")
             # Initialize empty if error
             self.today_attendance = {}
+        self._recount_attendance()
 
@@ -39,8 +39,9 @@ def find_working_camera_index():
 
 
 class StaffManagementWindow:
-    def __init__(self, parent):
+    def __init__(self, parent, on_staff_changed=None):
         self.parent = parent
+        self.on_staff_changed = on_staff_changed  # Called after staff are added, edited or deleted
         self.db_manager = DatabaseManager()
 
         self.window = tk.Toplevel(parent)
@@ -100,9 +101,15 @@ class StaffManagementWindow:
                 staff['added_date']
             ))
 
+    def staff_changed(self):
+        """Reload the list and let the owner drop anything cached about staff"""
+        self.load_staff_list()
+        if self.on_staff_changed:
+            self.on_staff_changed()
+
     def add_staff(self):
         """Add new staff member"""
-        AddEditStaffDialog(self.window, self.db_manager, callback=self.load_staff_list)
+        AddEditStaffDialog(self.window, self.db_manager, callback=self.staff_changed)
 
     def edit_staff(self):
         """Edit selected staff member"""
@@ -113,7 +120,7 @@ class StaffManagementWindow:
 
         item = self.staff_tree.item(selection[0])
         staff_id = item['values'][0]
-        AddEditStaffDialog(self.window, self.db_manager, staff_id=staff_id, callback=self.load_staff_list)
+        AddEditStaffDialog(self.window, self.db_manager, staff_id=staff_id, callback=self.staff_changed)
 
     def delete_staff(self):
         """Delete the selected staff member from the database and refresh the list."""
@@ -139,6 +146,8 @@ class StaffManagementWindow:
 
             # Remove from UI
             self.staff_tree.delete(selection[0])
+            if self.on_staff_changed:
+                self.on_staff_changed()
             messagebox.showinfo("Deleted", f"Staff '{staff_id}' has been deleted.")
         except Exception as e:
             messagebox.showerror("Error", f"Error deleting staff: {e}")
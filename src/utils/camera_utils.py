@@ -1,11 +1,30 @@
 # src/utils/camera_utils.py
 import cv2
+import numpy as np
 import threading
 import time
-from queue import Queue
+from queue import Queue, Empty, Full
 import os
 
 
+_gstreamer_available = None
+
+
+def gstreamer_available():
+    """Whether this OpenCV build was compiled with the GStreamer backend (checked once)"""
+    global _gstreamer_available
+    if _gstreamer_available is None:
+        _gstreamer_available = False
+        try:
+            for line in cv2.getBuildInformation().splitlines():
+                if line.strip().startswith('GStreamer:'):
+                    _gstreamer_available = 'YES' in line
+                    break
+        except Exception:
+            pass
+    return _gstreamer_available
+
+
 def check_camera_permissions():
     """Check if camera access is available"""
     try:
@@ -100,7 +119,7 @@ class CameraManager:
         # Build RTSP options string
         options = (
             f'rtsp_transport;{rtsp_transport}|'
-            'fflags;nobuffer|'
+            'fflags;nobuffer+flush_packets|'
             'flags;low_delay|'
             'framedrop;1|'  # Drop frames to reduce latency
             'strict;experimental|'
@@ -114,6 +133,45 @@ class CameraManager:
         
         return options, rtsp_transport
 
+    @staticmethod
+    def _get_gstreamer_pipeline(rtsp_url, camera_settings):
+        """Low-latency RTSP pipeline: appsink keeps one buffer and drops the rest"""
+        latency = int(camera_settings.get('gstreamer_latency', 0))
+        protocols = 'udp' if camera_settings.get('transport', 'TCP').upper() == 'UDP' else 'tcp'
+        decoder = camera_settings.get('gstreamer_decoder', 'auto')
+
+        if decoder == 'auto':
+            # decodebin picks the highest-ranked decoder installed (nvv4l2decoder, vaapi, avdec)
+            # and handles H.264 as well as H.265 streams
+            decode = 'decodebin'
+        else:
+            decode = f'rtph264depay ! h264parse ! {decoder}'
+
+        return (
+            f'rtspsrc location="{rtsp_url}" latency={latency} protocols={protocols} ! '
+            f'{decode} ! videoconvert ! video/x-raw,format=BGR ! '
+            'appsink max-buffers=1 drop=true sync=false'
+        )
+
+    def _open_gstreamer(self, rtsp_url):
+        """Open an RTSP source through GStreamer; returns None if unavailable or it fails"""
+        if not gstreamer_available():
+            return None
+        camera_settings = self.config.get_camera_settings()
+        if not camera_settings.get('use_gstreamer', True):
+            return None
+        try:
+            pipeline = self._get_gstreamer_pipeline(rtsp_url, camera_settings)
+            cap = cv2.VideoCapture(pipeline, cv2.CAP_GSTREAMER)
+            if cap.isOpened():
+                print("✅ RTSP opened via GStreamer appsink (max-buffers=1, drop=true)")
+                return cap
+            cap.release()
+        except Exception as e:
+            print(f"⚠️ GStreamer pipeline failed: {e}")
+        print("⚠️ GStreamer unavailable for this stream - falling back to FFMPEG")
+        return None
+
     def start_camera(self):
         """Start camera with automatic index detection and backend selection"""
         try:
@@ -162,7 +220,11 @@ class CameraManager:
                 os.environ['OPENCV_FFMPEG_CAPTURE_OPTIONS'] = rtsp_options
                 print(f"🔧 RTSP connection using transport: {rtsp_transport} (from camera_settings.json)")
 
-            self.cap = cv2.VideoCapture(camera_source, backend)
+            self.cap = None
+            if isinstance(camera_source, str) and camera_source.startswith('rtsp://'):
+                self.cap = self._open_gstreamer(camera_source)
+            if self.cap is None:
+                self.cap = cv2.VideoCapture(camera_source, backend)
 
             if not self.cap.isOpened():
                 print(f"❌ Failed to open camera source: {camera_source}")
@@ -268,41 +330,19 @@ class CameraManager:
                         frame_count += 1
                         print("✅ First frame captured - Face detection will start immediately")
                         # Put first frame in queue for immediate processing
-                        try:
-                            if not self.frame_queue.empty():
-                                self.frame_queue.get_nowait()
-                            self.frame_queue.put_nowait(frame)
-                        except:
-                            pass
+                        self._publish_frame(frame)
                     else:
                         time.sleep(0.01)
                     continue
                 else:
-                    # Skip frames in buffer to get latest (reduces latency) - OPTIMIZED
-                    for _ in range(3):  # Skip 3 frames to get freshest frame (reduces lag)
-                        ret, _ = self.cap.read()
-                        if not ret:
-                            break
-
-                    # Get the latest frame
+                    # This thread reads continuously, so the decoder never builds a backlog -
+                    # every decoded frame is published and the 1-slot queue drops the stale one
                     ret, frame = self.cap.read()
 
                 if ret and frame is not None:
                     consecutive_failures = 0
                     frame_count += 1
-
-                    # Clear old frames from queue aggressively
-                    while not self.frame_queue.empty():
-                        try:
-                            self.frame_queue.get_nowait()
-                        except:
-                            break
-
-                    # Only keep the latest frame
-                    try:
-                        self.frame_queue.put_nowait(frame)
-                    except:
-                        pass  # Queue full, skip this frame
+                    self._publish_frame(frame)
 
                     if frame_count % 100 == 0:
                         print(f"📹 Ultra-low latency capture: {frame_count} frames processed")
@@ -398,14 +438,32 @@ class CameraManager:
 
         return self._attempt_connection(camera_source)
 
-    def get_frame(self):
-        """Get latest frame"""
+    def _publish_frame(self, frame):
+        """Replace whatever is in the single-slot queue with the newest frame"""
+        # Consumers (detector, JPEG encoders) expect packed rows; cap.read() frames already
+        # are, so this is a no-op unless a backend hands out padded/strided buffers
+        frame = np.ascontiguousarray(frame)
         try:
-            if not self.frame_queue.empty():
-                return self.frame_queue.get_nowait()
-        except:
+            self.frame_queue.get_nowait()
+        except Empty:
             pass
-        return None
+        try:
+            self.frame_queue.put_nowait(frame)
+        except Full:
+            pass  # A concurrent put won the slot - it is just as fresh
+
+    def get_frame(self, timeout=None):
+        """Get latest frame
+
+        Args:
+            timeout: seconds to wait for a new frame; None returns immediately (UI polling)
+        """
+        try:
+            if timeout is None:
+                return self.frame_queue.get_nowait()
+            return self.frame_queue.get(timeout=timeout)
+        except Empty:
+            return None
 
     def stop_camera(self):
         """Stop camera"""
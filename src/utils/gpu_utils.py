@@ -37,3 +37,22 @@ def detect_gpu_capability():
         pass
 
     return False
+
+
+def detect_opencv_cuda():
+    """Detect whether OpenCV itself was built with CUDA and sees a device.
+
+    ``detect_gpu_capability`` only covers the inference runtimes; the stock
+    ``opencv-python`` wheels have no ``cv2.cuda`` kernels, so pixel work can
+    only move to the GPU when this returns ``True``.
+
+    Returns:
+        bool: ``True`` if ``cv2.cuda`` reports at least one CUDA device.
+    """
+    try:
+        import cv2
+
+        return cv2.cuda.getCudaEnabledDeviceCount() > 0
+    except Exception:
+        # cv2 missing, or built without the cuda module
+        return False
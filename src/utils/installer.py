@@ -1,28 +1,37 @@
 import subprocess
 import sys
 import os
+import json
+from functools import lru_cache
+from pathlib import Path
 
+@lru_cache(maxsize=1)
 def check_installed_versions():
-    """Check installed package versions using pip (faster than importing)"""
+    """Check installed package versions from package metadata (no pip subprocess)"""
     try:
-        result = subprocess.run(
-            [sys.executable, '-m', 'pip', 'list', '--format=json'],
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
-        if result.returncode != 0:
-            return None
-        
-        import json
-        packages = {pkg['name'].lower(): pkg['version'] for pkg in json.loads(result.stdout)}
+        from importlib.metadata import distributions
+        packages = {}
+        for dist in distributions():
+            name = dist.metadata['Name']
+            if name:
+                packages[name.lower()] = dist.version
         return packages
     except:
         return None
 
-def check_package_compatibility():
-    """Quick check if NumPy and OpenCV are compatible"""
-    # First check installed versions via pip (safer)
+def check_package_compatibility(force=False):
+    """Quick check if NumPy and OpenCV are compatible (memoized per process)
+    
+    Pass force=True after installing packages to discard the cached result.
+    """
+    if force:
+        check_installed_versions.cache_clear()
+        _do_check.cache_clear()
+    return _do_check()
+
+@lru_cache(maxsize=1)
+def _do_check():
+    # First check installed versions via package metadata (safer)
     installed = check_installed_versions()
     if installed:
         numpy_version = installed.get('numpy', '')
@@ -32,23 +41,10 @@ def check_package_compatibility():
         if numpy_version and numpy_version.startswith('2.'):
             return False, f"NumPy {numpy_version} is too new (need <2.0)"
         
-        # If both are installed, try quick import test
+        # Both installed with a 1.x NumPy - the metadata is enough, don't pay for importing cv2 here
+        # (it is imported once when the app itself starts)
         if numpy_version and opencv_version:
-            try:
-                import numpy as np
-                import cv2
-                # Quick compatibility test
-                arr = np.array([1, 2, 3])
-                _ = cv2.__version__
-                return True, "Packages are compatible"
-            except ImportError as e:
-                return False, f"Import error: {e}"
-            except AttributeError as e:
-                if "_ARRAY_API" in str(e):
-                    return False, "NumPy/OpenCV compatibility issue - _ARRAY_API not found"
-                return False, f"Attribute error: {e}"
-            except Exception as e:
-                return False, f"Compatibility check failed: {e}"
+            return True, "Packages are compatible"
     
     # Fallback: try importing directly (may fail with compatibility error)
     try:
@@ -73,6 +69,59 @@ def check_package_compatibility():
     except Exception as e:
         return False, f"Compatibility check failed: {e}"
 
+ENV_STAMP_PATH = Path.home() / '.impex_env_ok'
+
+OPENCV_DISTRIBUTIONS = ('opencv-python', 'opencv-python-headless',
+                        'opencv-contrib-python', 'opencv-contrib-python-headless')
+
+def _current_versions():
+    """Installed NumPy and OpenCV versions, read straight from package metadata"""
+    from importlib.metadata import version, PackageNotFoundError
+    try:
+        numpy_version = version('numpy')
+    except PackageNotFoundError:
+        numpy_version = ''
+    cv2_version = ''
+    for name in OPENCV_DISTRIBUTIONS:
+        try:
+            cv2_version = version(name)
+            break
+        except PackageNotFoundError:
+            continue
+    return numpy_version, cv2_version
+
+def _env_stamp_valid(requirements_path):
+    """True if the last-known-good stamp is newer than requirements.txt and matches this
+    Python and the installed NumPy/OpenCV (e.g. a later `pip install -U numpy` voids it)"""
+    try:
+        if not ENV_STAMP_PATH.exists():
+            return False
+        if ENV_STAMP_PATH.stat().st_mtime <= os.path.getmtime(requirements_path):
+            return False
+        with open(ENV_STAMP_PATH, 'r') as f:
+            stamp = json.load(f)
+        if stamp.get('python_version') != list(sys.version_info[:2]):
+            return False
+        numpy_version, cv2_version = _current_versions()
+        return (bool(numpy_version) and bool(cv2_version)
+                and stamp.get('numpy_version') == numpy_version
+                and stamp.get('cv2_version') == cv2_version)
+    except:
+        return False
+
+def _write_env_stamp():
+    """Record a successful check so later launches can skip it"""
+    try:
+        numpy_version, cv2_version = _current_versions()
+        with open(ENV_STAMP_PATH, 'w') as f:
+            json.dump({
+                'python_version': list(sys.version_info[:2]),
+                'numpy_version': numpy_version,
+                'cv2_version': cv2_version
+            }, f)
+    except:
+        pass
+
 def check_and_install_requirements():
     """
     Checks if required packages are installed and installs them if missing.
@@ -84,6 +133,10 @@ def check_and_install_requirements():
         print(f"⚠️ requirements.txt not found at {requirements_path}")
         return True  # Don't fail if requirements.txt is missing
     
+    # Packages rarely change on deployed machines - skip the check if it already passed
+    if _env_stamp_valid(requirements_path):
+        return True
+    
     try:
         # Quick compatibility check first (with timeout)
         try:
@@ -96,6 +149,7 @@ def check_and_install_requirements():
         
         if is_compatible:
             print("✅ Package compatibility check passed - no installation needed")
+            _write_env_stamp()
             return True
         
         print(f"⚠️ Compatibility issue detected: {message}")
@@ -175,7 +229,7 @@ def check_and_install_requirements():
         
         # Verify installation
         print("🔍 Verifying installation...")
-        is_compatible, message = check_package_compatibility()
+        is_compatible, message = check_package_compatibility(force=True)
         
         if is_compatible:
             try:
@@ -184,6 +238,7 @@ def check_and_install_requirements():
                 print(f"✅ NumPy {np.__version__} and OpenCV {cv2.__version__} are compatible")
             except:
                 pass
+            _write_env_stamp()
             return True
         else:
             print(f"⚠️ Compatibility issue persists: {message}")
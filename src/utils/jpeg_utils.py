@@ -0,0 +1,84 @@
+"""JPEG encoding for the MJPEG video feeds."""
+
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+# Quality used by the live MJPEG feeds - indistinguishable from 85 on the dashboard
+STREAM_JPEG_QUALITY = 70
+
+# simplejpeg is preferred - its wheels bundle libjpeg-turbo, so it works on
+# Windows without a separate libjpeg-turbo install.
+try:
+    import simplejpeg
+except ImportError:
+    simplejpeg = None
+
+# PyTurboJPEG is optional - libjpeg-turbo's SIMD encoder is noticeably faster
+# than cv2.imencode for full frames. Fall back to OpenCV when it is missing or
+# the shared library cannot be loaded.
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJSAMP_422
+
+    _turbo = TurboJPEG()
+except Exception:
+    _turbo = None
+
+
+# multipart/x-mixed-replace framing for one JPEG (boundary=frame)
+MJPEG_PART_HEAD = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n'
+MJPEG_PART_TAIL = b'\r\n'
+
+
+def mjpeg_part(jpeg_bytes):
+    """Wrap encoded JPEG bytes as one part of an MJPEG multipart stream."""
+    return b''.join((MJPEG_PART_HEAD, jpeg_bytes, MJPEG_PART_TAIL))
+
+
+@lru_cache(maxsize=8)
+def _imencode_params(quality):
+    """cv2.imencode flags for streaming: baseline JPEG with optimized Huffman tables."""
+    # Optimized Huffman coding trims a few percent off every frame on the wire
+    params = [cv2.IMWRITE_JPEG_QUALITY, quality,
+              cv2.IMWRITE_JPEG_OPTIMIZE, 1,
+              cv2.IMWRITE_JPEG_PROGRESSIVE, 0]
+    # Chroma quality flag only exists in newer OpenCV builds
+    chroma = getattr(cv2, 'IMWRITE_JPEG_CHROMA_QUALITY', None)
+    if chroma is not None:
+        params += [chroma, quality]
+    return params
+
+
+def encode_jpeg(frame, quality=STREAM_JPEG_QUALITY):
+    """Encode a BGR frame to JPEG bytes.
+
+    Uses libjpeg-turbo (4:2:2 chroma subsampling) through simplejpeg or
+    PyTurboJPEG when available, otherwise ``cv2.imencode``.
+
+    Returns:
+        bytes | None: The encoded image, or ``None`` if encoding failed.
+    """
+    # simplejpeg and TurboJPEG reject strided views (e.g. crops); packing once here is
+    # cheaper than failing through to cv2, and a no-op for already-contiguous frames
+    frame = np.ascontiguousarray(frame)
+
+    if simplejpeg is not None:
+        try:
+            return simplejpeg.encode_jpeg(frame, quality=quality, colorspace='BGR',
+                                          colorsubsampling='422', fastdct=True)
+        except Exception:
+            # e.g. unsupported channel count - try the next encoder
+            pass
+
+    if _turbo is not None:
+        try:
+            return _turbo.encode(frame, quality=quality, pixel_format=TJPF_BGR, jpeg_subsample=TJSAMP_422)
+        except Exception:
+            # e.g. unsupported channel count - let OpenCV handle it
+            pass
+
+    ret, buffer = cv2.imencode('.jpg', frame, _imencode_params(quality))
+    if not ret:
+        return None
+    return buffer.tobytes()
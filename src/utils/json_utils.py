@@ -0,0 +1,55 @@
+"""Fast JSON responses for the Flask apps."""
+
+from flask.json.provider import DefaultJSONProvider
+
+# orjson is optional - a C serializer several times faster than the stdlib json
+# for the attendance/check-in lists the dashboards poll. Without it Flask's
+# default provider is used unchanged.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+if orjson is not None:
+    class OrjsonProvider(DefaultJSONProvider):
+        """Flask JSON provider backed by orjson, matching the default provider's output.
+
+        Dates are passed through to Flask's ``default`` hook so they keep the
+        HTTP-date format, and int dict keys are allowed like the stdlib allows them.
+        Anything orjson refuses falls back to the stdlib encoder.
+        """
+
+        def dumps(self, obj, **kwargs):
+            # Flask itself only passes separators (compact) or indent (debug)
+            if set(kwargs) - {'separators', 'indent'}:
+                return super().dumps(obj, **kwargs)
+            option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            if kwargs.get('indent'):
+                option |= orjson.OPT_INDENT_2
+            try:
+                return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+            except TypeError:
+                # e.g. ints beyond 64 bits - the stdlib encoder copes
+                return super().dumps(obj, **kwargs)
+
+        def loads(self, s, **kwargs):
+            if kwargs:
+                return super().loads(s, **kwargs)
+            return orjson.loads(s)
+else:
+    OrjsonProvider = None
+
+
+def use_fast_json(app):
+    """Switch ``app`` to the orjson provider when orjson is installed.
+
+    Returns:
+        bool: True if orjson is now serializing the app's JSON responses.
+    """
+    if OrjsonProvider is None:
+        return False
+    app.json = OrjsonProvider(app)
+    return True
@@ -48,7 +48,8 @@ def main():
         print()
         
         # Run Flask app on port 5001 (different from main web app)
-        app.run(host='0.0.0.0', port=5001, debug=False, threaded=True)
+        from start_server import serve_app
+        serve_app(app, '0.0.0.0', 5001, dev='--dev' in sys.argv)
         
     except KeyboardInterrupt:
         print("\n\n⚠️ Admin server stopped by user")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+IMPEX Attendance System - Mode-Locked Server Launcher
+Shared by start_checkin.py (port 5000) and start_checkout.py (port 8000)
+
+Usage: python start_server.py --mode checkin|checkout [--port PORT] [--dev]
+"""
+
+import sys
+import os
+import argparse
+
+# Add current directory to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+# Display labels per locked mode
+MODE_LABELS = {
+    'checkin': 'CHECK-IN',
+    'checkout': 'CHECK-OUT'
+}
+
+# Default ports per locked mode (overridden by <mode>_port in the system config)
+DEFAULT_PORTS = {
+    'checkin': 5000,
+    'checkout': 8000
+}
+
+
+# Fallback when system_config.json has no server_threads (see ConfigManager.load_system_config)
+DEFAULT_SERVER_THREADS = 24
+
+
+def get_server_threads():
+    """Waitress pool size from the system config ('server_threads')"""
+    try:
+        from core.config_manager import ConfigManager
+        return max(1, int(ConfigManager().get_system_config().get('server_threads', DEFAULT_SERVER_THREADS)))
+    except Exception as e:
+        print(f"⚠️ Could not read server_threads from config: {e}")
+        return DEFAULT_SERVER_THREADS
+
+
+def serve_app(app, host, port, dev=False, threads=None):
+    """Serve a Flask app with waitress (fixed thread pool), or Werkzeug's dev server when dev=True
+
+    Limit: each open MJPEG stream (/video_feed, admin camera preview) occupies one waitress
+    thread until the browser closes it. With `threads` workers, more than threads - 1 open
+    video pages leave no thread for API polls, which then hang. Size server_threads for the
+    expected number of viewers plus headroom (or pass --threads).
+    """
+    if threads is None:
+        threads = get_server_threads()
+    if not dev:
+        try:
+            from waitress import serve
+            print(f"🚀 Serving with waitress ({threads} threads - each open video stream holds one)")
+            serve(app, host=host, port=port, threads=threads, channel_timeout=120)
+            return
+        except ImportError:
+            print("⚠️ waitress not installed - falling back to Flask development server")
+            print("💡 Install it with: pip install waitress")
+    app.run(host=host, port=port, debug=False, threaded=True)
+
+
+def run(mode, default_port=None, port=None, dev=None, threads=None):
+    """Initialize web_app locked to `mode` and serve it"""
+    # Explicitly mark this process as the server for `mode` so configuration
+    # (especially camera selection) can be mode-specific without conflicts.
+    # Must be set before web_app is imported.
+    os.environ["IMPEX_SYSTEM_MODE"] = mode
+    
+    # Import web_app module
+    import web_app
+    from core.config_manager import ConfigManager
+    
+    # Get port from config before initializing
+    if port is None:
+        config = ConfigManager()
+        system_config = config.get_system_config()
+        port = system_config.get(f'{mode}_port', default_port or DEFAULT_PORTS[mode])
+    
+    label = MODE_LABELS[mode]
+    title = label.title()
+    
+    # Initialize system with the mode locked
+    if not web_app.init_system(forced_mode=mode):
+        print(f"❌ Failed to initialize {label.lower()} system")
+        sys.exit(1)
+    
+    host = '0.0.0.0'
+    
+    print("=" * 70)
+    print(f"🌐 IMPEX ATTENDANCE SYSTEM - {label} SERVER")
+    print("=" * 70)
+    print(f"📍 {title} Server: http://localhost:{port}")
+    print(f"📍 Network access: http://<your-ip>:{port}")
+    print(f"📍 Mode: {label} (LOCKED)")
+    print("=" * 70)
+    print(f"💡 Access {title} at: http://localhost:{port}/{mode}")
+    print("=" * 70)
+    
+    # Run Flask app (--dev keeps Werkzeug's app.run)
+    if dev is None:
+        dev = '--dev' in sys.argv
+    serve_app(web_app.app, host, port, dev=dev, threads=threads)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='IMPEX Attendance mode-locked server')
+    parser.add_argument('--mode', choices=sorted(MODE_LABELS), required=True, help='Attendance mode to lock')
+    parser.add_argument('--port', type=int, default=None, help='Port (default: <mode>_port from config)')
+    parser.add_argument('--dev', action='store_true', help="Use Flask's development server instead of waitress")
+    parser.add_argument('--threads', type=int, default=None,
+                        help='Waitress worker threads (default: server_threads from config); each open video stream holds one')
+    args = parser.parse_args()
+    run(args.mode, port=args.port, dev=args.dev, threads=args.threads)
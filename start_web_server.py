@@ -52,7 +52,8 @@ def main():
         print()
         
         # Run Flask app
-        app.run(host='0.0.0.0', port=5000, debug=False, threaded=True)
+        from start_server import serve_app
+        serve_app(app, '0.0.0.0', 5000, dev='--dev' in sys.argv)
         
     except KeyboardInterrupt:
         print("\n\n⚠️ Server stopped by user")
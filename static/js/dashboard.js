@@ -620,7 +620,7 @@ function createEmployeeCard(item, mode) {
     // Use showcase photo URL if available, otherwise fallback to captured photo or placeholder
     if (item.photo_url) {
         const img = document.createElement('img');
-        img.src = item.photo_url + '?t=' + Date.now(); // Add timestamp to prevent caching
+        img.src = item.photo_url; // Cached by the browser, revalidated via ETag so photo changes still show
         img.alt = 'Employee Photo';
         img.onerror = function() {
             // Fallback to placeholder if showcase photo fails to load
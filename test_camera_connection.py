@@ -5,8 +5,17 @@ Tests HTTP web interface, RTSP streams, and network connectivity
 """
 
 import cv2
+import numpy as np
+import os
+import shutil
 import socket
+import subprocess
+import asyncio
+import base64
+import select
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
 import time
 from urllib.parse import urlparse
 
@@ -31,17 +40,30 @@ RTSP_PATHS = [
     "/video",                   # Generic
 ]
 
+# Shared HTTP session - keep-alive pool reused across the web-interface probes
+http_session = requests.Session()
+http_session.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=4))
+
 def test_port(host, port, timeout=3):
-    """Test if a port is open"""
+    """Test if a port is open (non-blocking connect, hard `timeout` wall-clock bound)"""
+    sock = None
     try:
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(timeout)
-        result = sock.connect_ex((host, port))
-        sock.close()
-        return result == 0
+        sock.setblocking(False)
+        err = sock.connect_ex((host, port))
+        if err == 0:
+            return True
+        # Connection in progress - wait until writable, then read the outcome from SO_ERROR
+        _, writable, _ = select.select([], [sock], [], timeout)
+        if not writable:
+            return False
+        return sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0
     except Exception as e:
         print(f"❌ Port test error: {e}")
         return False
+    finally:
+        if sock is not None:
+            sock.close()
 
 def test_http_interface(ip, port=80):
     """Test HTTP web interface"""
@@ -54,28 +76,93 @@ def test_http_interface(ip, port=80):
         f"http://{USERNAME}:{PASSWORD}@{ip}:{port}/#/home/live",
     ]
     
-    for url in urls_to_test:
+    def fetch_status(url):
+        # Status code only - stream=True so the admin page body is never downloaded
+        with http_session.get(url, timeout=5, stream=True,
+                              auth=(USERNAME, PASSWORD) if '@' not in url else None) as response:
+            return response.status_code
+    
+    def probe(url):
         try:
-            print(f"  Testing: {url}")
-            response = requests.get(url, timeout=5, auth=(USERNAME, PASSWORD) if '@' not in url else None)
-            print(f"  ✅ Status: {response.status_code}")
-            if response.status_code == 200:
-                print(f"  ✅ Successfully connected to HTTP interface!")
-                return True
+            return url, fetch_status(url), None
         except requests.exceptions.RequestException as e:
-            print(f"  ❌ Failed: {e}")
+            return url, None, e
+    
+    # All URLs at once over one pooled keep-alive session
+    with ThreadPoolExecutor(max_workers=len(urls_to_test)) as pool:
+        results = list(pool.map(probe, urls_to_test))
+    
+    for url, status, error in results:
+        print(f"  Testing: {url}")
+        if error is not None:
+            print(f"  ❌ Failed: {error}")
+            continue
+        print(f"  ✅ Status: {status}")
+        if status == 200:
+            print(f"  ✅ Successfully connected to HTTP interface!")
+            return True
     
     return False
 
+# Socket I/O bound for RTSP reads (connect + each read), in seconds
+RTSP_IO_TIMEOUT = 2
+
+def read_frame_ffmpeg(rtsp_url, transport='tcp', timeout=5):
+    """Grab one frame through an ffmpeg subprocess (fails fast instead of OpenCV's 30s grab timeout)
+    
+    Returns the BGR frame, or None if no frame arrived within `timeout` seconds.
+    No ffmpeg `-timeout` option: FFmpeg 4.x reads it as the RTSP listen timeout and
+    switches to listen mode, so `timeout` is enforced on the process instead.
+    """
+    cmd = [
+        'ffmpeg', '-loglevel', 'error',
+        '-rtsp_transport', transport,
+        '-fflags', 'nobuffer', '-flags', 'low_delay',
+        '-i', rtsp_url,
+        '-frames:v', '1', '-f', 'image2pipe', '-c:v', 'bmp', 'pipe:1'
+    ]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        data, _ = proc.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.communicate()
+        return None
+    if not data:
+        return None
+    # BMP carries its own size, so no separate probe for width/height is needed
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
 def test_rtsp_stream(rtsp_url, transport='tcp'):
     """Test RTSP stream connection"""
     print(f"\n📹 Testing RTSP stream: {rtsp_url} (transport: {transport})")
     
-    # Set RTSP transport
-    os.environ['OPENCV_FFMPEG_CAPTURE_OPTIONS'] = f'rtsp_transport;{transport}'
+    start_time = time.time()
+    
+    # Prefer an ffmpeg pipe - its timeouts are honored, unlike VideoCapture's fixed grab timeout
+    if shutil.which('ffmpeg'):
+        try:
+            frame = read_frame_ffmpeg(rtsp_url, transport)
+            if frame is None:
+                print(f"  ❌ Cannot read frames from stream")
+                return False
+            height, width = frame.shape[:2]
+            elapsed = time.time() - start_time
+            print(f"  ✅ Success! Frame captured: {width}x{height} (took {elapsed:.2f}s)")
+            return True
+        except Exception as e:
+            print(f"  ❌ Error: {e}")
+            return False
+    
+    # Fallback: OpenCV's FFmpeg backend
+    # Set RTSP transport and let FFmpeg bound socket I/O itself
+    os.environ['OPENCV_FFMPEG_CAPTURE_OPTIONS'] = f'rtsp_transport;{transport}|timeout;{RTSP_IO_TIMEOUT * 1_000_000}'
     
     try:
-        cap = cv2.VideoCapture(rtsp_url, cv2.CAP_FFMPEG)
+        cap = cv2.VideoCapture(rtsp_url, cv2.CAP_FFMPEG, [
+            cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, RTSP_IO_TIMEOUT * 1000,
+            cv2.CAP_PROP_READ_TIMEOUT_MSEC, RTSP_IO_TIMEOUT * 1000,
+        ])
         
         if not cap.isOpened():
             print(f"  ❌ Cannot open RTSP stream")
@@ -83,19 +170,14 @@ def test_rtsp_stream(rtsp_url, transport='tcp'):
         
         print(f"  ✅ Stream opened, attempting to read frame...")
         
-        # Try to read a frame with timeout
-        start_time = time.time()
-        timeout = 10
-        
-        for attempt in range(5):
-            ret, frame = cap.read()
-            if ret and frame is not None:
-                height, width = frame.shape[:2]
-                elapsed = time.time() - start_time
-                print(f"  ✅ Success! Frame captured: {width}x{height} (took {elapsed:.2f}s)")
-                cap.release()
-                return True
-            time.sleep(1)
+        # Single read - the backend's read timeout bounds the wait, no sleep/retry loop
+        ret, frame = cap.read()
+        if ret and frame is not None:
+            height, width = frame.shape[:2]
+            elapsed = time.time() - start_time
+            print(f"  ✅ Success! Frame captured: {width}x{height} (took {elapsed:.2f}s)")
+            cap.release()
+            return True
         
         print(f"  ❌ Cannot read frames from stream")
         cap.release()
@@ -105,24 +187,63 @@ def test_rtsp_stream(rtsp_url, transport='tcp'):
         print(f"  ❌ Error: {e}")
         return False
 
-def main():
-    import os
+def build_rtsp_url(path):
+    """Full RTSP URL (with credentials) for a stream path"""
+    return f"rtsp://{USERNAME}:{PASSWORD}@{CAMERA_IP}:{RTSP_PORT}{path}"
+
+async def probe_rtsp(path, timeout=1.5):
+    """Lightweight RTSP handshake (OPTIONS + DESCRIBE) for one path
     
+    Returns the DESCRIBE status code, or None if the camera did not answer.
+    """
+    url = f"rtsp://{CAMERA_IP}:{RTSP_PORT}{path}"
+    auth = base64.b64encode(f"{USERNAME}:{PASSWORD}".encode()).decode()
+    writer = None
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(CAMERA_IP, RTSP_PORT), timeout)
+        status = None
+        for request in (
+            f"OPTIONS {url} RTSP/1.0\r\nCSeq: 1\r\n\r\n",
+            f"DESCRIBE {url} RTSP/1.0\r\nCSeq: 2\r\nAccept: application/sdp\r\n"
+            f"Authorization: Basic {auth}\r\n\r\n",
+        ):
+            writer.write(request.encode())
+            await writer.drain()
+            headers = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout)
+            status_line = headers.split(b"\r\n", 1)[0].decode(errors='replace')
+            status = int(status_line.split()[1])
+            # Skip the body (SDP) so the next response starts at its status line
+            for line in headers.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    await asyncio.wait_for(reader.readexactly(int(line.split(b":")[1])), timeout)
+        return status
+    except Exception:
+        return None
+    finally:
+        if writer is not None:
+            writer.close()
+
+async def discover_rtsp_paths(paths):
+    """Probe all candidate paths concurrently; returns {path: DESCRIBE status or None}"""
+    statuses = await asyncio.gather(*(probe_rtsp(path) for path in paths))
+    return dict(zip(paths, statuses))
+
+def main():
     print("=" * 60)
     print(f"🔍 Camera Diagnostic Tool for {CAMERA_IP}")
     print("=" * 60)
     
     # Test 1: Basic network connectivity
     print(f"\n1️⃣ Testing network connectivity...")
-    if test_port(CAMERA_IP, RTSP_PORT):
-        print(f"  ✅ RTSP port {RTSP_PORT} is open")
-    else:
-        print(f"  ❌ RTSP port {RTSP_PORT} is closed or unreachable")
+    ports = [('RTSP', RTSP_PORT), ('HTTP', HTTP_PORT)]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        port_results = list(pool.map(lambda item: test_port(CAMERA_IP, item[1]), ports))
     
-    if test_port(CAMERA_IP, HTTP_PORT):
-        print(f"  ✅ HTTP port {HTTP_PORT} is open")
-    else:
-        print(f"  ❌ HTTP port {HTTP_PORT} is closed or unreachable")
+    for (name, port), is_open in zip(ports, port_results):
+        if is_open:
+            print(f"  ✅ {name} port {port} is open")
+        else:
+            print(f"  ❌ {name} port {port} is closed or unreachable")
     
     # Test 2: HTTP web interface
     print(f"\n2️⃣ Testing HTTP web interface...")
@@ -132,11 +253,18 @@ def main():
     print(f"\n3️⃣ Testing RTSP streams with different paths...")
     working_streams = []
     
-    for path in RTSP_PATHS:
-        if path:
-            rtsp_url = f"rtsp://{USERNAME}:{PASSWORD}@{CAMERA_IP}:{RTSP_PORT}{path}"
-        else:
-            rtsp_url = f"rtsp://{USERNAME}:{PASSWORD}@{CAMERA_IP}:{RTSP_PORT}"
+    # Handshake every path at once; only paths the camera accepts (200) or that need
+    # non-Basic auth (401, FFmpeg negotiates Digest) get the slow full frame-read test
+    statuses = asyncio.run(discover_rtsp_paths(RTSP_PATHS))
+    for path, status in statuses.items():
+        print(f"  {'✅' if status in (200, 401) else '❌'} {path or '/'}: {status if status is not None else 'no response'}")
+    candidates = [path for path, status in statuses.items() if status in (200, 401)]
+    if not candidates and all(status is None for status in statuses.values()):
+        # Camera did not speak RTSP to the probe at all - fall back to trying every path
+        candidates = RTSP_PATHS
+    
+    for path in candidates:
+        rtsp_url = build_rtsp_url(path)
         
         if test_rtsp_stream(rtsp_url, 'tcp'):
             working_streams.append(rtsp_url)
@@ -146,11 +274,8 @@ def main():
     # Try UDP if TCP didn't work
     if not working_streams:
         print(f"\n  🔄 Trying UDP transport...")
-        for path in RTSP_PATHS[:3]:  # Try first few paths with UDP
-            if path:
-                rtsp_url = f"rtsp://{USERNAME}:{PASSWORD}@{CAMERA_IP}:{RTSP_PORT}{path}"
-            else:
-                rtsp_url = f"rtsp://{USERNAME}:{PASSWORD}@{CAMERA_IP}:{RTSP_PORT}"
+        for path in candidates[:3]:  # Try first few paths with UDP
+            rtsp_url = build_rtsp_url(path)
             
             if test_rtsp_stream(rtsp_url, 'udp'):
                 working_streams.append(rtsp_url)
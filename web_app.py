@@ -4,10 +4,14 @@
 import os
 import sys
 import threading
+import queue
+import atexit
 import time
 import base64
 import json
-from datetime import datetime, date
+from collections import OrderedDict
+from functools import lru_cache
+from datetime import datetime, date, time as dtime
 from flask import Flask, render_template, Response, jsonify, request
 from flask_cors import CORS
 import cv2
@@ -25,12 +29,14 @@ if current_dir not in sys.path:
 if src_dir not in sys.path:
     sys.path.insert(0, src_dir)
 
-from core.deepsort_tracker import DeepSort, Detection as DSDetection
+from core.deepsort_tracker import DeepSort, Detection as DSDetection, linear_assignment
 from core.face_engine import FaceRecognitionEngine
 from core.database_manager import DatabaseManager
 from core.config_manager import ConfigManager
 from utils.camera_utils import CameraManager
-from utils.gpu_utils import detect_gpu_capability
+from utils.gpu_utils import detect_gpu_capability, detect_opencv_cuda
+from utils.jpeg_utils import encode_jpeg, mjpeg_part
+from utils.json_utils import use_fast_json
 
 # CRITICAL: Set environment variables BEFORE any imports
 os.environ['OPENCV_FFMPEG_CAPTURE_OPTIONS'] = (
@@ -39,7 +45,7 @@ os.environ['OPENCV_FFMPEG_CAPTURE_OPTIONS'] = (
     'fflags;nobuffer|'
     'flags;low_delay|'
     'fflags;flush_packets|'
-    'max_delay;500000|'
+    'max_delay;0|'
     'reorder_queue_size;0|'
     'buffer_size;32768'
 )
@@ -54,20 +60,46 @@ app = Flask(__name__,
            template_folder='templates',
            static_folder='static')
 CORS(app)  # Enable CORS for cross-origin requests
+use_fast_json(app)  # orjson for API responses when installed
 
 # Global variables
 camera_manager = None
 face_engine = None
 db_manager = None
 config = None
-current_frame = None
-current_detections = []
+current_detections = []  # Immutable once published - replaced wholesale, never mutated in place
+latest_mjpeg_part = None  # Framed multipart part of the latest annotated JPEG, shared by all /video_feed viewers
 frame_lock = threading.Lock()
+frame_cv = threading.Condition(frame_lock)  # Notified (holding frame_lock) when latest_mjpeg_part changes
+frame_seq = 0  # Incremented for every published latest_mjpeg_part
+stream_viewers = 0  # Open /video_feed streams (guarded by frame_lock) - no viewers, no encoding
+STREAM_MAX_FPS = 15  # Cap on annotate + encode rate for the MJPEG feed
+stream_pending = None  # (frame, detections) waiting for the stream encoder thread - single slot, newest wins
+stream_pending_cv = threading.Condition()
+# Latest processing-loop counters; rebound as a whole each second, read by the printer thread and /api/system/stats
+loop_stats = {'fps': 0.0, 'detection_fps': 0.0, 'total_frames': 0, 'processed_frames': 0}
 running = False
 processing_thread = None
+stream_encoder_thread = None
+loop_stats_thread = None
+SYSTEM_THREAD_JOIN_TIMEOUT = 3.0  # Seconds stop/start wait for the previous run's threads to exit
+# Check-in lateness window (parsed once, not per recognition)
+EXPECTED_CHECKIN_TIME = dtime(9, 0, 0)
+LATE_WINDOW_END = dtime(9, 20, 0)
+EXPECTED_CHECKIN_MINUTES = EXPECTED_CHECKIN_TIME.hour * 60 + EXPECTED_CHECKIN_TIME.minute
+# Unknown-entry debounce: track_id -> time of last save, bounded and expiring
+UNKNOWN_DEBOUNCE_SECONDS = 180.0  # Long window so the same person is not saved many times
+UNKNOWN_DEBOUNCE_MAX = 1024
+unknown_debounce = OrderedDict()
+attendance_q = queue.Queue()  # (staff_id, 'check_in'/'check_out', confidence, check_time) for the DB writer thread
+ATTENDANCE_BATCH_MAX = 50  # Events committed per transaction by the writer thread
+ATTENDANCE_BATCH_WAIT = 0.1  # Seconds the writer waits for more events before committing
+attendance_writer_thread = None
 today_attendance = {}
-captured_photos = {}
 employee_id_map = {}
+STAFF_DIRECTORY_TTL = 30.0  # Seconds /api/staff/all serves the cached staff list; staff are edited by the admin process, so this TTL is the only refresh
+staff_directory = []  # Rows served by /api/staff/all (no embeddings or photo blobs)
+staff_directory_loaded_at = 0.0
 system_mode = 'checkin'  # Default mode
 is_locked = False
 recent_track_roles = {}  # track_id -> 'staff' or 'unknown'
@@ -76,14 +108,22 @@ next_track_id = 1        # incremental track id
 
 # DeepSort-style appearance-based tracker for stable IDs
 deepsort_tracker = DeepSort()
-track_states = {}  # track_id -> dict with staff/unknown history
+TRACK_STATE_MAX_AGE = 30.0  # seconds; well past DeepSort's max_age at detection rate
+track_states = OrderedDict()  # track_id -> dict with staff/unknown history, least recently seen first
 
 # Track staff presence in frame: staff_id -> {first_detection_time, last_seen_time, track_id, in_frame}
 staff_in_frame = {}  # staff_id -> {'first_detection': datetime, 'last_seen': time, 'track_id': int, 'in_frame': bool}
 
 # MediaPipe face detection + unknown-embedding cache
 _mp_face_detector = None
-recent_unknowns = []  # list of dicts: {'embedding': np.ndarray, 'ts': float}
+mediapipe_gate = False  # 'mediapipe_face_gate' setting - skip InsightFace when MediaPipe sees no face
+# Recent unknowns as one stacked matrix so the dedup check is a single matrix-vector product
+recent_unknown_embeddings = None  # int8 [M, D], L2-normalized rows scaled by UNKNOWN_Q_SCALE
+recent_unknown_ts = np.empty(0)   # float64 [M], time each row was added
+# Unit vectors have |component| <= 1, so x127 always fits int8. Rounding error is <= 0.5/127 per
+# component, which moves a 512-d cosine by ~1e-3 in practice - far below the 0.7 dedup margin.
+UNKNOWN_Q_SCALE = 127
+UNKNOWN_CACHE_MAX = 256  # Most recent unknowns kept for dedup; older rows are evicted first
 
 
 def init_mediapipe_face_detector(min_detection_confidence: float = 0.5):
@@ -136,18 +176,13 @@ def init_mediapipe_face_detector(min_detection_confidence: float = 0.5):
     return _mp_face_detector
 
 
-def _cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
-    """Compute cosine similarity between two 1D vectors."""
-    if a is None or b is None:
-        return 0.0
-    if a.ndim != 1 or b.ndim != 1:
-        a = a.reshape(-1)
-        b = b.reshape(-1)
-    na = np.linalg.norm(a)
-    nb = np.linalg.norm(b)
-    if na == 0 or nb == 0:
-        return 0.0
-    return float(np.dot(a / na, b / nb))
+def _l2_normalized(embedding: np.ndarray):
+    """Flattened float32 copy of an embedding scaled to unit length (None for a zero vector)."""
+    emb = np.asarray(embedding, dtype=np.float32).reshape(-1)
+    norm = np.linalg.norm(emb)
+    if norm == 0:
+        return None
+    return emb / norm
 
 
 def is_same_unknown(embedding: np.ndarray,
@@ -159,29 +194,41 @@ def is_same_unknown(embedding: np.ndarray,
     This prevents the same unknown person from being recorded multiple times
     in a short time window, even if the tracker temporarily loses them.
     """
-    global recent_unknowns
+    global recent_unknown_embeddings, recent_unknown_ts
     if embedding is None:
         return False
 
-    now = time.time()
-    # Keep only recent entries
-    recent_unknowns = [
-        item for item in recent_unknowns
-        if now - item["ts"] <= max_age_seconds
-    ]
-
-    if not recent_unknowns:
-        recent_unknowns.append({"embedding": embedding, "ts": now})
+    emb = _l2_normalized(embedding)
+    if emb is None:
         return False
+    emb_q = np.round(emb * UNKNOWN_Q_SCALE).astype(np.int8)
 
-    for item in recent_unknowns:
-        sim = _cosine_similarity(embedding, item["embedding"])
-        if sim >= similarity_threshold:
-            # Same physical unknown person seen again → treat as duplicate
-            return True
+    now = time.time()
+    if recent_unknown_embeddings is not None:
+        # Keep only recent rows
+        keep = (now - recent_unknown_ts) <= max_age_seconds
+        if not keep.all():
+            recent_unknown_embeddings = recent_unknown_embeddings[keep]
+            recent_unknown_ts = recent_unknown_ts[keep]
+
+        if len(recent_unknown_ts) and recent_unknown_embeddings.shape[1] == emb_q.shape[0]:
+            # Rows are unit length, so one int32-accumulated GEMV gives every (scaled) cosine
+            scores = recent_unknown_embeddings.astype(np.int32) @ emb_q.astype(np.int32)
+            if scores.max() >= similarity_threshold * UNKNOWN_Q_SCALE * UNKNOWN_Q_SCALE:
+                # Same physical unknown person seen again → treat as duplicate
+                return True
+        elif len(recent_unknown_ts):
+            # Embedding size changed (model swap) - old rows are not comparable
+            recent_unknown_embeddings = None
 
     # New unknown person
-    recent_unknowns.append({"embedding": embedding, "ts": now})
+    if recent_unknown_embeddings is None or not len(recent_unknown_ts):
+        recent_unknown_embeddings = emb_q[None, :]
+        recent_unknown_ts = np.array([now])
+    else:
+        # Append, keeping only the newest UNKNOWN_CACHE_MAX rows so the scan stays O(cap)
+        recent_unknown_embeddings = np.vstack((recent_unknown_embeddings[-(UNKNOWN_CACHE_MAX - 1):], emb_q))
+        recent_unknown_ts = np.append(recent_unknown_ts[-(UNKNOWN_CACHE_MAX - 1):], now)
     return False
 
 
@@ -198,12 +245,11 @@ def is_probable_staff_from_embedding(embedding: np.ndarray,
         return False
 
     try:
-        staff_db = getattr(face_engine, "staff_database", None)
-        if not staff_db:
+        # One dot product against the staff centroid rules out clear non-staff first
+        if not face_engine.could_match_staff(embedding, similarity_threshold):
             return False
-
-        # Re-use the optimized matcher from FaceRecognitionEngine
-        match_id, score = face_engine._match_against_database(embedding, staff_db)
+        # One product against the engine's pre-normalized staff matrix
+        match_id, score = face_engine.best_staff_match(embedding)
         if match_id and score >= similarity_threshold:
             return True
     except Exception as e:
@@ -218,7 +264,7 @@ def init_system(forced_mode=None):
     Args:
         forced_mode: If provided, override config and lock to this mode ('checkin' or 'checkout')
     """
-    global camera_manager, face_engine, db_manager, config, employee_id_map, system_mode, is_locked
+    global camera_manager, face_engine, db_manager, config, employee_id_map, system_mode, is_locked, mediapipe_gate
     
     try:
         print("🚀 Initializing IMPEX Web Attendance System...")
@@ -237,9 +283,11 @@ def init_system(forced_mode=None):
             is_locked = system_config.get('locked_mode', False)
         
         db_path = system_config.get('database_path', 'data/factory_attendance.db')
+        mediapipe_gate = config.get_setting('mediapipe_face_gate', False)
         
         # Initialize database
         db_manager = DatabaseManager(db_path=db_path)
+        start_attendance_writer()
         
         # Initialize camera manager
         camera_manager = CameraManager()
@@ -259,21 +307,25 @@ def init_system(forced_mode=None):
         return False
 
 def load_employee_ids():
-    """Load employee IDs from database"""
-    global employee_id_map
+    """Load employee IDs (and the cached staff directory) from database"""
+    global employee_id_map, staff_directory, staff_directory_loaded_at
     try:
         all_staff = db_manager.get_all_staff()
-        employee_id_map = {}
-        for staff in all_staff:
-            staff_id = staff['staff_id']
-            employee_id = staff.get('employee_id')
-            if employee_id:
-                employee_id_map[staff_id] = employee_id
-            else:
-                if staff_id.startswith('STAFF_'):
-                    employee_id_map[staff_id] = staff_id.replace('STAFF_', '')
-                else:
-                    employee_id_map[staff_id] = staff_id
+        # Every staff_id gets its final display string here, so lookups never re-derive it
+        employee_id_map = {
+            staff['staff_id']: staff.get('employee_id') or _default_employee_id(staff['staff_id'])
+            for staff in all_staff
+        }
+        staff_directory = [
+            {
+                'staff_id': staff['staff_id'],
+                'employee_id': employee_id_map[staff['staff_id']],
+                'name': staff.get('name', 'Unknown'),
+                'department': staff.get('department', '')
+            }
+            for staff in all_staff
+        ]
+        staff_directory_loaded_at = time.time()
         print(f"✅ Loaded {len(employee_id_map)} employee IDs")
     except Exception as e:
         print(f"Error loading employee IDs: {e}")
@@ -298,29 +350,83 @@ def load_today_attendance():
         print(f"Error loading attendance: {e}")
         today_attendance = {}
 
+def _default_employee_id(staff_id):
+    """Employee ID derived from the staff_id format (e.g., "STAFF_4730" -> "4730")"""
+    return staff_id[6:] if staff_id[:6] == 'STAFF_' else staff_id
+
 def get_employee_id(staff_id):
-    """Get employee ID for staff"""
-    return employee_id_map.get(staff_id, staff_id.replace('STAFF_', '') if staff_id.startswith('STAFF_') else staff_id)
+    """Get employee ID for staff - a single dict lookup once the ID has been resolved"""
+    employee_id = employee_id_map.get(staff_id)
+    if employee_id is None:
+        # Staff added after load_employee_ids - derive once and remember
+        employee_id = employee_id_map[staff_id] = _default_employee_id(staff_id)
+    return employee_id
+
+# Frame quality gate runs on a strided ~320 px wide tile, not the full frame
+QUALITY_TILE_WIDTH = 320
 
 def is_good_frame(frame):
     """Check if frame is good quality for processing (not too blurry or dark)"""
     if frame is None:
         return False
     
-    # Convert to grayscale for analysis
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if len(frame.shape) == 3 else frame
+    # Strided green channel as a luma proxy - no full-resolution cvtColor
+    step = max(1, frame.shape[1] // QUALITY_TILE_WIDTH)
+    tile = frame[::step, ::step, 1] if frame.ndim == 3 else frame[::step, ::step]
+    tile = np.ascontiguousarray(tile)
     
     # Check brightness (avoid too dark frames)
-    mean_brightness = np.mean(gray)
-    if mean_brightness < 30:  # Too dark
+    if cv2.mean(tile)[0] < 30:  # Too dark
         return False
     
-    # Check blur using Laplacian variance (simple and fast)
-    laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
-    if laplacian_var < 50:  # Too blurry
+    # Check blur using Laplacian variance (16-bit output instead of float64)
+    _, std_dev = cv2.meanStdDev(cv2.Laplacian(tile, cv2.CV_16S))
+    if std_dev[0, 0] ** 2 < 50:  # Too blurry
         return False
     
     return True
+
+# Reused device buffers for the CUDA downscale (set up in start_system when OpenCV has CUDA)
+_gpu_src = None
+_gpu_dst = None
+
+def detector_input(frame, resolution):
+    """Downscale a frame to fit the detector resolution; returns (frame, bbox scale back to full size)"""
+    height, width = frame.shape[:2]
+    scale = min(resolution[0] / width, resolution[1] / height)
+    if scale >= 1.0:
+        return frame, 1.0
+    size = (int(width * scale), int(height * scale))
+    if _gpu_src is not None:
+        try:
+            # The full-resolution pass is the only memory-heavy pixel op left - run it on the GPU
+            _gpu_src.upload(frame)
+            cv2.cuda.resize(_gpu_src, size, _gpu_dst)
+            return _gpu_dst.download(), 1.0 / scale
+        except Exception as e:
+            print(f"⚠️ CUDA resize failed, using CPU: {e}")
+            _disable_gpu_resize()
+    return cv2.resize(frame, size), 1.0 / scale
+
+def _enable_gpu_resize():
+    """Allocate the reusable GpuMat buffers if OpenCV was built with CUDA"""
+    global _gpu_src, _gpu_dst
+    if _gpu_src is None and detect_opencv_cuda():
+        _gpu_src = cv2.cuda_GpuMat()
+        _gpu_dst = cv2.cuda_GpuMat()
+        print("✅ OpenCV CUDA available - detector downscale runs on the GPU")
+
+def _disable_gpu_resize():
+    """Fall back to cv2.resize for the rest of the session"""
+    global _gpu_src, _gpu_dst
+    _gpu_src = _gpu_dst = None
+
+def padded_box(bbox, shape, pad):
+    """Integer bbox grown by `pad` pixels on every side and clipped to the frame shape"""
+    h, w = shape[:2]
+    x1, y1, x2, y2 = map(int, bbox)
+    return max(0, x1 - pad), max(0, y1 - pad), min(w, x2 + pad), min(h, y2 + pad)
+
 def _bbox_iou(b1, b2):
     """Compute IoU between two [x1, y1, x2, y2] boxes."""
     x1 = max(b1[0], b2[0])
@@ -340,6 +446,21 @@ def _bbox_iou(b1, b2):
     return float(inter) / float(union)
 
 
+def iou_matrix(a, b):
+    """Pairwise IoU between (M, 4) and (N, 4) [x1, y1, x2, y2] boxes; returns (M, N) float32"""
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = np.clip(a[:, 2] - a[:, 0], 0, None) * np.clip(a[:, 3] - a[:, 1], 0, None)
+    area_b = np.clip(b[:, 2] - b[:, 0], 0, None) * np.clip(b[:, 3] - b[:, 1], 0, None)
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-6), 0.0).astype(np.float32)
+
+
 def assign_simple_tracks(bboxes, max_stale_seconds=5.0, iou_threshold=0.3):
     """
     Legacy IoU-only tracker (kept for fallback / reference). The main tracker
@@ -393,6 +514,8 @@ def _get_or_create_track_state(track_id: int):
         first_seen: timestamp when track was first created
         last_seen: last update timestamp
         consecutive_staff_frames: number of consecutive frames with strong staff recognition
+        stable_staff_frames: frames in a row recognized as the same staff_id
+        staff_confirmed: bool - staff_id seen on enough frames, never record as unknown
         locked_staff: bool - once True, this track is always treated as staff
         staff_id: best staff_id assigned to this track
         best_staff_score: highest recognition score seen for staff
@@ -409,6 +532,8 @@ def _get_or_create_track_state(track_id: int):
             "first_seen": now,
             "last_seen": now,
             "consecutive_staff_frames": 0,
+            "stable_staff_frames": 0,
+            "staff_confirmed": False,
             "locked_staff": False,
             "staff_id": None,
             "best_staff_score": 0.0,
@@ -421,27 +546,30 @@ def _get_or_create_track_state(track_id: int):
         track_states[track_id] = state
     else:
         state["last_seen"] = now
+        track_states.move_to_end(track_id)
     return state
 
 
 def _prune_stale_track_states(max_age_seconds: float = 5.0):
     """Remove per-track states that have not been updated recently."""
     now = time.time()
-    stale_ids = [
-        tid for tid, st in track_states.items()
-        if now - st.get("last_seen", now) > max_age_seconds
-    ]
-    for tid in stale_ids:
-        track_states.pop(tid, None)
+    # Ordered by last_seen, so stop at the first fresh entry - only expired tracks are touched
+    while track_states:
+        tid, st = next(iter(track_states.items()))
+        if now - st["last_seen"] <= max_age_seconds:
+            break
+        del track_states[tid]
+        recent_track_roles.pop(tid, None)
 
 def process_video_loop():
     """Process video frames in background thread with smart frame skipping"""
-    global current_frame, current_detections, running, face_engine
+    global current_detections, stream_pending, running, face_engine, loop_stats
     
     # FPS tracking for terminal output
     fps_counter = 0
     fps_start_time = time.time()
     last_fps_print = time.time()
+    last_stream_encode = 0.0
     frame_counter = 0
     processed_frames = 0
     
@@ -451,20 +579,23 @@ def process_video_loop():
     MIN_PROCESS_INTERVAL = 0.06  # Minimum 0.06s between detections (~16 FPS max detection rate)
     last_detection_time = 0
     
+    # Static-scene gate: skip the detector while an 80x60 gray thumbnail matches the one
+    # from the last detection, but still detect at least once per second so presence
+    # timers (staff_in_frame last_seen) keep ticking for people standing still
+    MOTION_DIFF_THRESHOLD = 15000  # Sum of abs pixel differences over the 80x60 thumbnail
+    MAX_STATIC_SKIP = 1.0
+    last_detected_small = None
+    
     while running:
         try:
-            frame = camera_manager.get_frame()
+            # Block until the capture thread publishes a frame (no polling sleep)
+            frame = camera_manager.get_frame(timeout=0.5)
             if frame is None:
-                time.sleep(0.01)
                 continue
             
             frame_counter += 1
             fps_counter += 1
             
-            # Always update display frame for smooth video
-            with frame_lock:
-                current_frame = frame.copy()
-            
             # Smart frame skipping: only process good frames at intervals
             current_time = time.time()
             should_process = (
@@ -473,21 +604,40 @@ def process_video_loop():
                 is_good_frame(frame)  # Quality check
             )
             
+            # Skip detection when nothing changed since the last detected frame (~10 µs check)
+            if should_process and face_engine:
+                # One downscale to detector resolution, shared by the gate and the detector
+                det_frame, det_scale = detector_input(frame, face_engine.processing_resolution)
+                # Green channel stands in for luma (same proxy as is_good_frame) - no gray conversion
+                small = cv2.resize(cv2.extractChannel(det_frame, 1), (80, 60), interpolation=cv2.INTER_AREA)
+                if (last_detected_small is not None and
+                        (current_time - last_detection_time) < MAX_STATIC_SKIP and
+                        cv2.sumElems(cv2.absdiff(small, last_detected_small))[0] < MOTION_DIFF_THRESHOLD):
+                    should_process = False
+                else:
+                    last_detected_small = small
+            
             # Detect faces only on selected frames
             if should_process and face_engine:
                 processed_frames += 1
                 last_detection_time = current_time
                 
-                # Ensure MediaPipe is initialized (for integration / auxiliary checks)
-                mp_detector = init_mediapipe_face_detector()
-                if mp_detector is not None:
-                    try:
-                        _ = mp_detector.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-                    except Exception as _e:
-                        # If MediaPipe processing fails, continue with main pipeline.
-                        pass
-
-                detections = face_engine.detect_faces(frame)
+                # Optional MediaPipe gate: a cheap pass on a 320 px frame decides whether the
+                # InsightFace detector runs at all (its result used to be discarded)
+                faces_possible = True
+                if mediapipe_gate:
+                    mp_detector = init_mediapipe_face_detector()
+                    if mp_detector is not None:
+                        try:
+                            gate_frame, _ = detector_input(det_frame, (320, 240))
+                            mp_result = mp_detector.process(cv2.cvtColor(gate_frame, cv2.COLOR_BGR2RGB))
+                            faces_possible = bool(mp_result.detections)
+                        except Exception as _e:
+                            # If MediaPipe processing fails, continue with main pipeline.
+                            pass
+
+                # Detect on the downscaled frame; bboxes come back in full-frame coordinates
+                detections = face_engine.detect_faces_prescaled(det_frame, det_scale, det_scale) if faces_possible else []
                 detection_info = []
 
                 # Build DeepSort detections (appearance features come from embeddings)
@@ -504,19 +654,15 @@ def process_video_loop():
                 # Track which staff members are currently detected in this frame
                 current_frame_staff = set()
 
-                # Map DeepSort track outputs back to our detections via IoU
-                det_bboxes = [d['bbox'] for d in detections]
+                # Map DeepSort track outputs back to our detections: one IoU matrix, then a
+                # one-to-one Hungarian assignment (no track is starved by an earlier greedy pick)
                 track_ids = [None] * len(detections)
-                for track_id, t_bbox, _feat in ds_tracks:
-                    best_iou = 0.0
-                    best_idx = None
-                    for idx, det_bbox in enumerate(det_bboxes):
-                        iou = _bbox_iou(det_bbox, t_bbox)
-                        if iou > best_iou:
-                            best_iou = iou
-                            best_idx = idx
-                    if best_idx is not None and best_iou >= 0.3 and track_ids[best_idx] is None:
-                        track_ids[best_idx] = int(track_id)
+                if ds_tracks and detections:
+                    ious = iou_matrix([d['bbox'] for d in detections], [t[1] for t in ds_tracks])
+                    ious[ious < 0.3] = 0.0
+                    for det_idx, t_idx in linear_assignment(-ious):
+                        if ious[det_idx, t_idx] > 0:
+                            track_ids[det_idx] = int(ds_tracks[t_idx][0])
                 
                 # Mark staff as not in frame if they're not detected in this frame
                 current_time = time.time()
@@ -530,14 +676,17 @@ def process_video_loop():
                 # Track which staff members are currently detected in this frame
                 detected_staff_ids = set()
                 
+                # Identify every face of the frame with one matrix product against the galleries
+                identities = face_engine.identify_persons([d['embedding'] for d in detections]) if detections else []
+                
                 for det_idx, detection in enumerate(detections):
                     bbox = detection['bbox']
                     embedding = detection['embedding']
                     det_confidence = detection.get('confidence', 0.0)
                     track_id = track_ids[det_idx] if det_idx < len(track_ids) else None
 
-                    # Identify person
-                    person_type, person_id, rec_confidence = face_engine.identify_person(embedding)
+                    # Identify person (precomputed for the whole frame above)
+                    person_type, person_id, rec_confidence = identities[det_idx]
                     
                     # Track detected staff
                     if person_type == 'staff' and person_id and rec_confidence >= 0.55:
@@ -545,25 +694,17 @@ def process_video_loop():
 
                     # Track-level state for stronger staff/unknown decisions
                     if track_id is not None:
-                        state = track_states.get(track_id)
-                        if state is None:
-                            state = {
-                                "first_seen": current_time,
-                                "staff_id": None,
-                                "best_staff_score": 0.0,
-                                "stable_staff_frames": 0,
-                                "staff_confirmed": False,
-                                "unknown_recorded": False,
-                            }
-                            track_states[track_id] = state
+                        _get_or_create_track_state(track_id)
 
+                    # Already JSON-ready: the engine returns int bboxes and float scores,
+                    # identify_persons float confidences, and track_ids holds ints or None
                     detection_info.append({
-                        'bbox': bbox.tolist() if isinstance(bbox, np.ndarray) else list(bbox),
-                        'confidence': float(det_confidence),
+                        'bbox': bbox,
+                        'confidence': det_confidence,
                         'person_type': person_type,
                         'person_id': person_id,
-                        'recognition_confidence': float(rec_confidence) if rec_confidence else 0.0,
-                        'track_id': int(track_id) if track_id is not None else None,
+                        'recognition_confidence': rec_confidence,
+                        'track_id': track_id,
                     })
 
                     # If confidently recognized as staff, mark this track as staff and record attendance
@@ -594,27 +735,28 @@ def process_video_loop():
                         if track_id is not None and recent_track_roles.get(track_id) == 'staff':
                             # Same physical track already known as staff → skip unknown entry
                             continue
-                        # If track history says staff is confirmed for this track, never downgrade to unknown
-                        if track_id is not None:
-                            state = track_states.get(track_id)
-                            if state and state.get("staff_confirmed"):
+                        # Cheap per-track checks first - the staff embedding scan below is the costly one
+                        state = track_states.get(track_id) if track_id is not None else None
+                        if state:
+                            # If track history says staff is confirmed (or staff-like), never downgrade to unknown
+                            if state.get("staff_confirmed") or state.get("has_staff_like_match"):
+                                continue
+                            # Only consider unknown after the track has had time to stabilize
+                            track_age = current_time - state.get("first_seen", current_time)
+                            if track_age < 0.8:  # wait ~0.8s before deciding unknown
                                 continue
+                            if state.get("unknown_recorded"):
+                                # Already recorded one unknown for this track
+                                continue
+
                         # Safety net: if this embedding still matches a staff member
                         # reasonably well, don't log it as unknown.
                         if is_probable_staff_from_embedding(embedding):
+                            if state is not None:
+                                # Remember it so later frames of this track skip the scan
+                                state["has_staff_like_match"] = True
                             continue
 
-                        # Only consider unknown after the track has had time to stabilize
-                        if track_id is not None:
-                            state = track_states.get(track_id)
-                            if state:
-                                track_age = current_time - state.get("first_seen", current_time)
-                                if track_age < 0.8:  # wait ~0.8s before deciding unknown
-                                    continue
-                                if state.get("unknown_recorded"):
-                                    # Already recorded one unknown for this track
-                                    continue
-
                         # Embedding-based deduplication for unknown persons
                         if person_type == 'unknown' or (person_type == 'staff' and (rec_confidence or 0.0) < 0.55):
                             if is_same_unknown(embedding):
@@ -630,13 +772,23 @@ def process_video_loop():
                             track_id
                         )
 
-                        if track_id is not None:
-                            state = track_states.get(track_id)
-                            if state:
-                                state["unknown_recorded"] = True
+                        if state:
+                            state["unknown_recorded"] = True
                 
-                with frame_lock:
-                    current_detections = detection_info
+                # Publish by rebinding - detection_info is a fresh list every pass and is never
+                # mutated after this point, so readers need no lock and no copy
+                current_detections = detection_info
+                
+                # Forget tracks DeepSort has not reported for a while (keeps track_states bounded)
+                _prune_stale_track_states(TRACK_STATE_MAX_AGE)
+            
+            # Hand the frame to the stream encoder (one encode however many browsers are
+            # watching) - only while someone is, at no more than STREAM_MAX_FPS
+            if stream_viewers and current_time - last_stream_encode >= 1.0 / STREAM_MAX_FPS:
+                last_stream_encode = current_time
+                with stream_pending_cv:
+                    stream_pending = (frame, current_detections)
+                    stream_pending_cv.notify()
             
             # Calculate and print FPS to terminal every second
             if current_time - last_fps_print >= 1.0:
@@ -644,20 +796,74 @@ def process_video_loop():
                 if elapsed > 0:
                     fps = fps_counter / elapsed
                     detection_fps = processed_frames / elapsed if processed_frames > 0 else 0
-                    print(f"📊 FPS: {fps:.1f} | Detection FPS: {detection_fps:.1f} | Total: {frame_counter} | Processed: {processed_frames}")
+                    # No print here - console writes can stall this loop; _print_loop_stats reports it
+                    loop_stats = {
+                        'fps': round(fps, 1),
+                        'detection_fps': round(detection_fps, 1),
+                        'total_frames': frame_counter,
+                        'processed_frames': processed_frames,
+                    }
                     fps_counter = 0
                     processed_frames = 0
                     fps_start_time = current_time
                 last_fps_print = current_time
-            
-            time.sleep(0.01)  # Fast frame capture for smooth display
         except Exception as e:
             print(f"Processing error: {e}")
             time.sleep(0.1)
+    
+    # A new processing thread is started per /api/system/start - don't leave this one's DB connection behind
+    if db_manager:
+        db_manager.close_thread_connection()
+
+def _stream_encoder():
+    """Annotate + JPEG-encode handed-off frames for /video_feed, off the processing loop"""
+    global stream_pending, latest_mjpeg_part, frame_seq
+    while running:
+        with stream_pending_cv:
+            stream_pending_cv.wait_for(lambda: stream_pending is not None, timeout=0.5)
+            pending = stream_pending
+            stream_pending = None
+        if pending is None or not stream_viewers:
+            # Last viewer left after the handoff - nobody needs this encode
+            continue
+        try:
+            frame, detections = pending
+            frame_bytes = encode_jpeg(annotate_frame(frame, detections))
+        except Exception as e:
+            print(f"Stream encode error: {e}")
+            continue
+        if frame_bytes is not None:
+            # Frame it once here so viewers don't each copy the JPEG into a new part
+            part = mjpeg_part(frame_bytes)
+            with frame_cv:
+                # Re-check under the lock: if the last viewer left during the encode,
+                # generate_frames has cleared latest_mjpeg_part and this frame is stale
+                if stream_viewers:
+                    latest_mjpeg_part = part
+                    frame_seq += 1
+                    frame_cv.notify_all()
+
+def _print_loop_stats():
+    """Print the processing-loop FPS once a second from its own thread"""
+    while running:
+        time.sleep(1.0)
+        stats = loop_stats
+        print(f"📊 FPS: {stats['fps']:.1f} | Detection FPS: {stats['detection_fps']:.1f} | "
+              f"Total: {stats['total_frames']} | Processed: {stats['processed_frames']}")
+
+def _join_system_threads(timeout=SYSTEM_THREAD_JOIN_TIMEOUT):
+    """Wait for the last run's processing/encoder/stats threads to exit; True once all have"""
+    deadline = time.time() + timeout
+    alive = False
+    for thread in (processing_thread, stream_encoder_thread, loop_stats_thread):
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(max(0.0, deadline - time.time()))
+            alive = alive or thread.is_alive()
+    return not alive
 
 def process_attendance(staff_id, frame, bbox, confidence, track_id=None):
     """Process attendance for recognized staff - only records when person enters frame"""
-    global today_attendance, captured_photos, staff_in_frame
+    global today_attendance, staff_in_frame
     
     try:
         now = datetime.now()
@@ -688,16 +894,7 @@ def process_attendance(staff_id, frame, bbox, confidence, track_id=None):
             print(f"🔄 Staff {staff_id} left frame and returned - recording new check-in")
         
         # New detection or person returned - record check-in
-        # Capture photo
-        x1, y1, x2, y2 = map(int, bbox)
-        x1 = max(0, x1 - 10)
-        y1 = max(0, y1 - 10)
-        x2 = min(frame.shape[1], x2 + 10)
-        y2 = min(frame.shape[0], y2 + 10)
-        
-        captured_photo = frame[y1:y2, x1:x2].copy()
-        captured_photos[staff_id] = captured_photo.tolist()  # Convert to list for JSON
-        
+        # (cards show the stored showcase photo, so no crop of this frame is kept)
         # Record attendance based on mode
         if system_mode == 'checkin':
             record_checkin(staff_id, now, float(confidence))
@@ -734,23 +931,25 @@ def process_unknown_entry(frame, bbox, det_confidence, rec_confidence, person_ty
         
         current_time = time.time()
         
-        # Debounce: only process once per N seconds per track_id
-        if not hasattr(process_unknown_entry, 'last_processed'):
-            process_unknown_entry.last_processed = {}
-        
         # Normalize track_id to int when provided; we no longer synthesize IDs
         # from the bbox, because unknown-person deduplication is handled by
         # embedding similarity in is_same_unknown().
         if track_id is not None:
             track_id = int(track_id)
         
+        # Debounce: only process once per UNKNOWN_DEBOUNCE_SECONDS per track_id.
+        # Entries are kept oldest-first, so expired ones are dropped from the front.
+        while unknown_debounce:
+            oldest_track, oldest_time = next(iter(unknown_debounce.items()))
+            if current_time - oldest_time < UNKNOWN_DEBOUNCE_SECONDS and len(unknown_debounce) <= UNKNOWN_DEBOUNCE_MAX:
+                break
+            del unknown_debounce[oldest_track]
+        
         # Check if we've processed this track recently
-        last_time = process_unknown_entry.last_processed.get(track_id, 0)
-        # Increase debounce window so the same person is not saved many times
-        if current_time - last_time < 180.0:  # 180 seconds debounce
+        if track_id in unknown_debounce:
             return
         
-        process_unknown_entry.last_processed[track_id] = current_time
+        unknown_debounce[track_id] = current_time
         
         # Determine entry type and reason
         entry_type = 'unknown_person'
@@ -784,17 +983,17 @@ def process_unknown_entry(frame, bbox, det_confidence, rec_confidence, person_ty
         body_x2 = min(w, x2 + expand_sides)
         body_y2 = min(h, y2 + expand_down)
         
-        # Extract full body image
-        full_body_image = frame[body_y1:body_y2, body_x1:body_x2].copy()
-        
-        # Make sure we have a valid image
-        if full_body_image.size == 0 or full_body_image.shape[0] < 50 or full_body_image.shape[1] < 50:
-            # Fallback: use face bounding box with some expansion
-            full_body_image = frame[max(0, y1-20):min(h, y2+20), max(0, x1-20):min(w, x2+20)].copy()
-        
-        if full_body_image.size == 0:
+        # Pick the final crop box before slicing (fallback: face box with some expansion)
+        if body_x2 - body_x1 < 50 or body_y2 - body_y1 < 50:
+            cx1, cy1, cx2, cy2 = padded_box(bbox, frame.shape, 20)
+        else:
+            cx1, cy1, cx2, cy2 = body_x1, body_y1, body_x2, body_y2
+        if cx2 <= cx1 or cy2 <= cy1:
             return
         
+        # Single view into the frame - encoded to JPEG before this function returns
+        full_body_image = frame[cy1:cy2, cx1:cx2]
+        
         # Record unknown entry in database
         entry_id = db_manager.record_unknown_entry(
             track_id=track_id,
@@ -819,6 +1018,49 @@ def process_unknown_entry(frame, bbox, det_confidence, rec_confidence, person_ty
         import traceback
         traceback.print_exc()
 
+def _attendance_writer():
+    """Drain attendance_q into the database (daemon thread), one transaction per batch
+
+    A None item is the shutdown sentinel: everything queued before it is written, then the thread exits.
+    """
+    stopping = False
+    while not stopping:
+        batch = [attendance_q.get()]
+        # Shift-start bursts: gather what arrives in the next ~100 ms and commit it together
+        deadline = time.time() + ATTENDANCE_BATCH_WAIT
+        while len(batch) < ATTENDANCE_BATCH_MAX:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(attendance_q.get(timeout=remaining))
+            except queue.Empty:
+                break
+        if None in batch:
+            stopping = True
+            batch = [event for event in batch if event is not None]
+        if not batch:
+            continue
+        try:
+            db_manager.record_staff_attendance_batch(batch)
+        except Exception as e:
+            print(f"Attendance write error: {e}")
+    db_manager.close_thread_connection()
+
+def _flush_attendance_writer():
+    """Write whatever is still queued before the process exits (the writer is a daemon thread)"""
+    if attendance_writer_thread is not None and attendance_writer_thread.is_alive():
+        attendance_q.put(None)
+        attendance_writer_thread.join(timeout=10.0)
+
+def start_attendance_writer():
+    """Start the attendance writer thread once"""
+    global attendance_writer_thread
+    if attendance_writer_thread is None:
+        attendance_writer_thread = threading.Thread(target=_attendance_writer, daemon=True)
+        attendance_writer_thread.start()
+        atexit.register(_flush_attendance_writer)
+
 def record_checkin(staff_id, check_time, confidence):
     """Record check-in - only records if this is a new entry (not updating existing)"""
     try:
@@ -838,25 +1080,13 @@ def record_checkin(staff_id, check_time, confidence):
             except Exception as e:
                 print(f"Error parsing existing check-in time: {e}")
         
-        expected_time = datetime.strptime('09:00:00', '%H:%M:%S').time()
-        late_window_end = datetime.strptime('09:20:00', '%H:%M:%S').time()
         check_time_only = check_time.time()
         
         # Only show late status if check-in is between 9:00 AM and 9:20 AM
-        is_late = expected_time < check_time_only <= late_window_end
-        
-        if is_late:
-            minutes_late = int((check_time_only.hour * 60 + check_time_only.minute) - 
-                             (expected_time.hour * 60 + expected_time.minute))
-        else:
-            minutes_late = 0
+        is_late = EXPECTED_CHECKIN_TIME < check_time_only <= LATE_WINDOW_END
+        minutes_late = (check_time_only.hour * 60 + check_time_only.minute) - EXPECTED_CHECKIN_MINUTES if is_late else 0
         
         status = f"{minutes_late} min Late" if is_late else "On Time"
-        # Late minutes relative to 09:00 for event logging (only between 9:00-9:20)
-        if expected_time < check_time_only <= late_window_end:
-            late_minutes_event = max(0, int((check_time_only.hour * 60 + check_time_only.minute) - (expected_time.hour * 60 + expected_time.minute)))
-        else:
-            late_minutes_event = 0
         
         today_attendance[staff_id] = {
             'staff_id': staff_id,
@@ -865,8 +1095,8 @@ def record_checkin(staff_id, check_time, confidence):
             'confidence': float(confidence)
         }
         
-        # Save to database
-        db_manager.record_staff_attendance(staff_id, 'check_in', float(confidence))
+        # Save to database (on the writer thread - never blocks recognition on disk)
+        attendance_q.put((staff_id, 'check_in', float(confidence), check_time))
         print(f"✅ Check-in: {staff_id} at {check_time.strftime('%I:%M %p')} - {status}")
     except Exception as e:
         print(f"Check-in error: {e}")
@@ -883,67 +1113,144 @@ def record_checkout(staff_id, check_time, confidence):
                 'confidence': float(confidence)
             }
         
-        db_manager.record_staff_attendance(staff_id, 'check_out', float(confidence))
+        attendance_q.put((staff_id, 'check_out', float(confidence), check_time))
         print(f"✅ Check-out: {staff_id} at {check_time.strftime('%I:%M %p')}")
     except Exception as e:
         print(f"Check-out error: {e}")
 
-def generate_frames():
-    """Generate video frames with overlays for streaming"""
-    global current_frame, current_detections
+@lru_cache(maxsize=256)
+def _label_sprite(text, scale, color):
+    """Render a text label once; returns (sprite, mask, ascent, pad) for pasting"""
+    thickness = 2
+    (tw, th), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, scale, thickness)
+    pad = thickness
+    sprite = np.zeros((th + baseline + 2 * pad, tw + 2 * pad, 3), dtype=np.uint8)
+    cv2.putText(sprite, text, (pad, th + pad), cv2.FONT_HERSHEY_SIMPLEX, scale, color, thickness)
+    mask = sprite.any(axis=2)
+    return sprite, mask, th, pad
+
+# Static per-box header: (text, baseline offset from text_y, scale), drawn top to bottom
+HEADER_LABELS = (('FACIAL RECOGNITION', -40, 0.85), ('HUMAN MOTION DETECTED', -18, 0.75))
+
+@lru_cache(maxsize=8)
+def _header_sprite(color):
+    """Render both static header labels into one sprite; returns (sprite, mask, dx, dy) relative to (x1, text_y)"""
+    thickness = 2
+    pad = thickness
+    sizes = [cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, scale, thickness) for text, _, scale in HEADER_LABELS]
+    top = min(dy - th for (_, dy, _), ((_, th), _) in zip(HEADER_LABELS, sizes)) - pad
+    bottom = max(dy + baseline for (_, dy, _), (_, baseline) in zip(HEADER_LABELS, sizes)) + pad
+    width = max(tw for (tw, _), _ in sizes) + 2 * pad
+    sprite = np.zeros((bottom - top, width, 3), dtype=np.uint8)
+    for text, dy, scale in HEADER_LABELS:
+        cv2.putText(sprite, text, (pad, dy - top), cv2.FONT_HERSHEY_SIMPLEX, scale, color, thickness)
+    mask = sprite.any(axis=2)
+    return sprite, mask, -pad, top
+
+def _paste_label(frame, text, org, scale, color):
+    """Paste a cached label at a cv2.putText-style origin (bottom-left), clipped to the frame"""
+    sprite, mask, ascent, pad = _label_sprite(text, scale, color)
+    _paste_sprite(frame, sprite, mask, org[0] - pad, org[1] - ascent - pad)
+
+def _paste_sprite(frame, sprite, mask, x0, y0):
+    """Copy the masked pixels of a sprite with its top-left at (x0, y0), clipped to the frame"""
+    fh, fw = frame.shape[:2]
+    sx1, sy1 = max(0, -x0), max(0, -y0)
+    sx2 = min(sprite.shape[1], fw - x0)
+    sy2 = min(sprite.shape[0], fh - y0)
+    if sx1 >= sx2 or sy1 >= sy2:
+        return
+    np.copyto(frame[y0 + sy1:y0 + sy2, x0 + sx1:x0 + sx2], sprite[sy1:sy2, sx1:sx2],
+              where=mask[sy1:sy2, sx1:sx2, None])
+
+# Column pairs of an (x1, y1, x2, y2) row giving the box outline as a closed polygon
+BOX_CORNER_INDEX = np.array([[0, 1], [2, 1], [2, 3], [0, 3]])
+
+def annotate_frame(frame, detections):
+    """Draw face detection boxes and labels for the video feed (in place)
+
+    Runs on the stream encoder thread after the processing loop has handed the
+    frame off: every get_frame() result is a fresh array, and the crops for
+    unknown-entry photos have already been encoded by then, so nothing else
+    sees the boxes and no copy is needed.
+    """
+    boxes = []
+    labels = []
+    for det in detections:
+        bbox = det.get('bbox')
+        if not bbox:
+            continue
+        
+        x1, y1, x2, y2 = map(int, bbox)
+        boxes.append((x1, y1, x2, y2))
+        person_type = det.get('person_type', 'unknown')
+        person_id = det.get('person_id')
+        rec_confidence = det.get('recognition_confidence', 0.0)
+        employee_id = None
+        if person_type == 'staff' and person_id and rec_confidence >= 0.55:
+            employee_id = get_employee_id(person_id)
+        labels.append((x1, max(50, y1), employee_id))
+    
+    if not boxes:
+        return frame
+    
+    # Draw all bounding boxes in one call (corners x1y1, x2y1, x2y2, x1y2 per box)
+    boxes = np.array(boxes, dtype=np.int32)
+    color = (255, 144, 30)  # Blue
+    cv2.polylines(frame, list(boxes[:, BOX_CORNER_INDEX]), True, color, 3)
+    
+    # Add labels on top (rendered once, then pasted from the sprite cache - one paste for the static pair)
+    header, header_mask, dx, dy = _header_sprite((255, 255, 255))
+    for x1, text_y, employee_id in labels:
+        _paste_sprite(frame, header, header_mask, x1 + dx, text_y + dy)
+        if employee_id is not None:
+            _paste_label(frame, f'ID: {employee_id}', (x1, text_y - 2), 0.7, (0, 255, 0))
     
+    return frame
+
+def _build_disconnected_jpeg():
+    """Black frame with "Camera Disconnected" message, JPEG-encoded once"""
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    cv2.putText(frame, 'Camera Disconnected', (150, 240), 
+              cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+    return encode_jpeg(frame, 85)
+
+DISCONNECTED_PART = mjpeg_part(_build_disconnected_jpeg())
+
+def generate_frames():
+    """Stream the latest annotated JPEG (encoded once per frame by _stream_encoder)"""
+    global stream_viewers, latest_mjpeg_part
+    with frame_lock:
+        stream_viewers += 1
+        start_seq = frame_seq
+    try:
+        yield from _stream_frames(start_seq)
+    finally:
+        # Client went away (generator closed) - stop encoding once nobody is left
+        with frame_lock:
+            stream_viewers -= 1
+            if stream_viewers == 0:
+                # Nothing refreshes it while nobody watches - don't show it to the next viewer
+                latest_mjpeg_part = None
+
+def _stream_frames(last_seq):
+    """MJPEG multipart body for one viewer, starting with the first frame published after last_seq"""
     while True:
         try:
-            detections = []
-            with frame_lock:
-                if current_frame is None:
-                    # Generate black frame with "Camera Disconnected" message
-                    frame = np.zeros((480, 640, 3), dtype=np.uint8)
-                    cv2.putText(frame, 'Camera Disconnected', (150, 240), 
-                              cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-                else:
-                    frame = current_frame.copy()
-                    detections = current_detections.copy()
-            
-            # Draw face detection boxes
-            for det in detections:
-                bbox = det.get('bbox')
-                if not bbox:
-                    continue
-                
-                x1, y1, x2, y2 = map(int, bbox)
-                person_type = det.get('person_type', 'unknown')
-                person_id = det.get('person_id')
-                rec_confidence = det.get('recognition_confidence', 0.0)
-                
-                # Draw bounding box
-                color = (255, 144, 30)  # Blue
-                cv2.rectangle(frame, (x1, y1), (x2, y2), color, 3)
-                
-                # Add labels
-                text_y = max(50, y1)
-                cv2.putText(frame, 'FACIAL RECOGNITION', (x1, text_y - 40), 
-                          cv2.FONT_HERSHEY_SIMPLEX, 0.85, (255, 255, 255), 2)
-                cv2.putText(frame, 'HUMAN MOTION DETECTED', (x1, text_y - 18), 
-                          cv2.FONT_HERSHEY_SIMPLEX, 0.75, (255, 255, 255), 2)
-                
-                if person_type == 'staff' and person_id and rec_confidence >= 0.55:
-                    employee_id = get_employee_id(person_id)
-                    cv2.putText(frame, f'ID: {employee_id}', (x1, text_y - 2), 
-                              cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            
-            # Overlay texts removed (impex / LIVE handled via HTML overlay images)
+            # Wake as soon as the producer publishes a new frame (resend the last one after 1s idle)
+            with frame_cv:
+                frame_cv.wait_for(lambda: frame_seq != last_seq, timeout=1.0)
+                part = latest_mjpeg_part
+                last_seq = frame_seq
             
-            # Encode frame as JPEG
-            ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-            if not ret:
+            if part is None:
+                # Camera disconnected - serve the pre-encoded placeholder
+                yield DISCONNECTED_PART
+                time.sleep(0.1)
                 continue
             
-            frame_bytes = buffer.tobytes()
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-            
-            time.sleep(0.033)  # ~30 FPS
+            # Already annotated, encoded and framed by _stream_encoder - shared by every viewer
+            yield part
             
         except Exception as e:
             print(f"Frame generation error: {e}")
@@ -976,8 +1283,8 @@ def video_feed():
 def get_today_attendance():
     """Get today's attendance records"""
     try:
-        # Load fresh data
-        today_data = db_manager.get_today_attendance()
+        # Load fresh data - staff names come joined in, no per-record lookups
+        today_data = db_manager.get_today_attendance_joined()
         attendance_records = today_data.get('attendance', []) if isinstance(today_data, dict) else []
         checkin_events = today_data.get('checkins', []) if isinstance(today_data, dict) else []
 
@@ -985,7 +1292,6 @@ def get_today_attendance():
         attendance_list = []
         for att in attendance_records:
             staff_id = att.get('staff_id')
-            staff_info = db_manager.get_staff_info(staff_id)
             employee_id = get_employee_id(staff_id)
             
             # Get showcase photo URL instead of captured photo
@@ -994,7 +1300,7 @@ def get_today_attendance():
             attendance_list.append({
                 'staff_id': staff_id,
                 'employee_id': employee_id,
-                'name': staff_info.get('name', 'Unknown') if staff_info else 'Unknown',
+                'name': att.get('name') or 'Unknown',
                 'check_in_time': att.get('check_in_time').isoformat() if att.get('check_in_time') else None,
                 'check_out_time': att.get('check_out_time').isoformat() if att.get('check_out_time') else None,
                 'status': att.get('status', 'Present'),
@@ -1005,7 +1311,6 @@ def get_today_attendance():
         checkin_list = []
         for ev in checkin_events:
             staff_id = ev.get('staff_id')
-            staff_info = db_manager.get_staff_info(staff_id)
             employee_id = get_employee_id(staff_id)
             check_time_raw = ev.get('check_time')
             check_time_iso = None
@@ -1019,25 +1324,21 @@ def get_today_attendance():
             late_minutes = ev.get('late_minutes', 0)
             check_time_obj = None
             if check_time_iso:
+                # check_time is stored as 'HH:MM:SS' - parse it directly, not the rebuilt ISO string
                 try:
-                    check_time_obj = datetime.fromisoformat(check_time_iso.replace('Z', '+00:00')).time()
-                except:
-                    try:
-                        check_time_obj = datetime.strptime(check_time_iso.split('T')[1] if 'T' in check_time_iso else check_time_iso, '%H:%M:%S').time()
-                    except:
-                        pass
+                    check_time_obj = dtime.fromisoformat(check_time_raw)
+                except (TypeError, ValueError):
+                    pass
             
             # Only show late if between 9:00 AM and 9:20 AM
-            if check_time_obj:
-                expected_time = datetime.strptime('09:00:00', '%H:%M:%S').time()
-                late_window_end = datetime.strptime('09:20:00', '%H:%M:%S').time()
-                if not (expected_time < check_time_obj <= late_window_end):
+            if check_time_obj is not None:
+                if not (EXPECTED_CHECKIN_TIME < check_time_obj <= LATE_WINDOW_END):
                     late_minutes = 0
 
             checkin_list.append({
                 'staff_id': staff_id,
                 'employee_id': employee_id,
-                'name': staff_info.get('name', 'Unknown') if staff_info else 'Unknown',
+                'name': ev.get('name') or 'Unknown',
                 'check_time': check_time_iso,
                 'status': ev.get('status', 'Present'),
                 'late_minutes': late_minutes,  # Only non-zero if between 9:00-9:20
@@ -1052,28 +1353,26 @@ def get_today_attendance():
 def get_all_staff():
     """Get all staff members"""
     try:
-        all_staff = db_manager.get_all_staff()
-        staff_list = []
-        for staff in all_staff:
-            staff_list.append({
-                'staff_id': staff['staff_id'],
-                'employee_id': get_employee_id(staff['staff_id']),
-                'name': staff.get('name', 'Unknown'),
-                'department': staff.get('department', '')
-            })
-        return jsonify({'staff': staff_list})
+        # Staff edits happen in the admin app, so the cached list is refreshed on a TTL
+        if time.time() - staff_directory_loaded_at > STAFF_DIRECTORY_TTL:
+            load_employee_ids()
+        return jsonify({'staff': staff_directory})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/system/start', methods=['POST'])
 def start_system():
     """Start face recognition system"""
-    global running, face_engine, processing_thread
+    global running, face_engine, processing_thread, stream_encoder_thread, loop_stats_thread
     
     try:
         if running:
             return jsonify({'status': 'already_running'})
         
+        # A quick stop/start must not leave the previous run's loops going alongside the new ones
+        if not _join_system_threads():
+            return jsonify({'error': 'Previous run is still stopping, try again'}), 409
+        
         data = request.get_json(silent=True) or {}
         requested_mode = data.get('mode')
         if requested_mode in ['checkin', 'checkout']:
@@ -1083,6 +1382,8 @@ def start_system():
         # Initialize face engine
         gpu_available = detect_gpu_capability()
         face_engine = FaceRecognitionEngine(gpu_mode=gpu_available)
+        if gpu_available:
+            _enable_gpu_resize()
         
         # Start camera
         if not camera_manager.start_camera():
@@ -1093,6 +1394,10 @@ def start_system():
         # Start processing thread
         processing_thread = threading.Thread(target=process_video_loop, daemon=True)
         processing_thread.start()
+        stream_encoder_thread = threading.Thread(target=_stream_encoder, daemon=True)
+        stream_encoder_thread.start()
+        loop_stats_thread = threading.Thread(target=_print_loop_stats, daemon=True)
+        loop_stats_thread.start()
         
         return jsonify({'status': 'started', 'gpu_enabled': gpu_available})
     except Exception as e:
@@ -1107,6 +1412,8 @@ def stop_system():
         running = False
         if camera_manager:
             camera_manager.stop_camera()
+        if not _join_system_threads():
+            print("⚠️ Processing threads still stopping")
         return jsonify({'status': 'stopped'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1125,6 +1432,11 @@ def get_system_status():
         'camera_connected': camera_connected
     })
 
+@app.route('/api/system/stats', methods=['GET'])
+def get_system_stats():
+    """Get processing-loop FPS counters"""
+    return jsonify(loop_stats)
+
 @app.route('/api/system/mode', methods=['POST'])
 def set_mode():
     """Set attendance mode (if not locked)"""
@@ -1140,22 +1452,32 @@ def set_mode():
         return jsonify({'status': 'updated', 'mode': system_mode})
     return jsonify({'error': 'Invalid mode'}), 400
 
+def _build_placeholder_photo_jpeg():
+    """Gray 300x400 card shown when a staff member has no photo, encoded once"""
+    img_io = io.BytesIO()
+    Image.new('RGB', (300, 400), color='gray').save(img_io, 'JPEG')
+    return img_io.getvalue()
+
+PLACEHOLDER_PHOTO_JPEG = _build_placeholder_photo_jpeg()
+
+def _photo_response(photo_jpeg):
+    """JPEG response the browser may cache but must revalidate (ETag -> 304 when unchanged)"""
+    response = Response(photo_jpeg, mimetype='image/jpeg')
+    response.add_etag()
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
 @app.route('/api/admin/staff/<staff_id>/showcase-photo', methods=['GET'])
 def get_staff_showcase_photo_web(staff_id):
     """Get staff showcase photo (for display in employee cards)"""
     try:
-        showcase_photo = db_manager.get_staff_showcase_photo(staff_id)
-        if showcase_photo is not None:
-            success, buffer = cv2.imencode('.jpg', showcase_photo)
-            if success:
-                return Response(buffer.tobytes(), mimetype='image/jpeg')
+        # Stored blob is already a JPEG - no decode/re-encode per request
+        photo_jpeg = db_manager.get_staff_showcase_photo_jpeg(staff_id)
+        if photo_jpeg:
+            return _photo_response(photo_jpeg)
         
         # Return placeholder if no showcase photo
-        img = Image.new('RGB', (300, 400), color='gray')
-        img_io = io.BytesIO()
-        img.save(img_io, 'JPEG')
-        img_io.seek(0)
-        return Response(img_io, mimetype='image/jpeg')
+        return _photo_response(PLACEHOLDER_PHOTO_JPEG)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 